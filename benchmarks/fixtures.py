@@ -0,0 +1,58 @@
+import random
+from datetime import date, timedelta
+from meals.catalog import build_food
+from meals.models import FoodItem
+
+# Synthetic but realistically sized meal payloads, shared by the load
+# generator (bench_seed) and the micro-benchmarks.
+
+# name, typical portion in grams, per-100 g nutrients in canonical units
+FOODS = [
+    ('Plov', 350, {'calories': 198, 'carbs': 24.0, 'fat': 9.1, 'protein': 6.2, 'fiber': 1.1, 'calcium': 18, 'iron': 1.3,
+                   'magnesium': 21, 'potassium': 160, 'zinc': 1.1, 'sodium': 390, 'vitamin_a': 210, 'vitamin_b9': 14,
+                   'vitamin_c': 1.5, 'cholesterol': 28, 'saturated_fat': 2.9, 'omega_3': 0.08}),
+    ('Non', 100, {'calories': 265, 'carbs': 52.0, 'fat': 2.8, 'protein': 8.9, 'fiber': 2.3, 'calcium': 25, 'iron': 2.1,
+                  'magnesium': 26, 'potassium': 115, 'zinc': 0.8, 'sodium': 480, 'vitamin_b9': 85, 'saturated_fat': 0.6}),
+    ('Green tea', 250, {'calories': 1, 'potassium': 8, 'magnesium': 1, 'sodium': 1}),
+    ('Lagman', 400, {'calories': 145, 'carbs': 17.5, 'fat': 5.2, 'protein': 7.4, 'fiber': 1.4, 'calcium': 20,
+                     'iron': 1.5, 'potassium': 210, 'sodium': 420, 'vitamin_a': 120, 'vitamin_c': 6.0,
+                     'cholesterol': 22, 'saturated_fat': 1.8}),
+    ('Samsa', 150, {'calories': 310, 'carbs': 28.0, 'fat': 18.0, 'protein': 10.5, 'fiber': 1.2, 'iron': 1.9,
+                    'sodium': 510, 'zinc': 1.9, 'vitamin_b12': 0.9, 'cholesterol': 45, 'saturated_fat': 7.4}),
+    ('Boiled egg', 50, {'calories': 155, 'fat': 10.6, 'protein': 12.6, 'carbs': 1.1, 'calcium': 50, 'iron': 1.2,
+                        'zinc': 1.0, 'sodium': 124, 'vitamin_a': 149, 'vitamin_b12': 1.1, 'vitamin_d': 2.2,
+                        'cholesterol': 373, 'saturated_fat': 3.3, 'omega_3': 0.07}),
+    ('Achichuk salad', 150, {'calories': 22, 'carbs': 4.1, 'fat': 0.2, 'protein': 1.0, 'fiber': 1.3, 'potassium': 230,
+                             'vitamin_a': 40, 'vitamin_c': 16.0, 'vitamin_b9': 15}),
+    ('Apple', 180, {'calories': 52, 'carbs': 13.8, 'fat': 0.2, 'protein': 0.3, 'fiber': 2.4, 'potassium': 107,
+                    'vitamin_c': 4.6}),
+]
+
+MEAL_TIMES = ['breakfast', 'lunch', 'dinner', 'snack']
+
+# Seeded rows are recognised by these, so bench_seed --reset never touches real data
+BENCH_PHONE_PREFIX = '+99800'
+# Users created by the otp_login scenario as it signs up new phones
+BENCH_LOGIN_PHONE_PREFIX = '+99802'
+BENCH_DIETOLOGIST_PHONE = '+99801000000'
+BENCH_PASSWORD = 'bench-password'
+BENCH_GROUP_CODE = 'BENCH'
+
+_items = [
+    (FoodItem(name=name, nutrients=nutrients), portion)
+    for name, portion, nutrients in FOODS
+]
+
+def foods_data(rng=random, items=(1, 4)):
+    """A foods_data payload with 1-4 foods and jittered portions"""
+    foods = []
+    for item, portion in rng.sample(_items, rng.randint(*items)):
+        foods.append(build_food(item, portion * rng.uniform(0.6, 1.5), 'en'))
+    return {'is_food': True, 'confidence': 'high', 'foods': foods}
+
+def bench_phone(index):
+    return f"{BENCH_PHONE_PREFIX}{index:07d}"
+
+def meal_days(days, end=None):
+    end = end or date.today()
+    return [end - timedelta(days=offset) for offset in range(days)]
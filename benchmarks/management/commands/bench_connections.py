@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from benchmarks.stats import summarize
+
+MODES = ('connect', 'pool')
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request connection setup against the psycopg pool under concurrent load. '
+        "'connect' opens a fresh connection per simulated request (CONN_MAX_AGE=0 without a pool); "
+        "'pool' borrows from a ConnectionPool sized like settings.DATABASES['default']['OPTIONS']['pool']."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated subset of connect,pool')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=50, help='Simulated requests per worker')
+        parser.add_argument('--queries', type=int, default=3, help='Queries per simulated request')
+        parser.add_argument('--pool-size', type=int, help='Pool max_size (default from settings)')
+        parser.add_argument('--output', help='Also write the results as JSON here')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Connection benchmarks need the PostgreSQL backend')
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+        params = connection.get_connection_params()
+        params['autocommit'] = True
+
+        self.stdout.write(
+            f"{options['concurrency']} workers x {options['requests']} requests x {options['queries']} queries"
+        )
+        self.stdout.write(f"{'mode':10} {'acquire p50':>12} {'p95':>8} {'p99':>8} {'request p50':>12} {'p95':>8} {'rps':>8} {'err':>5}")
+        results = {}
+        for mode in modes:
+            results[mode] = self.run_mode(mode, params, options)
+            acquire, request = results[mode]['acquire'], results[mode]['request']
+            self.stdout.write(
+                f"{mode:10} {acquire['p50_ms']:>10.2f}ms {acquire['p95_ms']:>6.2f}ms {acquire['p99_ms']:>6.2f}ms "
+                f"{request['p50_ms']:>10.2f}ms {request['p95_ms']:>6.2f}ms {request.get('rps', 0):>8.0f} {request['errors']:>5}"
+            )
+
+        if 'connect' in results and 'pool' in results and results['pool']['request']['p50_ms']:
+            speedup = results['connect']['request']['p50_ms'] / results['pool']['request']['p50_ms']
+            self.stdout.write(f"Pooled requests are {speedup:.1f}x faster at p50")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    def run_mode(self, mode, params, options):
+        import psycopg
+        from psycopg_pool import ConnectionPool
+
+        pool = None
+        if mode == 'pool':
+            configured = settings.DATABASES['default'].get('OPTIONS', {}).get('pool')
+            configured = configured if isinstance(configured, dict) else {}
+            max_size = options['pool_size'] or configured.get('max_size', 10)
+            timeout = configured.get('timeout', 30)
+            pool = ConnectionPool(
+                kwargs=params,
+                min_size=min(configured.get('min_size', 2), max_size),
+                max_size=max_size,
+                timeout=timeout,
+                open=True,
+            )
+            try:
+                pool.wait(timeout)
+            except psycopg.Error as e:
+                pool.close()
+                raise CommandError(f"Pool did not fill: {e}")
+
+        acquire, request = [], []
+        errors = [0]
+        lock = threading.Lock()
+
+        def worker():
+            mine_acquire, mine_request = [], []
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                try:
+                    conn = pool.getconn() if pool else psycopg.connect(**params)
+                    acquired = time.perf_counter()
+                    try:
+                        with conn.cursor() as cursor:
+                            for _ in range(options['queries']):
+                                cursor.execute('SELECT 1')
+                                cursor.fetchone()
+                    finally:
+                        if pool:
+                            pool.putconn(conn)
+                        else:
+                            conn.close()
+                except psycopg.Error:
+                    with lock:
+                        errors[0] += 1
+                    continue
+                finished = time.perf_counter()
+                mine_acquire.append(acquired - start)
+                mine_request.append(finished - start)
+            with lock:
+                acquire.extend(mine_acquire)
+                request.extend(mine_request)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if pool:
+            pool.close()
+
+        return {
+            'acquire': summarize(acquire, errors[0]),
+            'request': summarize(request, errors[0], elapsed),
+        }
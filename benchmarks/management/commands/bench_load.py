@@ -0,0 +1,192 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from users.models import User
+from meals.models import Meal
+from dietologists.models import Dietologist, ClientRequest
+from dietologists.views import get_tokens_for_dietologist
+from users.views import get_tokens_for_user
+from benchmarks.fixtures import BENCH_PHONE_PREFIX, BENCH_DIETOLOGIST_PHONE, BENCH_GROUP_CODE
+from benchmarks.scenarios import SCENARIOS, parse_mix, sample_image, sample_audio
+from benchmarks.stats import summarize, compare
+
+class LoadContext:
+    """Tokens and ids of the seeded data, minted once before the run"""
+
+    def __init__(self, max_users):
+        users = list(User.objects.filter(phone_number__startswith=BENCH_PHONE_PREFIX).order_by('id')[:max_users])
+        if not users:
+            raise CommandError('No bench users found; run bench_seed first')
+
+        meal_ids = {}
+        for user_id, meal_id in Meal.objects.filter(user__in=users).order_by('-meal_date').values_list('user_id', 'id'):
+            ids = meal_ids.setdefault(user_id, [])
+            if len(ids) < 50:
+                ids.append(meal_id)
+
+        self.users = [
+            {'id': user.id, 'token': get_tokens_for_user(user)['access_token'], 'meal_ids': meal_ids[user.id]}
+            for user in users if user.id in meal_ids
+        ]
+        self.dates = sorted({
+            date.isoformat() for date in Meal.objects.filter(user__in=users).values_list('meal_date', flat=True).distinct()
+        })
+
+        dietologist = Dietologist.objects.filter(phone_number=BENCH_DIETOLOGIST_PHONE).first()
+        self.dietologist_headers = {}
+        self.client_ids = []
+        if dietologist:
+            token = get_tokens_for_dietologist(dietologist)['access_token']
+            self.dietologist_headers = {'Authorization': f"Bearer {token}"}
+            self.client_ids = list(ClientRequest.objects.filter(
+                group__code=BENCH_GROUP_CODE, status='approved'
+            ).values_list('user_id', flat=True))
+
+        self.image = sample_image()
+        self.audio = sample_audio()
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+class Command(BaseCommand):
+    help = (
+        'Drive the API with a weighted scenario mix and report p50/p95/p99 latency and RPS per scenario. '
+        'Expects data from bench_seed, the server started with OPENAI_BASE_URL pointing at run_openai_stub '
+        'and SMS_API_URL at the same stub.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--mix', default='mobile',
+                            help="Preset (mobile, read, write, analyze, dietologist, login) or 'scenario=weight,...'")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds, after warmup')
+        parser.add_argument('--warmup', type=float, default=5.0)
+        parser.add_argument('--think-ms', type=float, default=0.0, help='Pause between requests per worker')
+        parser.add_argument('--timeout', type=float, default=60.0)
+        parser.add_argument('--max-users', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--label', default='', help='Free-form label stored with the results')
+        parser.add_argument('--output', help='Results JSON path (default bench-results/load-<time>-<rev>.json)')
+        parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        ctx = LoadContext(options['max_users'])
+        if not ctx.client_ids:
+            mix = {name: weight for name, weight in mix.items() if name not in ('dietologist_clients', 'client_detail')}
+        if not mix:
+            raise CommandError('Nothing left to run in this mix')
+
+        names, weights = list(mix), list(mix.values())
+        samples = {name: [] for name in names}
+        errors = {name: 0 for name in names}
+        statuses = {name: {} for name in names}
+        lock = threading.Lock()
+
+        started = time.monotonic()
+        measure_from = started + options['warmup']
+        stop_at = measure_from + options['duration']
+
+        def worker(index):
+            rng = random.Random(options['seed'] * 1000 + index)
+            with httpx.Client(base_url=options['base_url'], timeout=options['timeout']) as client:
+                while time.monotonic() < stop_at:
+                    name = rng.choices(names, weights)[0]
+                    start = time.monotonic()
+                    try:
+                        status = SCENARIOS[name](client, ctx, rng).status_code
+                    except Exception as e:
+                        status = type(e).__name__
+                    elapsed = time.monotonic() - start
+
+                    if start >= measure_from:
+                        with lock:
+                            statuses[name][str(status)] = statuses[name].get(str(status), 0) + 1
+                            if isinstance(status, int) and status < 400:
+                                samples[name].append(elapsed)
+                            else:
+                                errors[name] += 1
+                    if options['think_ms']:
+                        time.sleep(options['think_ms'] / 1000)
+            connection.close()
+
+        self.stdout.write(
+            f"Running {options['concurrency']} workers for {options['warmup']:.0f}s warmup + "
+            f"{options['duration']:.0f}s against {options['base_url']}"
+        )
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = options['duration']
+        results = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'revision': git_revision(),
+                'label': options['label'],
+                'base_url': options['base_url'],
+                'mix': mix,
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'warmup': options['warmup'],
+                'users': len(ctx.users),
+                'python': platform.python_version(),
+            },
+            'overall': summarize(
+                [value for values in samples.values() for value in values], sum(errors.values()), elapsed
+            ),
+            'scenarios': {name: summarize(samples[name], errors[name], elapsed) for name in names},
+            'status_codes': statuses,
+        }
+
+        self.report(results)
+
+        output = options['output'] or os.path.join(
+            'bench-results', f"load-{datetime.now():%Y%m%d-%H%M%S}-{results['meta']['revision'] or 'local'}.json"
+        )
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f"Results written to {output}")
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            self.report_comparison(results, baseline)
+
+    def report(self, results):
+        self.stdout.write(f"{'scenario':22} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        rows = list(results['scenarios'].items()) + [('TOTAL', results['overall'])]
+        for name, summary in rows:
+            self.stdout.write(
+                f"{name:22} {summary['count']:>7} {summary['errors']:>5} {summary.get('rps', 0):>8.1f} "
+                f"{summary['p50_ms']:>7.0f}ms {summary['p95_ms']:>6.0f}ms {summary['p99_ms']:>6.0f}ms"
+            )
+
+    def report_comparison(self, results, baseline):
+        current = {**results['scenarios'], 'TOTAL': results['overall']}
+        previous = {**baseline.get('scenarios', {}), 'TOTAL': baseline.get('overall', {})}
+        self.stdout.write(f"Compared to {baseline.get('meta', {}).get('revision') or 'baseline'}:")
+        for name, changes in compare(current, previous).items():
+            formatted = '  '.join(f"{key} {change:+.1%}" for key, change in changes.items())
+            self.stdout.write(f"{name:22} {formatted}")
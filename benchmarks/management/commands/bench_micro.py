@@ -0,0 +1,83 @@
+import fnmatch
+import json
+import os
+import platform
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.micro import CASES, DEFAULT_TOLERANCE, TOLERANCES, calibration, measure
+
+BASELINE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'micro_baseline.json'))
+
+class Command(BaseCommand):
+    help = (
+        'Time per-request CPU hot paths (aggregation, serializers, exception handler, JWT decode, '
+        'response rendering) and fail when a case regresses past its threshold'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', '--filter', default='*', help='Glob over case names')
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--baseline', default=BASELINE_PATH)
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Store these results as the new baseline instead of checking')
+        parser.add_argument('--tolerance', type=float, help='Override every per-case tolerance')
+        parser.add_argument('--output', help='Also write the full results as JSON here')
+
+    def handle(self, *args, **options):
+        names = [name for name in CASES if fnmatch.fnmatch(name, options['filter'])]
+        if not names:
+            raise CommandError(f"No cases match {options['filter']}")
+
+        reference = measure(calibration, rounds=options['rounds'])['min']
+        results = {}
+        for name in names:
+            timing = measure(CASES[name](), rounds=options['rounds'])
+            # Best round relative to the calibration workload: the least noisy
+            # estimate of CPU cost, and comparable across machines
+            timing['score'] = timing['min'] / reference
+            results[name] = timing
+
+        baseline = self.load_baseline(options['baseline'])
+        regressions = []
+
+        self.stdout.write(f"{'case':30} {'median':>10} {'min':>10} {'score':>9} {'vs base':>9}")
+        for name, timing in results.items():
+            change = ''
+            base = baseline.get(name)
+            if base:
+                ratio = timing['score'] / base['score'] - 1
+                tolerance = options['tolerance'] if options['tolerance'] is not None else TOLERANCES.get(name, DEFAULT_TOLERANCE)
+                change = f"{ratio:+.0%}"
+                if ratio > tolerance:
+                    regressions.append(f"{name} {ratio:+.0%} (allowed {tolerance:.0%})")
+            self.stdout.write(
+                f"{name:30} {timing['median'] * 1e6:>8.1f}us {timing['min'] * 1e6:>8.1f}us "
+                f"{timing['score']:>9.2f} {change:>9}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump({'calibration': reference, 'cases': results}, f, indent=2)
+
+        if options['update_baseline']:
+            merged = {**baseline, **{name: {'score': timing['score']} for name, timing in results.items()}}
+            with open(options['baseline'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'updated': datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'cases': dict(sorted(merged.items())),
+                }, f, indent=2)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline updated: {options['baseline']}"))
+            return
+
+        if regressions:
+            raise CommandError('Regressions over baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions'))
+
+    def load_baseline(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f).get('cases', {})
+        except FileNotFoundError:
+            return {}
@@ -0,0 +1,95 @@
+import random
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from users.models import OTPSession, User
+from meals.models import Meal
+from dietologists.models import Dietologist, Group, ClientRequest
+from benchmarks.fixtures import (
+    BENCH_PHONE_PREFIX, BENCH_LOGIN_PHONE_PREFIX, BENCH_DIETOLOGIST_PHONE, BENCH_PASSWORD, BENCH_GROUP_CODE,
+    MEAL_TIMES, bench_phone, foods_data, meal_days,
+)
+
+class Command(BaseCommand):
+    help = 'Seed N users x M days of synthetic meals, plus a dietologist with approved clients, for bench_load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--meals-per-day', type=int, default=3,
+                            help='Average meals per user per day (actual count varies by one either way)')
+        parser.add_argument('--clients', type=int, default=20,
+                            help='How many seeded users are approved clients of the bench dietologist')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--reset', action='store_true', help='Delete previously seeded bench data first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        if options['reset']:
+            bench_phones = (
+                Q(phone_number__startswith=BENCH_PHONE_PREFIX) | Q(phone_number__startswith=BENCH_LOGIN_PHONE_PREFIX)
+            )
+            deleted, _ = User.objects.filter(bench_phones).delete()
+            OTPSession.objects.filter(bench_phones).delete()
+            Dietologist.objects.filter(phone_number=BENCH_DIETOLOGIST_PHONE).delete()
+            self.stdout.write(f"Deleted {deleted} bench rows")
+
+        with transaction.atomic():
+            users = self.seed_users(options['users'])
+            self.seed_dietologist(users[:options['clients']])
+
+        days = meal_days(options['days'])
+        batch, created = [], 0
+        for user in users:
+            for day in days:
+                count = max(1, options['meals_per_day'] + rng.randint(-1, 1))
+                for meal_time in rng.sample(MEAL_TIMES, min(count, len(MEAL_TIMES))):
+                    batch.append(Meal(
+                        user=user,
+                        image_url=f"meals/{user.id}/{day:%Y/%m/%d}/bench-{rng.getrandbits(32):08x}.jpg",
+                        meal_date=day,
+                        meal_time=meal_time,
+                        foods_data=foods_data(rng),
+                    ))
+                if len(batch) >= options['batch_size']:
+                    Meal.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+        Meal.objects.bulk_create(batch)
+        created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {created} meals over {len(days)} days, "
+            f"{min(options['clients'], len(users))} dietologist clients"
+        ))
+
+    def seed_users(self, count):
+        phones = [bench_phone(index) for index in range(count)]
+        existing = set(User.objects.filter(phone_number__in=phones).values_list('phone_number', flat=True))
+        User.objects.bulk_create([
+            User(phone_number=phone, first_name='Bench', last_name=phone[-4:], profile_completed=True,
+                 height=175, current_weight=80, target_weight=72, gender='male')
+            for phone in phones if phone not in existing
+        ])
+        return list(User.objects.filter(phone_number__in=phones).order_by('id'))
+
+    def seed_dietologist(self, clients):
+        dietologist, created = Dietologist.objects.get_or_create(
+            phone_number=BENCH_DIETOLOGIST_PHONE,
+            defaults={'first_name': 'Bench', 'last_name': 'Dietologist'},
+        )
+        if created:
+            dietologist.set_password(BENCH_PASSWORD)
+            dietologist.save()
+
+        group, _ = Group.objects.get_or_create(
+            code=BENCH_GROUP_CODE,
+            defaults={'dietologist': dietologist, 'name': 'Bench clients'},
+        )
+        approved = set(ClientRequest.objects.filter(group=group).values_list('user_id', flat=True))
+        ClientRequest.objects.bulk_create([
+            ClientRequest(user=user, group=group, status='approved')
+            for user in clients if user.id not in approved
+        ])
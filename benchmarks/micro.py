@@ -0,0 +1,143 @@
+import gc
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+from common.authentication import CustomJWTAuthentication
+from common.exception_handler import custom_exception_handler
+from common.responses import success_response
+from meals.models import Meal
+from meals.serializers import MealSerializer, MealListSerializer
+from meals.views import calculate_daily_totals
+from benchmarks.fixtures import MEAL_TIMES, foods_data
+
+# Per-request CPU hot paths, measured without a database: every case works
+# on unsaved model instances and in-memory requests.
+
+def measure(fn, rounds=20, round_time=0.02):
+    """
+    Time fn() the way pytest-benchmark does: pick an iteration count so one
+    round takes at least `round_time` seconds, then run `rounds` rounds.
+    Returns per-call seconds.
+    """
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - start >= round_time:
+            break
+        iterations *= 2
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            timings.append((time.perf_counter() - start) / iterations)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'rounds': rounds,
+        'iterations': iterations,
+    }
+
+def calibration():
+    """Fixed pure-Python workload; results are stored relative to it so baselines travel between machines"""
+    data = [{'id': index, 'name': f"food {index}", 'value': index * 1.5} for index in range(200)]
+    return sorted(data, key=lambda row: -row['value'])[0]['name'] + str(sum(row['value'] for row in data))
+
+def make_meals(count, seed=0):
+    rng = random.Random(seed)
+    now = timezone.now()
+    return [
+        Meal(
+            id=index + 1,
+            user_id=1,
+            image_url=f"meals/1/{now:%Y/%m/%d}/meal-{index}.jpg",
+            meal_date=(now - timedelta(days=index // 4)).date(),
+            meal_time=MEAL_TIMES[index % len(MEAL_TIMES)],
+            foods_data=foods_data(rng),
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(count)
+    ]
+
+def make_request():
+    return RequestFactory().get('/meals', HTTP_HOST='localhost')
+
+def render(response):
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = 'application/json'
+    response.renderer_context = {}
+    return response.render().content
+
+def _daily_totals(count):
+    meals = make_meals(count)
+    return lambda: calculate_daily_totals(meals)
+
+def _serializer(serializer_class, count):
+    meals = make_meals(count)
+    context = {'request': make_request()}
+    return lambda: serializer_class(meals, many=True, context=context).data
+
+def _exception_handler():
+    errors = [
+        ValidationError({'foods_data': ["foods_data must contain a 'foods' array"], 'meal_date': ['Invalid date']}),
+        AuthenticationFailed(detail={'code': 'expired_access_token', 'message': 'Access token has expired'}),
+        NotFound(),
+    ]
+    context = {'view': None, 'request': None}
+
+    def run():
+        for exc in errors:
+            custom_exception_handler(exc, context)
+    return run
+
+def _jwt_decode():
+    token = AccessToken()
+    token['user_id'] = 1
+    raw = str(token).encode()
+    authentication = CustomJWTAuthentication()
+    return lambda: authentication.get_validated_token(raw)
+
+def _success_response(count):
+    data = MealSerializer(make_meals(count), many=True, context={'request': make_request()}).data
+    return lambda: render(success_response(data={'meals': data, 'total_meals': count}))
+
+# name -> factory returning the callable to time
+CASES = {
+    'daily_totals[4]': lambda: _daily_totals(4),
+    'daily_totals[40]': lambda: _daily_totals(40),
+    'meal_serializer[20]': lambda: _serializer(MealSerializer, 20),
+    'meal_serializer[100]': lambda: _serializer(MealSerializer, 100),
+    'meal_serializer[1000]': lambda: _serializer(MealSerializer, 1000),
+    'meal_list_serializer[20]': lambda: _serializer(MealListSerializer, 20),
+    'meal_list_serializer[100]': lambda: _serializer(MealListSerializer, 100),
+    'meal_list_serializer[1000]': lambda: _serializer(MealListSerializer, 1000),
+    'exception_handler': _exception_handler,
+    'jwt_decode': _jwt_decode,
+    'success_response_render[20]': lambda: _success_response(20),
+}
+
+# Allowed slowdown over the stored baseline before a case counts as a regression
+DEFAULT_TOLERANCE = 0.25
+TOLERANCES = {
+    # Dominated by PyJWT/cryptography, which are noisier between runs
+    'jwt_decode': 0.35,
+}
@@ -0,0 +1,120 @@
+import io
+import numpy as np
+from PIL import Image
+from meals.audio import encode_wav
+from users.models import OTPSession
+from benchmarks.fixtures import BENCH_LOGIN_PHONE_PREFIX, MEAL_TIMES, foods_data
+
+# Each scenario performs one user-visible operation with an httpx.Client and
+# returns the final response. `ctx` is the LoadContext built by bench_load.
+
+def _user_headers(ctx, rng):
+    user = rng.choice(ctx.users)
+    return user, {'Authorization': f"Bearer {user['token']}"}
+
+def meals_list(client, ctx, rng):
+    _, headers = _user_headers(ctx, rng)
+    return client.get('/meals', params={'page': rng.randint(1, 3)}, headers=headers)
+
+def meal_detail(client, ctx, rng):
+    user, headers = _user_headers(ctx, rng)
+    return client.get(f"/meals/{rng.choice(user['meal_ids'])}", headers=headers)
+
+def daily_summary(client, ctx, rng):
+    user, headers = _user_headers(ctx, rng)
+    return client.get('/meals/daily', params={'date': rng.choice(ctx.dates)}, headers=headers)
+
+def profile(client, ctx, rng):
+    _, headers = _user_headers(ctx, rng)
+    return client.get('/user/profile', headers=headers)
+
+def meal_create(client, ctx, rng):
+    user, headers = _user_headers(ctx, rng)
+    return client.post('/meals', headers=headers, json={
+        'image_url': f"meals/{user['id']}/bench-created.jpg",
+        'meal_date': rng.choice(ctx.dates),
+        'meal_time': rng.choice(MEAL_TIMES),
+        'foods_data': foods_data(rng),
+    })
+
+def analyze_image(client, ctx, rng):
+    _, headers = _user_headers(ctx, rng)
+    return client.post('/meals/analyze', headers=headers,
+                       files={'image': ('meal.jpg', ctx.image, 'image/jpeg')},
+                       data={'meal_time': rng.choice(MEAL_TIMES)})
+
+def analyze_voice(client, ctx, rng):
+    _, headers = _user_headers(ctx, rng)
+    return client.post('/meals/analyze-voice', headers=headers,
+                       files={'audio': ('meal.wav', ctx.audio, 'audio/wav')},
+                       data={'language': rng.choice(['uz', 'ru', 'en'])})
+
+def dietologist_clients(client, ctx, rng):
+    return client.get('/dietologist/clients', headers=ctx.dietologist_headers)
+
+def client_detail(client, ctx, rng):
+    return client.get(f"/dietologist/clients/{rng.choice(ctx.client_ids)}", headers=ctx.dietologist_headers)
+
+def otp_login(client, ctx, rng):
+    """send-otp then verify-otp; the code is read back from the database"""
+    phone = f"{BENCH_LOGIN_PHONE_PREFIX}{rng.randrange(10 ** 7):07d}"
+    response = client.post('/sms/send-otp', json={'phone_number': phone})
+    if response.status_code != 200:
+        return response
+    session = response.json()['data']['session']
+    otp_code = OTPSession.objects.values_list('otp_code', flat=True).get(session=session)
+    return client.post('/sms/verify-otp', json={
+        'session': session, 'otp': otp_code, 'phone_number': phone, 'fcm_token': 'bench',
+    })
+
+SCENARIOS = {
+    'meals_list': meals_list,
+    'meal_detail': meal_detail,
+    'daily_summary': daily_summary,
+    'profile': profile,
+    'meal_create': meal_create,
+    'analyze_image': analyze_image,
+    'analyze_voice': analyze_voice,
+    'dietologist_clients': dietologist_clients,
+    'client_detail': client_detail,
+    'otp_login': otp_login,
+}
+
+# Relative weights; 'mobile' approximates production traffic
+MIXES = {
+    'mobile': {
+        'meals_list': 25, 'daily_summary': 25, 'meal_detail': 10, 'profile': 10, 'meal_create': 8,
+        'analyze_image': 4, 'analyze_voice': 2, 'dietologist_clients': 4, 'client_detail': 7, 'otp_login': 5,
+    },
+    'read': {'meals_list': 40, 'daily_summary': 40, 'meal_detail': 10, 'profile': 10},
+    'write': {'meal_create': 70, 'daily_summary': 30},
+    'analyze': {'analyze_image': 70, 'analyze_voice': 30},
+    'dietologist': {'dietologist_clients': 30, 'client_detail': 70},
+    'login': {'otp_login': 100},
+}
+
+def parse_mix(value):
+    """A preset name or 'scenario=weight,...'"""
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def sample_image(size=512):
+    """A noisy JPEG about the size of a phone upload after client-side resizing"""
+    pixels = np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+def sample_audio(seconds=4, sample_rate=16000):
+    """Tone bursts separated by silence, so preprocessing has pauses to trim"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float32)
+    return encode_wav(0.3 * np.sin(2 * np.pi * 220 * t) * envelope, sample_rate)
@@ -0,0 +1,40 @@
+import math
+import statistics
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted list, 0 for an empty one"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(latencies, errors=0, elapsed=None):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    millis = [value * 1000 for value in latencies]
+    summary = {
+        'count': len(millis),
+        'errors': errors,
+        'mean_ms': statistics.fmean(millis) if millis else 0.0,
+        'p50_ms': percentile(millis, 0.50),
+        'p95_ms': percentile(millis, 0.95),
+        'p99_ms': percentile(millis, 0.99),
+        'max_ms': max(millis) if millis else 0.0,
+    }
+    if elapsed:
+        summary['rps'] = len(millis) / elapsed
+    return summary
+
+def compare(current, baseline, keys=('p50_ms', 'p95_ms', 'p99_ms', 'rps')):
+    """Relative change per key for every name present in both result maps"""
+    changes = {}
+    for name, values in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        changes[name] = {
+            key: (values[key] - base[key]) / base[key]
+            for key in keys
+            if values.get(key) is not None and base.get(key)
+        }
+    return changes
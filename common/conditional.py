@@ -0,0 +1,125 @@
+import functools
+import hashlib
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.translation import get_language
+from .authentication import bearer_claims, token_subject
+from .db_routers import read_alias
+
+logger = logging.getLogger(__name__)
+
+# Conditional GET and response caching for a user's own reads. Every user has
+# a version counter in the shared cache, bumped after each commit that
+# changes what the decorated views return. The ETag and the cache key of the
+# rendered bytes are derived from that version plus the URL, language and
+# Accept header, so a poll is answered (304 or cached bytes) from the JWT and
+# the cache alone, before authentication queries the database. Because hits
+# skip authentication, every save or delete of the User bumps the version too
+# (users.signals), so a deactivated account falls through to a 401. Misses are
+# rendered from the primary: a replica lagging behind the write that bumped the
+# version would otherwise cache stale bytes under it.
+
+def version_key(subject):
+    return f"response-version:{subject}"
+
+def current_version(subject):
+    key = version_key(subject)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock, so a lost counter never reissues an old version
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+def _bump(subject):
+    key = version_key(subject)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, time.time_ns(), None):
+                cache.incr(key)
+    except Exception as e:
+        logger.warning("Response version bump failed for %s: %s", subject, e)
+
+def bump_version(user_id):
+    """Invalidates the user's cached responses and ETags once the current transaction commits"""
+    transaction.on_commit(functools.partial(_bump, f"user:{user_id}"))
+
+def _not_modified(request, etag):
+    tags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    # If-None-Match uses the weak comparison
+    return '*' in tags or etag in [tag.removeprefix('W/') for tag in tags]
+
+def _finish(response, etag):
+    response['ETag'] = etag
+    # Clients may keep the body but must revalidate it on every use
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Authorization', 'Accept-Language', 'Accept'))
+    return response
+
+def conditional(view):
+    """
+    Versioned ETags and rendered-response caching for GET. Goes outside
+    @api_view, so hits skip DRF authentication and the view entirely:
+
+        @conditional
+        @api_view(['GET'])
+        @permission_classes([IsAuthenticated])
+        def daily_summary(request): ...
+
+    Writes that change the view's output must call bump_version().
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or not settings.RESPONSE_CACHE_ENABLED:
+            return view(request, *args, **kwargs)
+        token = bearer_claims(request)
+        subject = token_subject(token) if token else None
+        if subject is None or not subject.startswith('user:'):
+            return view(request, *args, **kwargs)
+
+        try:
+            version = current_version(subject)
+        except Exception as e:
+            logger.warning("Response version read failed: %s", e)
+            return view(request, *args, **kwargs)
+        variant = hashlib.sha256('\n'.join([
+            subject, str(version), request.get_full_path(), get_language() or '', request.META.get('HTTP_ACCEPT', ''),
+        ]).encode('utf-8')).hexdigest()
+        etag = f'"{variant[:32]}"'
+        if _not_modified(request, etag):
+            return _finish(HttpResponseNotModified(), etag)
+
+        key = f"response:{variant}"
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning("Response cache read failed: %s", e)
+            cached = None
+        if cached is not None:
+            content, content_type = cached
+            return _finish(HttpResponse(content, content_type=content_type), etag)
+
+        alias = read_alias.set(None)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            read_alias.reset(alias)
+        if response.status_code != 200 or response.streaming:
+            return response
+        if hasattr(response, 'render'):
+            response.render()
+        try:
+            cache.set(key, (response.content, response['Content-Type']), settings.RESPONSE_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Response cache write failed: %s", e)
+        return _finish(response, etag)
+    return wrapper
@@ -0,0 +1,33 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+
+# Read-replica routing. ReplicaPinningMiddleware marks a request as
+# replica-eligible by setting `read_alias`; everything else (writes, unsafe
+# requests, requests pinned after a recent write, management commands,
+# WebSocket consumers) reads from the primary.
+
+read_alias = ContextVar('read_alias', default=None)
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+def choose_replica():
+    aliases = replica_aliases()
+    return random.choice(aliases) if aliases else None
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any alias may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Real replicas get the schema through replication; `migrate --database`
+        # still works for same-server test setups
+        return None
@@ -0,0 +1,169 @@
+import functools
+import hashlib
+import json
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext as _
+from rest_framework import status
+from rest_framework.response import Response
+from .responses import error_response
+from .timing import phase
+
+logger = logging.getLogger(__name__)
+
+# Idempotency keys for retried writes. The first response to an
+# `Idempotency-Key` is kept in the shared cache for IDEMPOTENCY_TTL and
+# replayed to retries with the same key from the same caller (the user, or
+# for anonymous requests the phone number or client address). A retry that
+# arrives while the first attempt is still running waits for its result
+# instead of running the view again. Server errors are not kept, so the
+# client can retry them with the same key.
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+PENDING = 'pending'
+DONE = 'done'
+
+def fingerprint(request):
+    """
+    Method, path and body. Multipart boundaries change per attempt, so those
+    bodies count by their parsed fields and each upload's name, size and content.
+    """
+    digest = hashlib.sha256(f"{request.method} {request.get_full_path()}\n".encode('utf-8'))
+    if not request.META.get('CONTENT_TYPE', '').startswith('multipart/'):
+        digest.update(request._request.body)
+        return digest.hexdigest()
+
+    # The body is read and parsed here rather than in the view
+    with phase('upload'):
+        fields = request.POST
+    digest.update(json.dumps(sorted(fields.lists())).encode('utf-8'))
+    for field, uploads in sorted(request.FILES.lists()):
+        for upload in uploads:
+            digest.update(f"\n{field}\0{upload.name}\0{upload.size}\n".encode('utf-8'))
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+    return digest.hexdigest()
+
+def anonymous_subject(request):
+    """Keyspace of an unauthenticated caller: the phone number it acts for, else its address"""
+    data = request.data
+    phone_number = data.get('phone_number') if hasattr(data, 'get') else None
+    if phone_number:
+        return f"phone:{phone_number}"
+    return f"addr:{request.META.get('REMOTE_ADDR', '')}"
+
+def cache_key(request, key):
+    subject = f"user:{request.user.pk}" if request.user.is_authenticated else anonymous_subject(request)
+    return f"idempotency:{subject}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+def claim(key, request_fingerprint):
+    """
+    None once this request owns `key`; otherwise the entry of the request
+    that does, after waiting up to IDEMPOTENCY_WAIT_SECONDS for it to finish.
+    """
+    pending = {'state': PENDING, 'fingerprint': request_fingerprint}
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        if cache.add(key, pending, settings.IDEMPOTENCY_LOCK_SECONDS):
+            return None
+        entry = cache.get(key)
+        # None: the first attempt failed and let go of the key, so try again
+        if entry is not None and (entry['state'] != PENDING or entry['fingerprint'] != request_fingerprint):
+            return entry
+        if time.monotonic() >= deadline:
+            # Still racing for a key that keeps being let go reads as in progress
+            return entry or pending
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+def release(key):
+    try:
+        cache.delete(key)
+    except Exception as e:
+        logger.warning("Idempotency release failed: %s", e)
+
+def replay(entry, request_fingerprint):
+    if entry['fingerprint'] != request_fingerprint:
+        return error_response(
+            message=_('This Idempotency-Key was already used for a different request'),
+            code='idempotency_key_reused',
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if entry['state'] == PENDING:
+        response = error_response(
+            message=_('A request with this Idempotency-Key is still in progress'),
+            code='idempotency_in_progress',
+            status_code=status.HTTP_409_CONFLICT
+        )
+        response['Retry-After'] = '1'
+        return response
+    response = Response(entry['data'], status=entry['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+def should_store(response):
+    return (
+        isinstance(response, Response)
+        and response.status_code < 500
+        and response.status_code not in (status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS)
+    )
+
+def idempotent(view):
+    """
+    Replays the stored response for a repeated `Idempotency-Key` on unsafe
+    methods. Goes under @permission_classes, so request.user is known:
+
+        @api_view(['POST'])
+        @permission_classes([IsAuthenticated])
+        @idempotent
+        def meals(request): ...
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        header = request.META.get(HEADER)
+        if not header or request.method in ('GET', 'HEAD', 'OPTIONS') or not settings.IDEMPOTENCY_ENABLED:
+            return view(request, *args, **kwargs)
+        if len(header) > MAX_KEY_LENGTH:
+            return error_response(
+                message=_('Idempotency-Key must be at most %(length)d characters') % {'length': MAX_KEY_LENGTH},
+                code='invalid_idempotency_key',
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Before cache_key, which may parse the body: the raw body is only readable until then
+        request_fingerprint = fingerprint(request)
+        key = cache_key(request, header)
+        try:
+            entry = claim(key, request_fingerprint)
+        except Exception as e:
+            # Without the cache, run unprotected rather than fail the write
+            logger.warning("Idempotency claim failed: %s", e)
+            return view(request, *args, **kwargs)
+        if entry is not None:
+            return replay(entry, request_fingerprint)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            release(key)
+            raise
+        try:
+            if should_store(response):
+                cache.set(key, {
+                    'state': DONE,
+                    'fingerprint': request_fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                }, settings.IDEMPOTENCY_TTL)
+            else:
+                cache.delete(key)
+        except Exception as e:
+            logger.warning("Idempotency store failed: %s", e)
+        return response
+    return wrapper
@@ -0,0 +1,111 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+# Non-blocking JSON logging. Callers only enqueue records; one listener thread
+# per process formats and writes them. Request IDs come from a ContextVar set
+# by RequestIDMiddleware, so they survive the sync_to_async hop under ASGI.
+# Loaded through settings.LOGGING, so this module must not import models.
+
+request_id = ContextVar('request_id', default=None)
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+class RequestIDFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `limit` identical warning-or-worse lines (same logger, level
+    and message template) through per `window` seconds. The first line after
+    a suppressed stretch carries `suppressed` with the number dropped.
+    """
+
+    def __init__(self, limit=10, window=60.0, level=logging.WARNING):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.level = level
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level or not self.limit:
+            return True
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else repr(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            started, count, suppressed = self.buckets.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.limit:
+                self.buckets[key] = (started, count, suppressed + 1)
+                return False
+            self.buckets[key] = (started, count + 1, 0)
+            if len(self.buckets) > 10000:
+                self.buckets.clear()
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        if getattr(record, 'suppressed', None):
+            entry['suppressed'] = record.suppressed
+        data = getattr(record, 'data', None)
+        if isinstance(data, dict):
+            entry.update(data)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class QueueJSONHandler(QueueHandler):
+    """
+    QueueHandler with its own listener writing JSON lines to stderr. The
+    queue is bounded; when full, records are dropped and counted rather than
+    blocking the caller.
+    """
+
+    def __init__(self, maxsize=10000, stream=None):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JSONFormatter())
+        self.listener = QueueListener(self.queue, target, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        # Resolve everything that is not safe to defer to the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
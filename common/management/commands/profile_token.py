@@ -0,0 +1,8 @@
+from django.core.management.base import BaseCommand
+from common.profiling import PROFILE_HEADER, TOKEN_TTL, sign_token
+
+class Command(BaseCommand):
+    help = f'Print a signed {PROFILE_HEADER} header value that forces profiling for {TOKEN_TTL} seconds'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{PROFILE_HEADER}: {sign_token()}")
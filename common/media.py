@@ -0,0 +1,144 @@
+import mimetypes
+import os
+import re
+import stat
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class RangeFile:
+    """File wrapper that only exposes `length` bytes starting at `start`"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        self.file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+def file_etag(file_stat):
+    return quote_etag(f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}")
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=` range into an inclusive (start, end) pair.
+    Returns None when the header should be ignored and raises ValueError
+    when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Unsatisfiable range')
+    return start, min(end, size - 1)
+
+def serve_file(request, name, document_root=None):
+    """
+    Serve a file from MEDIA_ROOT with conditional and range request support.
+    The byte transfer is handed to the front proxy when MEDIA_OFFLOAD is set.
+    """
+    root = document_root or settings.MEDIA_ROOT
+    try:
+        fullpath = safe_join(root, name)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    try:
+        file_stat = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+
+    etag = file_etag(file_stat)
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(file_stat.st_mtime),
+        'Cache-Control': f"private, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable",
+        'Accept-Ranges': 'bytes',
+    }
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or etag in etags:
+            response = HttpResponseNotModified()
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+    offload = settings.MEDIA_OFFLOAD
+    if offload == 'x-accel-redirect':
+        # nginx serves the bytes (and handles Range) from an internal location
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + name
+    elif offload == 'x-sendfile':
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        response['X-Sendfile'] = fullpath
+    else:
+        response = _file_response(request, fullpath, file_stat, etag, content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+def _file_response(request, fullpath, file_stat, etag, content_type):
+    size = file_stat.st_size
+    byte_range = None
+
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+
+    # A plain file object lets WSGI servers use wsgi.file_wrapper/sendfile
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = FileResponse(
+        RangeFile(file, start, length),
+        status=206,
+        content_type=content_type or 'application/octet-stream'
+    )
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    return response
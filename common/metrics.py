@@ -0,0 +1,101 @@
+import atexit
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (one shared, emptied-at-deploy directory
+# for all Daphne processes) every process writes its samples to mmap files
+# and /metrics aggregates them, so any process can answer a scrape.
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EXTERNAL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+http_requests = Counter(
+    'fitora_http_requests_total', 'HTTP responses by route and status', ['method', 'route', 'status'],
+)
+http_latency = Histogram(
+    'fitora_http_request_duration_seconds', 'Time spent in Django per request', ['method', 'route'],
+    buckets=REQUEST_BUCKETS,
+)
+db_queries = Histogram(
+    'fitora_db_queries_per_request', 'Database queries executed per request', ['route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_time = Histogram(
+    'fitora_db_time_per_request_seconds', 'Time spent in database queries per request', ['route'],
+    buckets=REQUEST_BUCKETS,
+)
+
+external_latency = Histogram(
+    'fitora_external_call_duration_seconds', 'Calls to third-party services',
+    ['service', 'operation', 'outcome'], buckets=EXTERNAL_BUCKETS,
+)
+
+websocket_connections = Gauge(
+    'fitora_websocket_connections', 'Open WebSocket connections', multiprocess_mode='livesum',
+)
+analyses_in_flight = Gauge(
+    'fitora_analyses_in_flight', 'Meal analyses currently running', ['kind'], multiprocess_mode='livesum',
+)
+
+model_calls = Counter('fitora_model_calls_total', 'Model router calls', ['model', 'outcome'])
+model_tokens = Counter('fitora_model_tokens_total', 'Model tokens by kind', ['model', 'kind'])
+model_cost = Counter('fitora_model_cost_usd_total', 'Estimated model spend', ['model'])
+provider_retries = Counter('fitora_provider_retries_total', 'Provider call retries', ['name'])
+provider_hedges = Counter('fitora_provider_hedges_total', 'Hedged duplicate provider calls', ['name'])
+breaker_state = Gauge(
+    'fitora_circuit_breaker_state', 'Circuit breaker state (0 closed, 1 half open, 2 open)', ['name'],
+    multiprocess_mode='livemax',
+)
+BREAKER_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+class ExternalCall:
+    """
+    Context manager timing one third-party call. The outcome is 'error' if the
+    block raises, otherwise whatever the caller set (default 'ok').
+    """
+
+    def __init__(self, service, operation):
+        self.service = service
+        self.operation = operation
+        self.outcome = 'ok'
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        outcome = 'error' if exc_type else self.outcome
+        external_latency.labels(self.service, self.operation, outcome).observe(time.perf_counter() - self.start)
+        return False
+
+def external_call(service, operation):
+    return ExternalCall(service, operation)
+
+def record_model_call(model, usage, cost, failed=False, escalated=False):
+    outcome = 'failed' if failed else 'escalated' if escalated else 'ok'
+    model_calls.labels(model, outcome).inc()
+    for kind in ('input_tokens', 'cached_tokens', 'output_tokens'):
+        if usage.get(kind):
+            model_tokens.labels(model, kind.replace('_tokens', '')).inc(usage[kind])
+    if cost:
+        model_cost.labels(model).inc(cost)
+
+def registry():
+    if not MULTIPROCESS:
+        return REGISTRY
+    collecting = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collecting)
+    return collecting
+
+def render():
+    """(body, content type) for a scrape"""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+if MULTIPROCESS:
+    # Drop this process's live gauge files so livesum/livemax stay accurate after restarts
+    atexit.register(lambda: multiprocess.mark_process_dead(os.getpid()))
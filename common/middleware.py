@@ -0,0 +1,122 @@
+import logging
+import re
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from . import metrics
+from .authentication import bearer_claims, token_subject
+from .db_routers import read_alias, choose_replica
+from .log import request_id, new_request_id
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_RE = re.compile(r'^[\w.-]{1,64}$')
+
+class RequestIDMiddleware:
+    """
+    Tags every log line of the request with an ID, taken from a well-formed
+    incoming X-Request-ID (e.g. set by the proxy) or generated, and echoes it
+    back in the response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get('X-Request-ID', '')
+        value = incoming if REQUEST_ID_RE.match(incoming) else new_request_id()
+        token = request_id.set(value)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = value
+        return response
+
+class MetricsMiddleware:
+    """
+    Records latency, status and database query count/time per route.
+    Routes are the URL pattern (e.g. 'meals/<int:pk>'), never the raw path,
+    to keep label cardinality bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0, 0.0]
+
+        def count_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries[0] += 1
+                queries[1] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(count_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        metrics.http_requests.labels(request.method, route, str(response.status_code)).inc()
+        metrics.http_latency.labels(request.method, route).observe(elapsed)
+        metrics.db_queries.labels(route).observe(queries[0])
+        metrics.db_time.labels(route).observe(queries[1])
+        return response
+
+class ReplicaPinningMiddleware:
+    """
+    Sends reads of safe requests to a replica, with read-your-writes: after an
+    unsafe request the caller reads from the primary for
+    DATABASE_REPLICA_PIN_SECONDS. Token clients are tracked by a cache marker
+    per user/dietologist, cookie clients (admin) by a short-lived cookie.
+    """
+
+    COOKIE = 'db_primary'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_ROUTERS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def marker_key(self, request):
+        token = bearer_claims(request)
+        return f"db-primary:{token_subject(token)}" if token else None
+
+    def recently_wrote(self, key):
+        try:
+            return bool(cache.get(key))
+        except Exception as e:
+            # Without the marker, read-your-writes only holds on the primary
+            logger.warning("Replica pin read failed: %s", e)
+            return True
+
+    def __call__(self, request):
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        key = self.marker_key(request)
+        pinned = not safe or self.COOKIE in request.COOKIES or (key is not None and self.recently_wrote(key))
+
+        alias = read_alias.set(None if pinned else choose_replica())
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(alias)
+
+        if not safe and response.status_code < 400:
+            seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+            if key is not None:
+                try:
+                    cache.set(key, 1, seconds)
+                except Exception as e:
+                    logger.warning("Replica pin write failed: %s", e)
+            else:
+                response.set_cookie(self.COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        return response
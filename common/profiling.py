@@ -0,0 +1,201 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+# Opt-in sampling profiler for live requests. A background thread reads the
+# request thread's frame from sys._current_frames() every
+# PROFILING_INTERVAL_MS, so the request itself runs uninstrumented.
+
+PROFILE_HEADER = 'X-Fitora-Profile'
+TOKEN_TTL = 300
+NAME_RE = re.compile(r'^[\w.-]+$')
+
+class Sampler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(tuple(stack))
+
+def _short_path(filename):
+    base = str(settings.BASE_DIR)
+    if filename.startswith(base):
+        return os.path.relpath(filename, base)
+    for marker in ('site-packages' + os.sep, 'lib' + os.sep + 'python'):
+        position = filename.find(marker)
+        if position != -1:
+            return filename[position + len(marker):]
+    return filename
+
+def _frame_label(frame):
+    name, filename, line = frame
+    return f"{name} ({_short_path(filename)}:{line})"
+
+def collapsed(samples):
+    """Brendan Gregg's folded format: 'root;child;leaf count' per unique stack"""
+    counts = {}
+    for stack in samples:
+        key = ';'.join(_frame_label(frame) for frame in stack)
+        counts[key] = counts.get(key, 0) + 1
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+def speedscope(samples, interval, name):
+    frames, index = [], {}
+    encoded = []
+    for stack in samples:
+        row = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': _short_path(frame[1]), 'line': frame[2]})
+            row.append(index[frame])
+        encoded.append(row)
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'fitora',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': len(samples) * interval,
+            'samples': encoded,
+            'weights': [interval] * len(samples),
+        }],
+    })
+
+def _secret():
+    return (settings.PROFILING_SECRET or settings.SECRET_KEY).encode('utf-8')
+
+def sign_token(timestamp=None):
+    """Header value that requests a profile; valid for TOKEN_TTL seconds"""
+    timestamp = str(int(timestamp or time.time()))
+    signature = hmac.new(_secret(), timestamp.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{timestamp}:{signature}"
+
+def verify_token(value):
+    timestamp, _, signature = (value or '').partition(':')
+    if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > TOKEN_TTL:
+        return False
+    expected = hmac.new(_secret(), timestamp.encode('utf-8'), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def profile_dir():
+    return str(settings.PROFILING_DIR)
+
+def list_profiles():
+    """Newest first: (name, size in bytes, modified timestamp)"""
+    try:
+        entries = [entry for entry in os.scandir(profile_dir()) if entry.is_file() and NAME_RE.match(entry.name)]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.name, reverse=True)
+    return [(entry.name, entry.stat().st_size, entry.stat().st_mtime) for entry in entries]
+
+def profile_path(name):
+    """Absolute path of a stored profile, or None for anything outside the ring buffer"""
+    if not NAME_RE.match(name):
+        return None
+    path = os.path.join(profile_dir(), name)
+    return path if os.path.isfile(path) else None
+
+def write_profile(name, content):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    temporary = os.path.join(directory, f".{name}.tmp")
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temporary, os.path.join(directory, name))
+
+    # Ring buffer: names start with a millisecond timestamp, so oldest sort first
+    stored = sorted(entry.name for entry in os.scandir(directory) if entry.is_file() and NAME_RE.match(entry.name))
+    for old in stored[:max(0, len(stored) - settings.PROFILING_MAX_FILES)]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass
+
+class ProfilingMiddleware:
+    """
+    Profiles a PROFILING_SAMPLE_RATE fraction of requests, plus any request
+    carrying a valid signed X-Fitora-Profile header (see `manage.py profile_token`).
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        header = request.headers.get(PROFILE_HEADER)
+        if header:
+            return verify_token(header)
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        interval = settings.PROFILING_INTERVAL_MS / 1000
+        sampler = Sampler(threading.get_ident(), interval)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+
+        try:
+            self.save(request, response, sampler, interval)
+        except OSError as e:
+            logger.warning("Profile write error: %s", e)
+        return response
+
+    def save(self, request, response, sampler, interval):
+        if not sampler.samples:
+            return
+        match = getattr(request, 'resolver_match', None)
+        route = re.sub(r'[^\w]+', '_', match.route if match else request.path).strip('_') or 'root'
+        stem = f"{int(time.time() * 1000)}-{request.method}-{route}-{response.status_code}-{sampler.elapsed * 1000:.0f}ms"
+
+        if settings.PROFILING_FORMAT == 'collapsed':
+            write_profile(f"{stem}.folded", collapsed(sampler.samples))
+        else:
+            title = f"{request.method} {request.path} ({response.status_code})"
+            write_profile(f"{stem}.speedscope.json", speedscope(sampler.samples, interval, title))
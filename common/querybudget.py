@@ -0,0 +1,164 @@
+import functools
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+from django.test.utils import override_settings
+
+logger = logging.getLogger(__name__)
+
+# Query budgets: record the queries a block or view runs, flag repeated query
+# shapes (the N+1 pattern) and fail when a declared budget is exceeded.
+# Under QUERY_BUDGET_STRICT, and always inside QueryBudgetTestMixin
+# assertions, a violation raises; otherwise a sampled fraction
+# (QUERY_BUDGET_LOG_SAMPLE_RATE) of violations is logged.
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_in_list_re = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_space_re = re.compile(r'\s+')
+# Savepoints from nested atomic blocks, and from TestCase's own transaction,
+# are transaction control like BEGIN/COMMIT, which never reach execute wrappers
+_savepoint_re = re.compile(r'\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b', re.IGNORECASE)
+
+def query_shape(sql):
+    """SQL with literals and parameter lists collapsed, so N+1 loops share one shape"""
+    shape = _literal_re.sub('?', sql)
+    shape = _in_list_re.sub('(...)', shape)
+    return _space_re.sub(' ', shape).strip()
+
+class QueryRecorder:
+    """Records (sql, seconds) for every query on every database connection while active"""
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if _savepoint_re.match(sql):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        return False
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def repeated(self, threshold=2):
+        """[(shape, count)] for shapes run at least `threshold` times, most repeated first"""
+        counts = {}
+        for sql, _ in self.queries:
+            shape = query_shape(sql)
+            counts[shape] = counts.get(shape, 0) + 1
+        return sorted(
+            ((shape, count) for shape, count in counts.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+def violations(recorder, max_queries=None, max_repeats=None):
+    problems = []
+    if max_queries is not None and recorder.count > max_queries:
+        problems.append(f"{recorder.count} queries, budget {max_queries}")
+    if max_repeats is not None:
+        for shape, count in recorder.repeated(max_repeats + 1):
+            problems.append(f"query shape repeated {count} times (allowed {max_repeats}): {shape[:200]}")
+    return problems
+
+def _strict():
+    return settings.QUERY_BUDGET_STRICT
+
+def _report(name, problems, recorder, strict):
+    message = f"Query budget exceeded in {name}: " + '; '.join(problems)
+    if strict:
+        raise QueryBudgetExceeded(message)
+    if random.random() < settings.QUERY_BUDGET_LOG_SAMPLE_RATE:
+        logger.warning(message, extra={'data': {
+            'queries': recorder.count,
+            'query_ms': round(recorder.duration * 1000, 1),
+        }})
+
+class query_budget:
+    """
+    Context manager and decorator:
+
+        with query_budget(3, name='daily totals'):
+            ...
+
+        @query_budget(4, max_repeats=1)
+        def daily_summary(request): ...
+
+    `max_repeats` is how many times a single query shape may run; 1 forbids
+    any repetition, None disables N+1 detection.
+    """
+
+    def __init__(self, max_queries=None, max_repeats=None, name=None, strict=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.name = name
+        self.strict = strict
+
+    def __enter__(self):
+        self.recorder = QueryRecorder().__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            problems = violations(self.recorder, self.max_queries, self.max_repeats)
+            if problems:
+                strict = _strict() if self.strict is None else self.strict
+                _report(self.name or 'block', problems, self.recorder, strict)
+        return False
+
+    def __call__(self, func):
+        name = self.name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.QUERY_BUDGET_ENABLED:
+                return func(*args, **kwargs)
+            with query_budget(self.max_queries, self.max_repeats, name, self.strict):
+                return func(*args, **kwargs)
+        wrapper.query_budget = self
+        return wrapper
+
+class QueryBudgetTestMixin:
+    """
+    For django.test.TestCase subclasses:
+
+        with self.assertQueryBudget(4, max_repeats=1):
+            self.client.get('/meals/daily', {'date': '2025-01-01'})
+
+    The budgets declared on views called inside the block are strict too.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=None, max_repeats=None):
+        with override_settings(QUERY_BUDGET_STRICT=True):
+            with query_budget(max_queries, max_repeats, name=self.id(), strict=True) as recorder:
+                yield recorder
+
+    def assertNoNPlusOne(self):
+        return self.assertQueryBudget(max_repeats=1)
@@ -1,3 +1,46 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from .idempotency import idempotent
 
-# Create your tests here.
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'idempotency-tests'}}
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@idempotent
+def echo(request):
+    files = {name: upload.read().decode() for name, upload in request.FILES.items()}
+    return Response({'fields': request.POST.dict() or request.data, 'files': files}, status=201)
+
+@override_settings(CACHES=LOCMEM, IDEMPOTENCY_ENABLED=True, IDEMPOTENCY_WAIT_SECONDS=0)
+class IdempotencyTests(SimpleTestCase):
+    factory = APIRequestFactory()
+
+    def post(self, key, data, format='json', address='10.0.0.1'):
+        request = self.factory.post('/echo', data, format=format, HTTP_IDEMPOTENCY_KEY=key, REMOTE_ADDR=address)
+        return echo(request)
+
+    def test_anonymous_callers_do_not_share_keys(self):
+        first = self.post('anon-1', {'phone_number': '+998900000001'})
+        second = self.post('anon-1', {'phone_number': '+998900000002'})
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(self.post('anon-1', {'other': 1}, address='10.0.0.2').status_code, 201)
+        self.assertEqual(self.post('anon-1', {'other': 2}, address='10.0.0.3').status_code, 201)
+
+    def test_anonymous_retry_replays(self):
+        self.post('anon-2', {'phone_number': '+998900000003'})
+        retry = self.post('anon-2', {'phone_number': '+998900000003'})
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_multipart_body_is_part_of_the_fingerprint(self):
+        def photo(content):
+            return {'meal_time': 'lunch', 'image': SimpleUploadedFile('plov.jpg', content, 'image/jpeg')}
+
+        first = self.post('photo-1', photo(b'first photo'), format='multipart')
+        self.assertEqual(first.data['files'], {'image': 'first photo'})
+        retry = self.post('photo-1', photo(b'first photo'), format='multipart')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.post('photo-1', photo(b'other photo'), format='multipart').status_code, 422)
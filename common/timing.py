@@ -0,0 +1,102 @@
+import logging
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+# Per-request phase timing. Views wrap work in `with phase('storage'):`;
+# ServerTimingMiddleware turns the phases into a Server-Timing header and a
+# JSON log line. With SERVER_TIMING off the middleware is not installed and
+# phase() returns a shared no-op context manager.
+
+_current = ContextVar('request_timing', default=None)
+_noop = nullcontext()
+
+class Phase:
+    __slots__ = ('timing', 'name', 'start')
+
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timing.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class RequestTiming:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name, seconds):
+        # Repeated phases (e.g. two storage calls) accumulate
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def header(self):
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items())
+
+def phase(name):
+    timing = _current.get()
+    if timing is None:
+        return _noop
+    return timing.phase(name)
+
+class ServerTimingMiddleware:
+    """
+    Adds `Server-Timing` with the phases recorded during the request, plus
+    'view' (view function), 'render' (response rendering) and 'total'.
+    Requests slower than SERVER_TIMING_LOG_MS are also logged as JSON.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        now = time.perf_counter()
+        view_started = getattr(request, '_timing_view_started', None)
+        view_finished = getattr(request, '_timing_view_finished', None)
+        if view_started is not None:
+            timing.add('view', (view_finished or now) - view_started)
+        if view_finished is not None:
+            timing.add('render', now - view_finished)
+        timing.add('total', now - timing.start)
+
+        response['Server-Timing'] = timing.header()
+
+        total_ms = timing.phases['total'] * 1000
+        if total_ms >= settings.SERVER_TIMING_LOG_MS:
+            match = getattr(request, 'resolver_match', None)
+            logger.info('request_timing', extra={'data': {
+                'method': request.method,
+                'route': match.route if match else request.path,
+                'status': response.status_code,
+                'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in timing.phases.items()},
+            }})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before DRF/template rendering
+        request._timing_view_finished = time.perf_counter()
+        return response
@@ -1,4 +1,11 @@
-from django.http import JsonResponse
+import ipaddress
+from datetime import datetime
+from django.conf import settings
+from django.contrib import admin
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.template.response import TemplateResponse
+from django.utils.crypto import constant_time_compare
+from . import metrics, profiling
 
 def handler404(request, exception=None):
     """
@@ -26,3 +33,50 @@ def handler500(request):
         "success": False,
         "message": "Internal server error"
     }, status=500)
+
+def _metrics_client_allowed(request):
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>`
+    when METRICS_TOKEN is set; without it, only METRICS_ALLOWED_IPS may scrape
+    unless METRICS_PUBLIC is on.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return JsonResponse({
+            "success": False,
+            "message": "Unauthorized"
+        }, status=401)
+    if not token and not settings.METRICS_PUBLIC and not _metrics_client_allowed(request):
+        return JsonResponse({
+            "success": False,
+            "message": "Forbidden"
+        }, status=403)
+
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+def profile_list(request):
+    """Staff page listing stored request profiles"""
+    profiles = [
+        {'name': name, 'size': size, 'modified': datetime.fromtimestamp(modified)}
+        for name, size, modified in profiling.list_profiles()
+    ]
+    return TemplateResponse(request, 'admin/profiles.html', {
+        **admin.site.each_context(request),
+        'profiles': profiles,
+        'directory': profiling.profile_dir(),
+        'max_files': settings.PROFILING_MAX_FILES,
+    })
+
+def profile_download(request, name):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
@@ -0,0 +1,102 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The dietologist tables were created by hand before the app had migrations,
+# so test databases and fresh installs never got them. The SQL skips tables
+# that already exist; the model state is recorded either way.
+CREATE_TABLES = """
+DO $$
+BEGIN
+    IF to_regclass('dietologists') IS NULL THEN
+        CREATE TABLE "dietologists" ("id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, "phone_number" varchar(15) NOT NULL UNIQUE, "first_name" varchar(50) NOT NULL, "last_name" varchar(50) NOT NULL, "password" varchar(255) NOT NULL, "is_active" boolean NOT NULL, "is_staff" boolean NOT NULL, "last_login" timestamp with time zone NULL, "created_at" timestamp with time zone NOT NULL, "updated_at" timestamp with time zone NOT NULL);
+        CREATE INDEX "dietologists_phone_number_50dfde3e_like" ON "dietologists" ("phone_number" varchar_pattern_ops);
+    END IF;
+    IF to_regclass('dietologist_groups') IS NULL THEN
+        CREATE TABLE "dietologist_groups" ("id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, "name" varchar(100) NOT NULL, "code" varchar(20) NOT NULL UNIQUE, "created_at" timestamp with time zone NOT NULL, "updated_at" timestamp with time zone NOT NULL, "dietologist_id" bigint NOT NULL);
+        ALTER TABLE "dietologist_groups" ADD CONSTRAINT "dietologist_groups_dietologist_id_3f9b1fe7_fk_dietologists_id" FOREIGN KEY ("dietologist_id") REFERENCES "dietologists" ("id") DEFERRABLE INITIALLY DEFERRED;
+        CREATE INDEX "dietologist_groups_code_799edcba_like" ON "dietologist_groups" ("code" varchar_pattern_ops);
+        CREATE INDEX "dietologist_groups_dietologist_id_3f9b1fe7" ON "dietologist_groups" ("dietologist_id");
+    END IF;
+    IF to_regclass('client_requests') IS NULL THEN
+        CREATE TABLE "client_requests" ("id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, "status" varchar(20) NOT NULL, "requested_at" timestamp with time zone NOT NULL, "responded_at" timestamp with time zone NULL, "user_id" bigint NOT NULL, "group_id" bigint NOT NULL);
+        ALTER TABLE "client_requests" ADD CONSTRAINT "client_requests_user_id_group_id_e8abc678_uniq" UNIQUE ("user_id", "group_id");
+        ALTER TABLE "client_requests" ADD CONSTRAINT "client_requests_user_id_2c310579_fk_users_id" FOREIGN KEY ("user_id") REFERENCES "users" ("id") DEFERRABLE INITIALLY DEFERRED;
+        ALTER TABLE "client_requests" ADD CONSTRAINT "client_requests_group_id_ae744de1_fk_dietologist_groups_id" FOREIGN KEY ("group_id") REFERENCES "dietologist_groups" ("id") DEFERRABLE INITIALLY DEFERRED;
+        CREATE INDEX "client_requests_user_id_2c310579" ON "client_requests" ("user_id");
+        CREATE INDEX "client_requests_group_id_ae744de1" ON "client_requests" ("group_id");
+    END IF;
+END $$;
+"""
+
+DROP_TABLES = """
+DROP TABLE client_requests;
+DROP TABLE dietologist_groups;
+DROP TABLE dietologists;
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_TABLES, reverse_sql=DROP_TABLES),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='Dietologist',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('phone_number', models.CharField(max_length=15, unique=True)),
+                        ('first_name', models.CharField(max_length=50)),
+                        ('last_name', models.CharField(max_length=50)),
+                        ('password', models.CharField(max_length=255)),
+                        ('is_active', models.BooleanField(default=True)),
+                        ('is_staff', models.BooleanField(default=True)),
+                        ('last_login', models.DateTimeField(blank=True, null=True)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                    ],
+                    options={
+                        'db_table': 'dietologists',
+                    },
+                ),
+                migrations.CreateModel(
+                    name='Group',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('name', models.CharField(max_length=100)),
+                        ('code', models.CharField(max_length=20, unique=True)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                        ('dietologist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='dietologists.dietologist')),
+                    ],
+                    options={
+                        'db_table': 'dietologist_groups',
+                    },
+                ),
+                migrations.CreateModel(
+                    name='ClientRequest',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                        ('requested_at', models.DateTimeField(auto_now_add=True)),
+                        ('responded_at', models.DateTimeField(blank=True, null=True)),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dietologist_requests', to=settings.AUTH_USER_MODEL)),
+                        ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='client_requests', to='dietologists.group')),
+                    ],
+                    options={
+                        'db_table': 'client_requests',
+                        'unique_together': {('user', 'group')},
+                    },
+                ),
+            ],
+        ),
+    ]
@@ -1,3 +1,53 @@
-from django.test import TestCase
+from datetime import date
+from django.test import TestCase, override_settings
+from common.querybudget import QueryBudgetTestMixin
+from meals.models import Meal
+from users.models import User
+from users.views import get_tokens_for_user
+from .models import ClientRequest, Dietologist, Group
+from .views import get_tokens_for_dietologist
 
-# Create your tests here.
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Queries run by JWT authentication of a user before the view's own budget
+# starts; dietologist tokens are checked inside the view
+AUTH_QUERIES = 1
+
+@override_settings(CACHES=LOCMEM)
+class DietologistQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Every view runs within its declared @query_budget, whatever the number of clients"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dietologist = Dietologist.objects.create(phone_number='+998900000100', first_name='Dilnoza', last_name='Karimova')
+        cls.group = Group.objects.create(dietologist=cls.dietologist, name='Morning', code='MORNING1')
+        cls.clients = User.objects.bulk_create([User(phone_number=f'+99890000020{i}') for i in range(5)])
+        ClientRequest.objects.bulk_create([
+            ClientRequest(user=user, group=cls.group, status='approved') for user in cls.clients
+        ])
+        Meal.objects.bulk_create([
+            Meal(user=cls.clients[0], image_url=f'meals/{i}.jpg', meal_date=date(2025, 3, 1 + i),
+                 foods_data={'foods': []}, meal_time='lunch')
+            for i in range(10)
+        ])
+
+    def dietologist_headers(self):
+        return {'HTTP_AUTHORIZATION': 'Bearer ' + get_tokens_for_dietologist(self.dietologist)['access_token']}
+
+    def test_list_clients(self):
+        with self.assertQueryBudget(2, max_repeats=1):
+            response = self.client.get('/dietologist/clients', **self.dietologist_headers())
+        self.assertEqual(len(response.json()['data']), 5)
+
+    def test_client_detail(self):
+        with self.assertQueryBudget(4, max_repeats=1):
+            response = self.client.get(f'/dietologist/clients/{self.clients[0].id}', **self.dietologist_headers())
+        self.assertEqual(response.json()['data']['total_meals'], 10)
+
+    def test_request_dietologist(self):
+        user = User.objects.create(phone_number='+998900000300')
+        token = get_tokens_for_user(user)['access_token']
+        with self.assertQueryBudget(2 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.post('/user/request-dietologist', {'group_code': 'MORNING1'},
+                                        content_type='application/json', HTTP_AUTHORIZATION='Bearer ' + token)
+        self.assertEqual(response.status_code, 201)
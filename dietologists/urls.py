@@ -11,5 +11,6 @@ urlpatterns = [
     path('dietologist/requests/<int:pk>/reject', views.reject_request, name='reject-request'),
     path('dietologist/clients', views.list_clients, name='list-clients'),
     path('dietologist/clients/<int:user_id>', views.client_detail, name='client-detail'),
+    path('dietologist/clients/<int:user_id>/export', views.client_export, name='client-export'),
     path('user/request-dietologist', views.request_dietologist, name='request-dietologist'),
 ]
\ No newline at end of file
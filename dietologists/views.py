@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from .models import Dietologist, Group, ClientRequest
 from .serializers import (
@@ -11,9 +12,13 @@ from .serializers import (
 )
 from users.serializers import UserProfileSerializer
 from meals.models import Meal
-from meals.serializers import MealSerializer
+from meals.archive import with_archived
+from meals.export import export_response
+from meals.serializers import MealSerializer, MealExportSerializer
 from django.utils.translation import gettext as _
 from common.responses import success_response, error_response
+from common.timing import phase
+from common.querybudget import query_budget
 
 def get_dietologist_from_request(request):
     """Extract and validate dietologist from JWT token"""
@@ -226,6 +231,7 @@ def reject_request(request, pk):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@query_budget(2, max_repeats=1)
 def list_clients(request):
     dietologist = get_dietologist_from_request(request)
     if not dietologist:
@@ -245,7 +251,40 @@ def list_clients(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@query_budget(4, max_repeats=1)
 def client_detail(request, user_id):
+    with phase('auth'):
+        dietologist = get_dietologist_from_request(request)
+    if not dietologist:
+        return error_response(
+            message=_('Unauthorized'),
+            status_code=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    with phase('db'):
+        client_request = get_object_or_404(
+            ClientRequest.objects.select_related('user'),
+            user_id=user_id,
+            group__dietologist=dietologist,
+            status='approved'
+        )
+        
+        user = client_request.user
+        meals = Meal.objects.filter(user=user).order_by('-meal_date', '-created_at')
+        meals_list = with_archived(list(meals), user.id)
+    
+    with phase('serialize'):
+        data = {
+            'profile': UserProfileSerializer(user).data,
+            'meals': MealSerializer(meals_list, many=True, context={'request': request}).data,
+            'total_meals': len(meals_list)
+        }
+    
+    return success_response(data=data)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def client_export(request, user_id):
     dietologist = get_dietologist_from_request(request)
     if not dietologist:
         return error_response(
@@ -260,19 +299,20 @@ def client_detail(request, user_id):
         status='approved'
     )
     
-    user = client_request.user
-    meals = Meal.objects.filter(user=user).order_by('-meal_date', '-created_at')
+    serializer = MealExportSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return error_response(
+            message=_('Validation error'),
+            errors=serializer.errors,
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
     
-    return success_response(
-        data={
-            'profile': UserProfileSerializer(user).data,
-            'meals': MealSerializer(meals, many=True, context={'request': request}).data,
-            'total_meals': meals.count()
-        }
-    )
+    params = serializer.validated_data
+    return export_response(request, client_request.user_id, params['type'], params.get('date_from'), params.get('date_to'))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@query_budget(2, max_repeats=1)
 def request_dietologist(request):
     user = request.user
     
@@ -286,22 +326,24 @@ def request_dietologist(request):
     
     group_code = serializer.validated_data['group_code']
     
-    try:
-        group = Group.objects.get(code=group_code)
-    except Group.DoesNotExist:
+    # Group and both request checks in one query
+    group = Group.objects.filter(code=group_code).annotate(
+        has_approved=Exists(ClientRequest.objects.filter(user=user, status='approved')),
+        has_pending=Exists(ClientRequest.objects.filter(user=user, group=OuterRef('pk'), status='pending')),
+    ).first()
+    if group is None:
         return error_response(
             message=_('Invalid group code'),
             status_code=status.HTTP_404_NOT_FOUND
         )
     
-    existing_approved = ClientRequest.objects.filter(user=user, status='approved').first()
-    if existing_approved:
+    if group.has_approved:
         return error_response(
             message=_('You already have an approved dietologist'),
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    if ClientRequest.objects.filter(user=user, group=group, status='pending').exists():
+    if group.has_pending:
         return error_response(
             message=_('Request already pending'),
             status_code=status.HTTP_400_BAD_REQUEST
@@ -31,9 +31,15 @@ INSTALLED_APPS = [
     'users',
     'meals',
     'dietologists',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'common.middleware.RequestIDMiddleware',
+    'common.middleware.MetricsMiddleware',
+    'common.timing.ServerTimingMiddleware',
+    'common.profiling.ProfilingMiddleware',
+    'common.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,6 +52,90 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'fitora.urls'
 
+# /metrics requires `Authorization: Bearer <METRICS_TOKEN>` when the token is
+# set, and otherwise answers only clients in METRICS_ALLOWED_IPS (addresses or
+# networks, loopback by default). METRICS_PUBLIC=True opts out and serves it to
+# anyone. Multi-process collection is enabled by setting
+# PROMETHEUS_MULTIPROC_DIR in the environment of every server process
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [network.strip() for network in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if network.strip()]
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'False') == 'True'
+
+# Server-Timing header with per-phase durations; requests at least
+# SERVER_TIMING_LOG_MS long are also logged
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+SERVER_TIMING_LOG_MS = float(os.getenv('SERVER_TIMING_LOG_MS', 500))
+
+# Sampling profiler: a fraction of requests, or any request with a signed
+# X-Fitora-Profile header, is profiled into a ring buffer of PROFILING_MAX_FILES
+# files browsable at /admin/profiles/
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', 5))
+PROFILING_FORMAT = os.getenv('PROFILING_FORMAT', 'speedscope')
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+PROFILING_SECRET = os.getenv('PROFILING_SECRET', '')
+
+# JSON lines on stderr through a queue, so logging never blocks a request.
+# LOG_LEVELS sets per-module levels, e.g. "meals=DEBUG,django.db.backends=WARNING";
+# repeated warning/error lines are capped at LOG_RATE_LIMIT per LOG_RATE_WINDOW seconds
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVELS = dict(
+    part.strip().split('=', 1) for part in os.getenv('LOG_LEVELS', '').split(',') if '=' in part
+)
+LOG_RATE_LIMIT = int(os.getenv('LOG_RATE_LIMIT', 10))
+LOG_RATE_WINDOW = float(os.getenv('LOG_RATE_WINDOW', 60))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'common.log.RequestIDFilter'},
+        'rate_limit': {'()': 'common.log.RateLimitFilter', 'limit': LOG_RATE_LIMIT, 'window': LOG_RATE_WINDOW},
+    },
+    'handlers': {
+        'queue': {
+            'class': 'common.log.QueueJSONHandler',
+            'filters': ['request_id', 'rate_limit'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': LOG_LEVEL},
+    'loggers': {
+        'django': {'level': LOG_LEVEL},
+        **{name: {'level': level.upper()} for name, level in LOG_LEVELS.items()},
+    },
+}
+
+# meals is range-partitioned by month (meals.partitions); manage_meal_partitions
+# keeps MEAL_PARTITION_MONTHS_AHEAD future months created and detaches partitions
+# older than MEAL_PARTITION_RETENTION_MONTHS (0 keeps them all)
+MEAL_PARTITION_MONTHS_AHEAD = int(os.getenv('MEAL_PARTITION_MONTHS_AHEAD', 3))
+MEAL_PARTITION_RETENTION_MONTHS = int(os.getenv('MEAL_PARTITION_RETENTION_MONTHS', 0))
+
+# Meals older than MEAL_ARCHIVE_AFTER_DAYS (whole months) are moved by
+# `manage.py archive_meals` into zstd-compressed per-user, per-month blobs
+# under MEAL_ARCHIVE_DIR and read back transparently (meals.archive)
+MEAL_ARCHIVE_DIR = os.getenv('MEAL_ARCHIVE_DIR', BASE_DIR / 'archive')
+MEAL_ARCHIVE_AFTER_DAYS = int(os.getenv('MEAL_ARCHIVE_AFTER_DAYS', 365))
+MEAL_ARCHIVE_ZSTD_LEVEL = int(os.getenv('MEAL_ARCHIVE_ZSTD_LEVEL', 10))
+
+# Rows fetched per server-side cursor round trip by the streaming meal export
+MEAL_EXPORT_CHUNK_SIZE = int(os.getenv('MEAL_EXPORT_CHUNK_SIZE', 2000))
+
+# Largest number of operations accepted by POST /meals/batch
+MEAL_BATCH_MAX_OPERATIONS = int(os.getenv('MEAL_BATCH_MAX_OPERATIONS', 100))
+
+# Changes returned per GET /meals/sync page (meals.sync)
+MEAL_SYNC_PAGE_SIZE = int(os.getenv('MEAL_SYNC_PAGE_SIZE', 500))
+
+# Per-view query budgets (common.querybudget): violations raise when strict,
+# otherwise a sampled fraction is logged. Tests are strict through
+# QueryBudgetTestMixin; served requests only log unless this is turned on
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', 'True') == 'True'
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+QUERY_BUDGET_LOG_SAMPLE_RATE = float(os.getenv('QUERY_BUDGET_LOG_SAMPLE_RATE', 0.1))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -72,9 +162,44 @@ DATABASES = {
         'PASSWORD': os.getenv('DATABASE_PASSWORD'),
         'HOST': os.getenv('DATABASE_HOST'),
         'PORT': os.getenv('DATABASE_PORT'),
+        'CONN_HEALTH_CHECKS': os.getenv('DATABASE_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
 }
 
+# psycopg 3 connection pool per worker process (DATABASE_POOL=True). Sizes are
+# per process; lifetimes and timeouts in seconds. With the pool off,
+# DATABASE_CONN_MAX_AGE keeps per-thread persistent connections instead.
+if os.getenv('DATABASE_POOL', 'True') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Django requires 0 with a pool
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', '10')),
+        'max_lifetime': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', '1800')),
+        'max_idle': float(os.getenv('DATABASE_POOL_MAX_IDLE', '300')),
+        'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', '10')),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DATABASE_CONN_MAX_AGE', '0'))
+
+# Read replicas, e.g. "replica-1:5432,replica-2" or "127.0.0.1/fitora_replica"
+# for a second database on the same server (host[:port][/name]). Safe requests
+# read from a random replica unless the caller wrote within the last
+# DATABASE_REPLICA_PIN_SECONDS (see common.middleware.ReplicaPinningMiddleware)
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 5))
+for index, entry in enumerate(filter(None, (part.strip() for part in os.getenv('DATABASE_REPLICAS', '').split(','))), 1):
+    address, _slash, name = entry.partition('/')
+    host, _colon, port = address.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host or DATABASES['default']['HOST'],
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['common.db_routers.ReplicaRouter'] if len(DATABASES) > 1 else []
+
 AUTH_USER_MODEL = 'users.User'
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -138,9 +263,89 @@ CHANNEL_LAYERS = {
     },
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+# Idempotency-Key replay (common.idempotency): first responses are kept for
+# IDEMPOTENCY_TTL; an attempt holds its key for up to IDEMPOTENCY_LOCK_SECONDS
+# and duplicates wait up to IDEMPOTENCY_WAIT_SECONDS for it before a 409
+IDEMPOTENCY_ENABLED = os.getenv('IDEMPOTENCY_ENABLED', 'True') == 'True'
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 60 * 60 * 24))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 120))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 30))
+
+# Versioned ETags and rendered-response caching for per-user reads
+# (common.conditional); entries for superseded versions expire after RESPONSE_CACHE_TTL
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60 * 60))
+
+# Text-to-nutrition results, keyed by normalized description and language
+MEAL_TEXT_CACHE_SIZE = int(os.getenv('MEAL_TEXT_CACHE_SIZE', 2048))
+MEAL_TEXT_CACHE_TTL = int(os.getenv('MEAL_TEXT_CACHE_TTL', 60 * 60 * 24 * 7))
+
+# Model routing: requests start on the first tier and escalate on low confidence or failure.
+# MODEL_LANGUAGE_TIERS overrides the tiers per language, e.g. "uz=gpt-4o;uz-cyrl=gpt-4o"
+MODEL_ROUTER_BACKEND = os.getenv('MODEL_ROUTER_BACKEND', 'meals.llm.OpenAIBackend')
+MODEL_TIERS = os.getenv('MODEL_TIERS', 'gpt-4o-mini,gpt-4o').split(',')
+MODEL_LANGUAGE_TIERS = {
+    language: models.split(',')
+    for language, models in (
+        item.split('=', 1) for item in os.getenv('MODEL_LANGUAGE_TIERS', '').split(';') if '=' in item
+    )
+}
+MODEL_ESCALATE_CONFIDENCE = os.getenv('MODEL_ESCALATE_CONFIDENCE', 'low').split(',')
+TRANSCRIPTION_MODEL = os.getenv('TRANSCRIPTION_MODEL', 'gpt-4o-transcribe')
+# USD per 1M (input, cached input, output) tokens, used for per-tier cost accounting
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4o-transcribe': (2.50, 2.50, 10.00),
+}
+
+# Unset talks to api.openai.com; point at `manage.py run_openai_stub` for local perf runs
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+
+# Provider call policy: per-attempt timeout, jittered retries, optional hedging
+# ('' off, 'p95' or seconds) and a per-model circuit breaker
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 20))
+OPENAI_RETRIES = int(os.getenv('OPENAI_RETRIES', 2))
+OPENAI_BACKOFF_BASE = float(os.getenv('OPENAI_BACKOFF_BASE', 0.5))
+OPENAI_BACKOFF_MAX = float(os.getenv('OPENAI_BACKOFF_MAX', 4))
+OPENAI_HEDGE_AFTER = os.getenv('OPENAI_HEDGE_AFTER', '')
+# Threads for hedged attempts: a primary and a hedge per request thread
+# (ASGI_THREADS under daphne), so attempts never wait in a queue
+OPENAI_CALL_WORKERS = int(os.getenv('OPENAI_CALL_WORKERS', 2 * int(os.getenv('ASGI_THREADS', 32))))
+OPENAI_BREAKER_FAILURE_RATE = float(os.getenv('OPENAI_BREAKER_FAILURE_RATE', 0.5))
+OPENAI_BREAKER_MIN_CALLS = int(os.getenv('OPENAI_BREAKER_MIN_CALLS', 10))
+OPENAI_BREAKER_WINDOW = float(os.getenv('OPENAI_BREAKER_WINDOW', 60))
+OPENAI_BREAKER_COOLDOWN = float(os.getenv('OPENAI_BREAKER_COOLDOWN', 30))
+
+# Ask the model for the short-key numeric schema (meals.schemas.compact_schema)
+MEAL_ANALYSIS_COMPACT = os.getenv('MEAL_ANALYSIS_COMPACT', 'True') == 'True'
+
+# Local food catalog used to resolve known foods without calling the model
+FOOD_CATALOG_ENABLED = os.getenv('FOOD_CATALOG_ENABLED', 'True') == 'True'
+FOOD_CATALOG_MATCH_THRESHOLD = float(os.getenv('FOOD_CATALOG_MATCH_THRESHOLD', 0.6))
+FOOD_CATALOG_REFRESH_SECONDS = int(os.getenv('FOOD_CATALOG_REFRESH_SECONDS', 300))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# '' streams files from Django, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd)
+# hands the byte transfer to the front proxy after the access check
+MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 365))
+
+# Voice uploads are re-encoded as 16 kHz mono PCM with silence trimmed before transcription
+AUDIO_PREPROCESSING = os.getenv('AUDIO_PREPROCESSING', 'True') == 'True'
+AUDIO_SILENCE_THRESHOLD_DB = float(os.getenv('AUDIO_SILENCE_THRESHOLD_DB', -45.0))
+AUDIO_MAX_PAUSE_MS = int(os.getenv('AUDIO_MAX_PAUSE_MS', 600))
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
     'dietologists.backends.DietologistBackend',
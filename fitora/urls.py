@@ -2,9 +2,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from common.views import metrics_view, profile_list, profile_download
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profile_list), name='admin-profiles'),
+    path('admin/profiles/<str:name>', admin.site.admin_view(profile_download), name='admin-profile-download'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('users.urls')),
     path('', include('meals.urls')),
     path('', include('dietologists.urls')),
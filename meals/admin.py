@@ -1,10 +1,11 @@
 from django.contrib import admin
-from .models import Meal
+from .models import Meal, MealArchive, FoodItem
 
 @admin.register(Meal)
 class MealAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'meal_time', 'created_at']
     list_filter = ['meal_time', 'created_at']
+    list_select_related = ['user']
     search_fields = ['user__email', 'user__phone_number']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
@@ -14,3 +15,26 @@ class MealAdmin(admin.ModelAdmin):
         ('Nutritional Data', {'fields': ('foods_data',)}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
+
+@admin.register(MealArchive)
+class MealArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'month', 'meal_count', 'raw_bytes', 'stored_bytes', 'updated_at']
+    list_select_related = ['user']
+    search_fields = ['user__email', 'user__phone_number']
+    readonly_fields = ['user', 'month', 'path', 'meal_count', 'raw_bytes', 'stored_bytes', 'created_at', 'updated_at']
+    ordering = ['-month']
+
+@admin.register(FoodItem)
+class FoodItemAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'name_uz', 'name_ru', 'default_portion_g', 'sample_count', 'is_verified']
+    list_filter = ['is_verified']
+    search_fields = ['name', 'name_uz', 'name_uz_cyrl', 'name_ru']
+    readonly_fields = ['sample_count', 'created_at', 'updated_at']
+    ordering = ['name']
+    
+    fieldsets = (
+        ('Names', {'fields': ('name', 'name_uz', 'name_uz_cyrl', 'name_ru', 'aliases')}),
+        ('Portions', {'fields': ('default_portion_g', 'unit_weight_g')}),
+        ('Nutrients per 100 g', {'fields': ('nutrients',)}),
+        ('Status', {'fields': ('is_verified', 'sample_count', 'created_at', 'updated_at')}),
+    )
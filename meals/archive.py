@@ -0,0 +1,309 @@
+import functools
+import json
+import operator
+import os
+import time
+from datetime import date
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import zstandard
+from common.conditional import bump_version
+from .models import Meal, MealArchive
+from .partitions import add_months, month_start
+
+# Cold tier for old meals. Each user-month is one zstd-compressed JSON blob
+# under MEAL_ARCHIVE_DIR, indexed by a MealArchive row; the rows themselves
+# leave the `meals` table. Reads go through MealHistory / with_archived /
+# merge_day, which hand back unsaved Meal instances, so serializers and
+# totals work unchanged; find_archived looks up a single one. A meal can be
+# both hot and archived (logged or edited in an archived month, or left
+# behind by an interrupted archive_month); the hot row always wins.
+# Archived meals are read-only, except that delete_archived removes one.
+
+FIELDS = ('id', 'image_url', 'meal_date', 'foods_data', 'meal_time', 'created_at', 'updated_at')
+FORMAT_VERSION = 1
+
+def archive_cutoff(after_days=None, today=None):
+    """First month that stays hot: whole months before it are archived"""
+    today = today or timezone.localdate()
+    after_days = settings.MEAL_ARCHIVE_AFTER_DAYS if after_days is None else after_days
+    return month_start(date.fromordinal(today.toordinal() - after_days))
+
+def archive_path(user_id, month, revision=None):
+    if revision is None:
+        return f"{user_id}/{month:%Y-%m}.json.zst"
+    return f"{user_id}/{month:%Y-%m}.{revision}.json.zst"
+
+def encode(user_id, month, rows):
+    raw = json.dumps({
+        'version': FORMAT_VERSION,
+        'user_id': user_id,
+        'month': f"{month:%Y-%m}",
+        'meals': rows,
+    }, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return raw, zstandard.ZstdCompressor(level=settings.MEAL_ARCHIVE_ZSTD_LEVEL).compress(raw)
+
+def decode(blob):
+    return json.loads(zstandard.ZstdDecompressor().decompress(blob))['meals']
+
+def _write(path, blob):
+    full = os.path.join(str(settings.MEAL_ARCHIVE_DIR), path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    temporary = f"{full}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(blob)
+    os.replace(temporary, full)
+
+def _remove_on_commit(path):
+    def remove():
+        try:
+            os.remove(os.path.join(str(settings.MEAL_ARCHIVE_DIR), path))
+        except FileNotFoundError:
+            pass
+    transaction.on_commit(remove)
+
+def _read(path):
+    with open(os.path.join(str(settings.MEAL_ARCHIVE_DIR), path), 'rb') as f:
+        return decode(f.read())
+
+@functools.lru_cache(maxsize=32)
+def _load(path, version):
+    # `version` (the index row's updated_at) invalidates entries after a re-archive
+    return tuple(_read(path))
+
+def to_meal(user_id, row):
+    meal = Meal(
+        id=row['id'],
+        user_id=user_id,
+        image_url=row['image_url'],
+        meal_date=date.fromisoformat(row['meal_date']),
+        foods_data=row['foods_data'],
+        meal_time=row['meal_time'],
+        created_at=parse_datetime(row['created_at']),
+        updated_at=parse_datetime(row['updated_at']),
+    )
+    meal._state.adding = False
+    meal.archived = True
+    return meal
+
+def read_archive(archive):
+    """Meals of one MealArchive, newest first like Meal.Meta.ordering"""
+    return [to_meal(archive.user_id, row) for row in _load(archive.path, archive.updated_at)]
+
+def archive_month(user_id, month):
+    """
+    Moves one user's meals dated in `month` into the archive, merging with an
+    earlier blob for the same month. Returns the MealArchive, or None when
+    there was nothing to move.
+    """
+    start, end = month_start(month), add_months(month_start(month), 1)
+    with transaction.atomic():
+        existing = MealArchive.objects.select_for_update().filter(user_id=user_id, month=start).first()
+        hot = Meal.objects.filter(user_id=user_id, meal_date__gte=start, meal_date__lt=end)
+        # Locked, so an edit cannot commit between this read and the DELETE and be lost
+        rows = list(hot.select_for_update().values(*FIELDS))
+        if not rows:
+            return None
+
+        merged = {row['id']: row for row in (_read(existing.path) if existing else [])}
+        for row in rows:
+            row['image_url'] = str(row['image_url'] or '')
+            merged[row['id']] = json.loads(json.dumps(row, cls=DjangoJSONEncoder))
+        ordered = sorted(merged.values(), key=lambda row: (row['meal_date'], row['created_at']), reverse=True)
+
+        path = archive_path(user_id, start)
+        raw, blob = encode(user_id, start, ordered)
+        # Written before the rows are deleted: if the transaction fails, the
+        # blob only duplicates rows that are still hot, and reads prefer hot rows
+        _write(path, blob)
+
+        archive, _ = MealArchive.objects.update_or_create(
+            user_id=user_id, month=start,
+            defaults={'path': path, 'meal_count': len(ordered), 'raw_bytes': len(raw), 'stored_bytes': len(blob)},
+        )
+        if existing and existing.path != path:
+            _remove_on_commit(existing.path)
+        hot.filter(id__in=[row['id'] for row in rows]).delete()
+        bump_version(user_id)
+    return archive
+
+def find_archived(user_id, meal_id):
+    """The user's archived meal with this id, or None"""
+    for archive in MealArchive.objects.filter(user_id=user_id).order_by('-month'):
+        for meal in read_archive(archive):
+            if meal.id == meal_id:
+                return meal
+    return None
+
+def delete_archived(user_id, meal_id, month=None):
+    """
+    Removes a meal from the user's archive, searching only the blob of
+    `month` when given. Returns True when it was archived. Call inside the
+    deleting transaction.
+    """
+    archives = MealArchive.objects.select_for_update().filter(user_id=user_id).order_by('-month')
+    if month is not None:
+        archives = archives.filter(month=month_start(month))
+    for archive in archives:
+        rows = _read(archive.path)
+        kept = [row for row in rows if row['id'] != meal_id]
+        if len(kept) == len(rows):
+            continue
+        # The old blob stays in place until commit, so a rollback loses nothing
+        _remove_on_commit(archive.path)
+        if not kept:
+            archive.delete()
+            return True
+        path = archive_path(user_id, archive.month, time.time_ns())
+        raw, blob = encode(user_id, archive.month, kept)
+        _write(path, blob)
+        archive.path, archive.meal_count, archive.raw_bytes, archive.stored_bytes = path, len(kept), len(raw), len(blob)
+        archive.save()
+        return True
+    return False
+
+def newest_first(meals):
+    return sorted(meals, key=lambda meal: (meal.meal_date, meal.created_at), reverse=True)
+
+def merge(hot, archived):
+    """Hot meals plus the archived ones not also hot, newest first"""
+    seen = {meal.id for meal in hot}
+    return newest_first(list(hot) + [meal for meal in archived if meal.id not in seen])
+
+def with_archived(meals, user_id):
+    """Hot meals and every archived one not also hot, newest first"""
+    archived = [
+        meal
+        for archive in MealArchive.objects.filter(user_id=user_id).order_by('-month')
+        for meal in read_archive(archive)
+    ]
+    return merge(meals, archived)
+
+def iter_archived(user_id, start=None, end=None):
+    """
+    Archived meals not also hot, oldest first, optionally limited to
+    meal_date in [start, end]. Blobs are read one at a time and bypass the
+    LRU, for exports; the hot ids are fetched per month, so memory stays flat.
+    """
+    archives = MealArchive.objects.filter(user_id=user_id).order_by('month')
+    if start:
+        archives = archives.filter(month__gte=month_start(start))
+    if end:
+        archives = archives.filter(month__lte=end)
+    for archive in list(archives):
+        hot = set(Meal.objects.filter(
+            user_id=user_id, meal_date__gte=archive.month, meal_date__lt=add_months(archive.month, 1),
+        ).values_list('id', flat=True))
+        for row in reversed(_read(archive.path)):
+            if row['id'] in hot:
+                continue
+            meal = to_meal(user_id, row)
+            if (start is None or meal.meal_date >= start) and (end is None or meal.meal_date <= end):
+                yield meal
+
+def archived_day(user_id, day):
+    archive = MealArchive.objects.filter(user_id=user_id, month=month_start(day)).first()
+    if archive is None:
+        return []
+    return [meal for meal in read_archive(archive) if meal.meal_date == day]
+
+def merge_day(meals, user_id, day):
+    """One day's hot meals together with its archived ones"""
+    return merge(meals, archived_day(user_id, day))
+
+class MealHistory:
+    """
+    A user's meal history for Paginator, newest first across both tiers.
+    It is laid out month by month: an archived month is its blob merged with
+    any rows of that month still hot, other months are runs of the hot
+    queryset. Only the blobs a page overlaps are read, and the hot rows of a
+    page come from one query.
+    """
+
+    def __init__(self, queryset, user_id):
+        self.queryset = queryset.order_by('-meal_date', '-created_at')
+        self.user_id = user_id
+        self._segments = None
+
+    @property
+    def segments(self):
+        """[(kind, value, size)] newest month first, kind being 'hot', 'archive' or 'merged'"""
+        if self._segments is None:
+            archives = {archive.month: archive for archive in MealArchive.objects.filter(user_id=self.user_id)}
+            hot_counts = dict(
+                self.queryset.order_by()
+                .annotate(month=TruncMonth('meal_date'))
+                .values_list('month')
+                .annotate(count=Count('id'))
+            )
+            merged = self._merged_months([month for month in hot_counts if month in archives], archives)
+
+            self._segments = []
+            hot_offset = 0
+            for month in sorted(set(archives) | set(hot_counts), reverse=True):
+                if month in merged:
+                    self._segments.append(('merged', merged[month], len(merged[month])))
+                elif month in archives:
+                    self._segments.append(('archive', archives[month], archives[month].meal_count))
+                else:
+                    self._segments.append(('hot', hot_offset, hot_counts[month]))
+                hot_offset += hot_counts.get(month, 0)
+        return self._segments
+
+    def _merged_months(self, months, archives):
+        if not months:
+            return {}
+        ranges = functools.reduce(operator.or_, (
+            Q(meal_date__gte=month, meal_date__lt=add_months(month, 1)) for month in months
+        ))
+        hot = {month: [] for month in months}
+        for meal in self.queryset.filter(ranges):
+            hot[month_start(meal.meal_date)].append(meal)
+        return {month: merge(hot[month], read_archive(archives[month])) for month in months}
+
+    def count(self):
+        return sum(size for _, _, size in self.segments)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            items = self[index:index + 1]
+            if not items:
+                raise IndexError(index)
+            return items[0]
+
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        pieces = []
+        offset = 0
+        for kind, value, size in self.segments:
+            if offset >= stop:
+                break
+            end = offset + size
+            if end > start:
+                low, high = max(start - offset, 0), min(stop, end) - offset
+                if kind == 'hot':
+                    pieces.append(('hot', value + low, value + high))
+                elif kind == 'archive':
+                    pieces.append(('meals', read_archive(value)[low:high], None))
+                else:
+                    pieces.append(('meals', value[low:high], None))
+            offset = end
+
+        # One query for every hot run on the page, including any merged-month
+        # rows lying between them, which are skipped
+        hot_runs = [piece for piece in pieces if piece[0] == 'hot']
+        if hot_runs:
+            base = hot_runs[0][1]
+            window = list(self.queryset[base:hot_runs[-1][2]])
+        items = []
+        for kind, value, end in pieces:
+            items.extend(window[value - base:end - base] if kind == 'hot' else value)
+        return items
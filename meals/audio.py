@@ -0,0 +1,202 @@
+import io
+import struct
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+FRAME_MS = 30
+READ_BLOCK_FRAMES = 64 * 1024
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+class AudioFormatError(ValueError):
+    pass
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise AudioFormatError("Unexpected end of WAV data")
+    return data
+
+def _skip(stream, size):
+    if size <= 0:
+        return
+    try:
+        stream.seek(size, io.SEEK_CUR)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        while size > 0:
+            chunk = stream.read(min(size, 65536))
+            if not chunk:
+                raise AudioFormatError("Unexpected end of WAV data")
+            size -= len(chunk)
+
+def _decode_block(raw, format_tag, sample_width, channels):
+    """Decode interleaved samples into a mono float32 array in [-1, 1]"""
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        dtype = {4: '<f4', 8: '<f8'}.get(sample_width)
+        if dtype is None:
+            raise AudioFormatError(f"Unsupported float sample width: {sample_width}")
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+    elif sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        samples = values.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise AudioFormatError(f"Unsupported PCM sample width: {sample_width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+def read_wav(stream):
+    """
+    Read a WAV stream chunk by chunk and return (mono float32 samples, sample rate).
+    Only the fmt and data chunks are decoded; everything else is skipped.
+    """
+    header = _read_exact(stream, 12)
+    riff, _size, wave = struct.unpack('<4sI4s', header)
+    if riff != b'RIFF' or wave != b'WAVE':
+        raise AudioFormatError("Not a RIFF/WAVE file")
+
+    fmt = None
+    while True:
+        chunk_header = stream.read(8)
+        if len(chunk_header) < 8:
+            raise AudioFormatError("WAV file has no data chunk")
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+        if chunk_id == b'fmt ':
+            body = _read_exact(stream, chunk_size)
+            if chunk_size < 16:
+                raise AudioFormatError("Invalid fmt chunk")
+            format_tag, channels, sample_rate, _byte_rate, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                format_tag = struct.unpack('<H', body[24:26])[0]
+            if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                raise AudioFormatError(f"Unsupported WAV encoding: {format_tag:#x}")
+            if not channels or not sample_rate or not block_align:
+                raise AudioFormatError("Invalid fmt chunk")
+            fmt = (format_tag, channels, sample_rate, block_align // channels)
+            _skip(stream, chunk_size & 1)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise AudioFormatError("data chunk before fmt chunk")
+            break
+        else:
+            _skip(stream, chunk_size + (chunk_size & 1))
+
+    format_tag, channels, sample_rate, sample_width = fmt
+    frame_size = sample_width * channels
+    # Streaming writers sometimes leave the data size at 0 or 0xFFFFFFFF
+    remaining = chunk_size if chunk_size not in (0, 0xFFFFFFFF) else None
+
+    blocks = []
+    block_bytes = READ_BLOCK_FRAMES * frame_size
+    while remaining is None or remaining > 0:
+        to_read = block_bytes if remaining is None else min(block_bytes, remaining)
+        raw = stream.read(to_read)
+        if not raw:
+            break
+        if remaining is not None:
+            remaining -= len(raw)
+        usable = len(raw) - len(raw) % frame_size
+        if usable:
+            blocks.append(_decode_block(raw[:usable], format_tag, sample_width, channels))
+
+    if not blocks:
+        return np.zeros(0, dtype=np.float32), sample_rate
+    return np.concatenate(blocks), sample_rate
+
+def _lowpass_kernel(cutoff, taps=101):
+    """Windowed-sinc low-pass FIR; cutoff is a fraction of the input Nyquist"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = cutoff * np.sinc(cutoff * n) * np.blackman(taps)
+    return kernel / kernel.sum()
+
+def _fft_convolve(signal, kernel):
+    size = len(signal) + len(kernel) - 1
+    nfft = 1 << (size - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(signal, nfft) * np.fft.rfft(kernel, nfft), nfft)[:size]
+    offset = (len(kernel) - 1) // 2
+    return result[offset:offset + len(signal)].astype(np.float32)
+
+def resample(samples, sample_rate, target_rate=TARGET_SAMPLE_RATE):
+    if sample_rate == target_rate or not len(samples):
+        return samples
+    if target_rate < sample_rate:
+        samples = _fft_convolve(samples, _lowpass_kernel(target_rate / sample_rate))
+
+    duration = len(samples) / sample_rate
+    target_length = int(round(duration * target_rate))
+    source_times = np.arange(len(samples)) / sample_rate
+    target_times = np.arange(target_length) / target_rate
+    return np.interp(target_times, source_times, samples).astype(np.float32)
+
+def trim_silence(samples, sample_rate, threshold_db=-45.0, max_pause_ms=600, padding_ms=150):
+    """
+    Energy VAD: drop leading/trailing silence and shorten pauses longer than
+    max_pause_ms. Audio with no detected speech is returned unchanged.
+    """
+    frame = int(sample_rate * FRAME_MS / 1000)
+    frame_count = len(samples) // frame
+    if frame_count == 0:
+        return samples
+
+    frames = samples[:frame_count * frame].reshape(frame_count, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    # Adapt to the recording: at least 10 dB above the noise floor
+    noise_floor = np.percentile(energy_db, 10)
+    voiced = energy_db > max(threshold_db, noise_floor + 10.0)
+    if not voiced.any():
+        return samples
+
+    # Pad voiced regions so word onsets and tails are not clipped
+    pad = max(1, padding_ms // FRAME_MS)
+    kernel = np.ones(2 * pad + 1, dtype=bool)
+    voiced = np.convolve(voiced, kernel, mode='same') > 0
+
+    first = int(np.argmax(voiced))
+    last = frame_count - int(np.argmax(voiced[::-1]))
+    max_pause = max(1, max_pause_ms // FRAME_MS)
+
+    keep = voiced[first:last].copy()
+    silent_run = 0
+    for index in range(len(keep)):
+        if keep[index]:
+            silent_run = 0
+            continue
+        silent_run += 1
+        keep[index] = silent_run <= max_pause
+
+    kept = frames[first:last][keep]
+    tail = samples[frame_count * frame:] if last == frame_count else samples[:0]
+    return np.concatenate([kept.reshape(-1), tail])
+
+def encode_wav(samples, sample_rate=TARGET_SAMPLE_RATE):
+    """Encode mono float samples as 16-bit PCM WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + len(pcm), b'WAVE',
+        b'fmt ', 16, WAVE_FORMAT_PCM, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', len(pcm)
+    )
+    return header + pcm
+
+def preprocess_audio(stream, threshold_db=-45.0, max_pause_ms=600):
+    """
+    Convert an uploaded WAV into compact 16 kHz mono 16-bit PCM with silence
+    trimmed. Raises AudioFormatError if the input cannot be decoded.
+    """
+    samples, sample_rate = read_wav(stream)
+    samples = resample(samples, sample_rate)
+    samples = trim_silence(samples, TARGET_SAMPLE_RATE, threshold_db=threshold_db, max_pause_ms=max_pause_ms)
+    return encode_wav(samples)
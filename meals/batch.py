@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from .models import Meal
+from .serializers import MealCreateSerializer, MealSerializer
+from .sync import record_changes
+
+# Batched create/update/delete for offline-first clients that queue a day's
+# meals. Every operation is validated against one locked lookup of the meals
+# it targets; only when all of them pass are they applied, with one bulk
+# query per kind, in the same transaction. Anything that reacts to meal
+# writes belongs in _save(), so it runs once per batch rather than per row.
+
+class MealBatch:
+    """
+    Used like a serializer:
+
+        batch = MealBatch(request.user, operations, context={'request': request})
+        if not batch.apply():
+            ... batch.errors ...
+        batch.results
+    """
+
+    def __init__(self, user, operations, context=None):
+        self.user = user
+        self.operations = operations
+        self.context = context or {}
+        self.errors = [{} for operation in operations]
+        self.results = None
+        self._creates = []
+        self._updates = []
+        self._deletes = []
+
+    def apply(self):
+        """Validates every operation and applies them all, or none. Returns True on success"""
+        with transaction.atomic():
+            self._validate()
+            if any(self.errors):
+                return False
+            self._save()
+        self.results = self._results()
+        return True
+
+    def _validate(self):
+        ids = [operation['id'] for operation in self.operations if operation['op'] != 'create']
+        targets = Meal.objects.select_for_update().filter(user=self.user).in_bulk(ids)
+        seen = set()
+
+        for index, operation in enumerate(self.operations):
+            op = operation['op']
+            if op == 'create':
+                serializer = MealCreateSerializer(data=operation['data'], context=self.context)
+                if serializer.is_valid():
+                    self._creates.append((index, Meal(user=self.user, **serializer.validated_data)))
+                else:
+                    self.errors[index] = serializer.errors
+                continue
+
+            meal_id = operation['id']
+            if meal_id in seen:
+                self.errors[index] = {'id': [_('Meal appears in more than one operation')]}
+                continue
+            seen.add(meal_id)
+            meal = targets.get(meal_id)
+            if meal is None:
+                self.errors[index] = {'id': [_('Meal not found')]}
+                continue
+
+            if op == 'delete':
+                self._deletes.append((index, meal))
+                continue
+            serializer = MealSerializer(meal, data=operation['data'], partial=True, context=self.context)
+            if not serializer.is_valid():
+                self.errors[index] = serializer.errors
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(meal, field, value)
+            self._updates.append((index, meal, set(serializer.validated_data)))
+
+    def _save(self):
+        if self._creates:
+            Meal.objects.bulk_create([meal for index, meal in self._creates])
+        if self._updates:
+            # bulk_update skips auto_now, so updated_at is set by hand
+            now = timezone.now()
+            fields = {'updated_at'}
+            for index, meal, changed in self._updates:
+                meal.updated_at = now
+                fields |= changed
+            Meal.objects.bulk_update([meal for index, meal, changed in self._updates], sorted(fields))
+        if self._deletes:
+            Meal.objects.filter(user=self.user, id__in=[meal.id for index, meal in self._deletes]).delete()
+        record_changes(
+            self.user.id,
+            upserts=[meal.id for index, meal in self._creates] + [meal.id for index, meal, changed in self._updates],
+            deletes=[meal.id for index, meal in self._deletes],
+        )
+
+    def _results(self):
+        results = [None] * len(self.operations)
+        for index, meal in self._creates:
+            results[index] = {'op': 'create', 'status': 201, 'id': meal.id,
+                              'meal': MealSerializer(meal, context=self.context).data}
+        for index, meal, changed in self._updates:
+            results[index] = {'op': 'update', 'status': 200, 'id': meal.id,
+                              'meal': MealSerializer(meal, context=self.context).data}
+        for index, meal in self._deletes:
+            results[index] = {'op': 'delete', 'status': 204, 'id': meal.id}
+        return results
@@ -0,0 +1,65 @@
+import copy
+import hashlib
+import logging
+import threading
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from .normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    """
+    Two-tier cache for text-based meal analyses: a per-process LRU in front
+    of the shared Django cache (Redis). Keys are the normalized description
+    plus the response language.
+    """
+
+    def __init__(self, prefix, maxsize, ttl):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+
+    def make_key(self, text, language):
+        normalized = normalize_text(text, language)
+        digest = hashlib.sha256(f"{language}\n{normalized}".encode('utf-8')).hexdigest()
+        return f"{self.prefix}:{digest}"
+
+    def get(self, text, language):
+        key = self.make_key(text, language)
+
+        with self.lock:
+            value = self.local.get(key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        try:
+            value = shared_cache.get(key)
+        except Exception as e:
+            logger.warning("Analysis cache read error: %s", e)
+            return None
+
+        if value is not None:
+            with self.lock:
+                self.local[key] = value
+            return copy.deepcopy(value)
+        return None
+
+    def set(self, text, language, value):
+        key = self.make_key(text, language)
+        value = copy.deepcopy(value)
+
+        with self.lock:
+            self.local[key] = value
+        try:
+            shared_cache.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning("Analysis cache write error: %s", e)
+
+meal_text_cache = AnalysisCache(
+    prefix='meal-text',
+    maxsize=settings.MEAL_TEXT_CACHE_SIZE,
+    ttl=settings.MEAL_TEXT_CACHE_TTL,
+)
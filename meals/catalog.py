@@ -0,0 +1,208 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import FoodItem
+from .normalization import normalize_text
+from .nutrients import food_groups
+
+# Tokens that split a description into separate food items
+SEPARATORS = {'and', 'with', 'plus', 'va', 'bilan', 'hamda', 'и', 'с', 'со', 'плюс'}
+# Filler words that carry no food identity
+STOP_WORDS = {'of', 'some', 'the', 'i', 'ate', 'had', 'drank', 'men', 'yedim', 'ichdim', 'я', 'съел', 'съела', 'выпил', 'выпила'}
+
+GRAM_UNITS = {'g', 'gr', 'gram', 'grams', 'gramm', 'г', 'гр', 'грамм', 'грамма', 'граммов', 'ml', 'мл', 'millilitr'}
+KILO_UNITS = {'kg', 'kilo', 'kilogram', 'кг', 'килограмм', 'l', 'litr', 'liter', 'litre', 'л', 'литр'}
+PIECE_UNITS = {'piece', 'pieces', 'pc', 'pcs', 'dona', 'ta', 'шт', 'штук', 'штуки', 'штука'}
+# Household measures, in grams
+MEASURE_UNITS = {
+    'cup': 250, 'cups': 250, 'glass': 250, 'stakan': 250, 'стакан': 250, 'стакана': 250,
+    'piyola': 200, 'пиала': 200, 'пиалы': 200,
+    'bowl': 350, 'kosa': 350, 'тарелка': 350, 'тарелки': 350, 'likopcha': 350,
+    'slice': 30, 'slices': 30, "bo'lak": 30, 'кусок': 30, 'куска': 30,
+    'spoon': 15, 'tablespoon': 15, 'qoshiq': 15, "qoshiq'": 15, 'ложка': 15, 'ложки': 15,
+}
+
+UNIT_WORDS = GRAM_UNITS | KILO_UNITS | PIECE_UNITS | set(MEASURE_UNITS)
+QUANTITY_RE = re.compile(r'^(\d+(?:\.\d+)?)(\D*)$')
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a, b):
+    return 2.0 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+def covers(query_words, name_words, threshold):
+    """
+    Every word on each side matches a word on the other, exactly or by
+    trigram similarity, so "chicken soup" never resolves to "chicken"
+    """
+    return (
+        all(any(dice(word, other) >= threshold for other in name_words) for word in query_words)
+        and all(any(dice(word, other) >= threshold for other in query_words) for word in name_words)
+    )
+
+class FoodCatalogIndex:
+    """
+    In-memory trigram index over every localized name and alias of FoodItem.
+    A name matches when it is similar as a whole (Dice coefficient) and
+    word by word (covers()).
+    """
+
+    def __init__(self, items):
+        self.items = {}
+        self.names = []
+        self.postings = defaultdict(list)
+
+        for item in items:
+            self.items[item.id] = item
+            for name, language in item.all_names():
+                normalized = normalize_text(name, language)
+                if not normalized:
+                    continue
+                grams = trigrams(normalized)
+                entry = len(self.names)
+                words = [trigrams(word) for word in normalized.split()]
+                self.names.append((item.id, words, len(grams)))
+                for gram in grams:
+                    self.postings[gram].append(entry)
+
+    def lookup(self, query, threshold):
+        """Return (FoodItem, score) for the best matching name, or (None, best score seen)"""
+        grams = trigrams(query)
+        if not grams:
+            return None, 0.0
+        words = [trigrams(word) for word in query.split()]
+
+        overlaps = defaultdict(int)
+        for gram in grams:
+            for entry in self.postings.get(gram, ()):
+                overlaps[entry] += 1
+
+        scored = sorted(
+            ((2.0 * overlap / (len(grams) + self.names[entry][2]), entry) for entry, overlap in overlaps.items()),
+            reverse=True,
+        )
+        for score, entry in scored:
+            if score < threshold:
+                break
+            item_id, name_words, _size = self.names[entry]
+            if covers(words, name_words, threshold):
+                return self.items[item_id], score
+        return None, scored[0][0] if scored else 0.0
+
+_index = None
+_index_loaded_at = 0.0
+_index_lock = threading.Lock()
+
+def get_index():
+    global _index, _index_loaded_at
+
+    if _index is not None and time.monotonic() - _index_loaded_at < settings.FOOD_CATALOG_REFRESH_SECONDS:
+        return _index
+
+    with _index_lock:
+        if _index is None or time.monotonic() - _index_loaded_at >= settings.FOOD_CATALOG_REFRESH_SECONDS:
+            _index = FoodCatalogIndex(FoodItem.objects.all())
+            _index_loaded_at = time.monotonic()
+    return _index
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+def invalidate_index(**kwargs):
+    global _index
+    _index = None
+
+def _split_segments(text, language):
+    """[(text as the user wrote it, normalized tokens)] for each item of a description"""
+    segments = []
+    for piece in re.split(r'[,;\n]+', text):
+        words = []
+        for word in piece.split() + [None]:
+            if word is not None and normalize_text(word, language) not in SEPARATORS:
+                words.append(word)
+                continue
+            tokens = normalize_text(' '.join(words), language).split()
+            if tokens:
+                segments.append((' '.join(words), tokens))
+            words = []
+    return segments
+
+def _parse_segment(tokens):
+    """Split segment tokens into (count, grams, name tokens)"""
+    count, grams = None, None
+    name = []
+    index = 0
+
+    while index < len(tokens):
+        token = tokens[index]
+        match = QUANTITY_RE.match(token)
+
+        if match and (not match.group(2) or match.group(2) in UNIT_WORDS):
+            value = float(match.group(1))
+            # "200g"/"2ta" carry their unit, "200 g" has it in the next token
+            unit = match.group(2) or (tokens[index + 1] if index + 1 < len(tokens) else None)
+            step = 1 if match.group(2) or unit not in UNIT_WORDS else 2
+
+            if unit in GRAM_UNITS:
+                grams = value
+            elif unit in KILO_UNITS:
+                grams = value * 1000
+            elif unit in MEASURE_UNITS:
+                grams = value * MEASURE_UNITS[unit]
+            else:
+                count = value
+            index += step
+            continue
+
+        if token in MEASURE_UNITS and grams is None:
+            grams = MEASURE_UNITS[token]
+        elif token not in STOP_WORDS and token not in PIECE_UNITS:
+            name.append(token)
+        index += 1
+
+    return count, grams, name
+
+def _portion_grams(item, count, grams):
+    if grams is not None:
+        return grams
+    if count is not None:
+        return count * (item.unit_weight_g or item.default_portion_g)
+    return item.default_portion_g
+
+def build_food(item, grams, language):
+    """Build a MealAnalysis-shaped food dict for `grams` of a catalog item"""
+    scale = grams / 100.0
+    vector = {key: value * scale for key, value in item.nutrients.items()}
+    return {
+        'name': item.display_name(language),
+        'portion_size': f"{grams:.0f} g",
+        **food_groups(vector),
+    }
+
+def resolve_description(text, language):
+    """
+    Resolve the items of a meal description against the local catalog.
+    Returns (foods resolved locally, segments the model still has to estimate).
+    """
+    index = get_index()
+    resolved, unresolved = [], []
+
+    for original, tokens in _split_segments(text, language):
+        count, grams, name = _parse_segment(tokens)
+        if not name:
+            continue
+
+        item, _score = index.lookup(' '.join(name), settings.FOOD_CATALOG_MATCH_THRESHOLD)
+        if item is None or not item.nutrients:
+            # The model gets the user's own words, not the transliterated form
+            unresolved.append(original)
+            continue
+
+        resolved.append(build_food(item, _portion_grams(item, count, grams), language))
+
+    return resolved, unresolved
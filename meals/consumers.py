@@ -80,6 +80,7 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from common.metrics import websocket_connections, analyses_in_flight
 from .services import analyze_meal_image
 
 class MealAnalysisConsumer(AsyncWebsocketConsumer):
@@ -92,13 +93,16 @@ class MealAnalysisConsumer(AsyncWebsocketConsumer):
         
         self.user = user
         await self.accept()
+        websocket_connections.inc()
+        self.counted = True
         await self.send(text_data=json.dumps({
             'type': 'connection_established',
             'message': 'Connected to meal analysis service'
         }))
     
     async def disconnect(self, close_code):
-        pass
+        if getattr(self, 'counted', False):
+            websocket_connections.dec()
     
     async def receive(self, text_data=None, bytes_data=None):
         try:
@@ -144,4 +148,5 @@ class MealAnalysisConsumer(AsyncWebsocketConsumer):
     
     @database_sync_to_async
     def analyze_image(self, image_data):
-        return analyze_meal_image(image_data)
\ No newline at end of file
+        with analyses_in_flight.labels('image').track_inprogress():
+            return analyze_meal_image(image_data)
\ No newline at end of file
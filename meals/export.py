@@ -0,0 +1,148 @@
+import csv
+import io
+import itertools
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .archive import iter_archived
+from .models import Meal
+from .nutrients import NUTRIENTS, food_vector, parse_amount
+
+# Streaming export of a user's meal history, one row per food. Rows come from
+# the archive (oldest months, minus meals that are also hot) and then a
+# server-side cursor over `meals`, and are encoded in batches, so memory stays
+# flat however long the history is.
+
+MEAL_COLUMNS = ['meal_id', 'meal_date', 'meal_time', 'created_at', 'image_url']
+FOOD_COLUMNS = ['food_index', 'food_name', 'portion_size']
+NUTRIENT_COLUMNS = [f"{key}_{unit}" for key, _, unit in NUTRIENTS]
+COLUMNS = MEAL_COLUMNS + FOOD_COLUMNS + NUTRIENT_COLUMNS
+
+FIELDS = ('id', 'meal_date', 'meal_time', 'created_at', 'image_url', 'foods_data')
+BATCH_ROWS = 500
+
+def food_values(food):
+    vector = food_vector(food)
+    # Older analyses keep fiber/cholesterol/etc. under 'additional'
+    additional = food.get('additional')
+    if isinstance(additional, dict):
+        for key, _, unit in NUTRIENTS:
+            if key not in vector and key in additional:
+                vector[key] = parse_amount(additional[key], unit)
+    return [round(vector[key], 3) if key in vector else None for key, _, _ in NUTRIENTS]
+
+def flatten(meal):
+    """Per-food rows for a (id, meal_date, meal_time, created_at, image_url, foods_data) tuple"""
+    meal_id, meal_date, meal_time, created_at, image_url, foods_data = meal
+    prefix = [meal_id, meal_date.isoformat(), meal_time, created_at.isoformat(), str(image_url or '')]
+    foods = foods_data.get('foods') if isinstance(foods_data, dict) else None
+    if not isinstance(foods, list) or not foods:
+        return [prefix + [None] * (len(FOOD_COLUMNS) + len(NUTRIENT_COLUMNS))]
+    rows = []
+    for index, food in enumerate(foods):
+        if not isinstance(food, dict):
+            continue
+        rows.append(prefix + [index, food.get('name'), food.get('portion_size')] + food_values(food))
+    return rows
+
+def archived_tuple(meal):
+    return (meal.id, meal.meal_date, meal.meal_time, meal.created_at, meal.image_url, meal.foods_data)
+
+class CSVEncoder:
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def _lines(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def header(self):
+        return self._lines([COLUMNS])
+
+    def encode(self, rows):
+        return self._lines(rows)
+
+class NDJSONEncoder:
+    content_type = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def header(self):
+        return ''
+
+    def encode(self, rows):
+        return ''.join(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows)
+
+class ColumnarEncoder:
+    """NDJSON of column batches: {"count": n, "columns": {"meal_id": [...], ...}} per line"""
+    content_type = 'application/x-ndjson'
+    extension = 'columns.ndjson'
+
+    def header(self):
+        return ''
+
+    def encode(self, rows):
+        columns = {name: [row[index] for row in rows] for index, name in enumerate(COLUMNS)}
+        return json.dumps({'count': len(rows), 'columns': columns}, ensure_ascii=False) + '\n'
+
+ENCODERS = {
+    'csv': CSVEncoder,
+    'ndjson': NDJSONEncoder,
+    'columnar': ColumnarEncoder,
+}
+
+def hot_meals(user_id, start=None, end=None):
+    queryset = Meal.objects.filter(user_id=user_id)
+    if start:
+        queryset = queryset.filter(meal_date__gte=start)
+    if end:
+        queryset = queryset.filter(meal_date__lte=end)
+    return queryset.order_by('meal_date', 'created_at', 'id').values_list(*FIELDS)
+
+def stream(encoder, user_id, start=None, end=None):
+    """Encoded chunks, for WSGI responses and the export_meals command"""
+    yield encoder.header()
+    batch = []
+    meals = (archived_tuple(meal) for meal in iter_archived(user_id, start, end))
+    for source in (meals, hot_meals(user_id, start, end).iterator(chunk_size=settings.MEAL_EXPORT_CHUNK_SIZE)):
+        for meal in source:
+            batch.extend(flatten(meal))
+            if len(batch) >= BATCH_ROWS:
+                yield encoder.encode(batch)
+                batch = []
+    if batch:
+        yield encoder.encode(batch)
+
+async def astream(encoder, user_id, start=None, end=None):
+    """
+    Async twin of stream() for ASGI: Django would otherwise drain a sync
+    iterator into memory before sending the first byte.
+    """
+    yield encoder.header()
+    meals = itertools.chain(
+        (archived_tuple(meal) for meal in iter_archived(user_id, start, end)),
+        hot_meals(user_id, start, end).iterator(chunk_size=settings.MEAL_EXPORT_CHUNK_SIZE),
+    )
+    # The archive reads and the server-side cursor block, so each batch is
+    # pulled off the event loop; thread_sensitive keeps the cursor on one thread
+    next_batch = sync_to_async(lambda: [row for meal in itertools.islice(meals, BATCH_ROWS) for row in flatten(meal)])
+    while True:
+        batch = await next_batch()
+        if not batch:
+            break
+        yield encoder.encode(batch)
+
+def export_response(request, user_id, kind, start=None, end=None):
+    encoder = ENCODERS[kind]()
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = astream(encoder, user_id, start, end)
+    else:
+        content = stream(encoder, user_id, start, end)
+    response = StreamingHttpResponse(content, content_type=encoder.content_type)
+    response['Content-Disposition'] = f'attachment; filename="meals-{user_id}.{encoder.extension}"'
+    response['Cache-Control'] = 'private, no-store'
+    # Tell nginx to pass chunks through instead of buffering the whole export
+    response['X-Accel-Buffering'] = 'no'
+    return response
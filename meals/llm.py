@@ -0,0 +1,316 @@
+import abc
+import io
+import logging
+import os
+import threading
+import time
+import typing
+from openai import OpenAI
+from pydantic import BaseModel
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .schemas import CONFIDENCE_CODES
+from .resilience import CircuitBreaker, ResilientCaller, is_client_error, register
+from common.metrics import external_call, record_model_call
+
+logger = logging.getLogger(__name__)
+
+class ModelRoutingError(Exception):
+    pass
+
+class ModelBackend(abc.ABC):
+    """
+    A provider the router can call. `parse` returns (parsed model or None,
+    usage dict); `transcribe` returns the transcript text.
+    """
+
+    @abc.abstractmethod
+    def parse(self, model, input, text_format, prompt_cache_key=None):
+        ...
+
+    @abc.abstractmethod
+    def transcribe(self, model, file, language=None):
+        ...
+
+class OpenAIBackend(ModelBackend):
+    """
+    OpenAI provider. Every call goes through a per-model ResilientCaller, so
+    the SDK's own retries are disabled and timeouts are set per attempt. The
+    callers live as long as the backend (the process-wide router's), so their
+    breaker state is shared between requests.
+    """
+
+    def __init__(self):
+        self.client = OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=0,
+        )
+        self.callers = {}
+        self.callers_lock = threading.Lock()
+
+    def caller(self, model):
+        """The ResilientCaller for `model`, built from settings on its first call"""
+        caller = self.callers.get(model)
+        if caller is None:
+            with self.callers_lock:
+                caller = self.callers.get(model)
+                if caller is None:
+                    caller = self.callers[model] = register(ResilientCaller(
+                        model,
+                        timeout=settings.OPENAI_TIMEOUT,
+                        retries=settings.OPENAI_RETRIES,
+                        backoff_base=settings.OPENAI_BACKOFF_BASE,
+                        backoff_max=settings.OPENAI_BACKOFF_MAX,
+                        hedge_after=settings.OPENAI_HEDGE_AFTER,
+                        hedge_workers=settings.OPENAI_CALL_WORKERS,
+                        breaker=CircuitBreaker(
+                            failure_rate=settings.OPENAI_BREAKER_FAILURE_RATE,
+                            min_calls=settings.OPENAI_BREAKER_MIN_CALLS,
+                            window=settings.OPENAI_BREAKER_WINDOW,
+                            cooldown=settings.OPENAI_BREAKER_COOLDOWN,
+                        ),
+                    ))
+        return caller
+
+    def parse(self, model, input, text_format, prompt_cache_key=None):
+        kwargs = {'prompt_cache_key': prompt_cache_key} if prompt_cache_key else {}
+
+        def attempt(timeout):
+            with external_call('openai', 'responses'):
+                return self.client.with_options(timeout=timeout).responses.parse(
+                    model=model,
+                    input=input,
+                    text_format=text_format,
+                    **kwargs
+                )
+
+        response = self.caller(model).call(attempt)
+        return response.output_parsed, usage_dict(response.usage)
+
+    def transcribe(self, model, file, language=None):
+        kwargs = {'language': language} if language else {}
+        audio_data = file.read()
+        name = getattr(file, 'name', 'audio.wav')
+
+        def attempt(timeout):
+            # Fresh file object per attempt: retries and hedges must not share a read position
+            audio_file = io.BytesIO(audio_data)
+            audio_file.name = name
+            with external_call('openai', 'transcriptions'):
+                return self.client.with_options(timeout=timeout).audio.transcriptions.create(
+                    model=model,
+                    file=audio_file,
+                    **kwargs
+                )
+
+        return self.caller(model).call(attempt).text
+
+def usage_dict(usage):
+    if usage is None:
+        return {}
+    details = getattr(usage, 'input_tokens_details', None)
+    return {
+        'input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+        'cached_tokens': getattr(details, 'cached_tokens', 0) or 0,
+        'output_tokens': getattr(usage, 'output_tokens', 0) or 0,
+    }
+
+STUB_STRINGS = {
+    'name': 'Plov',
+    'n': 'Plov',
+    'portion_size': '1 plate (350g)',
+    'p': '1 plate (350g)',
+}
+
+def sample_value(annotation, field_name=None, confidence='high'):
+    """Build a schema-valid placeholder value for a pydantic field annotation"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        choices = typing.get_args(annotation)
+        for choice in (confidence, CONFIDENCE_CODES.get(confidence)):
+            if choice in choices:
+                return choice
+        return choices[0]
+    if origin in (list, typing.List):
+        (item,) = typing.get_args(annotation) or (str,)
+        return [sample_value(item, confidence=confidence)]
+    if origin is typing.Union:
+        return sample_value(typing.get_args(annotation)[0], field_name, confidence)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {
+            name: sample_value(field.annotation, name, confidence)
+            for name, field in annotation.model_fields.items()
+        }
+    if annotation is bool:
+        return True
+    if annotation in (int, float):
+        return 10
+    if field_name == 'confidence':
+        return confidence
+    return STUB_STRINGS.get(field_name, '10 mg')
+
+class StubBackend(ModelBackend):
+    """
+    Local backend for tests and benchmarks: returns a schema-valid payload
+    for any text_format after an optional fixed delay, without network calls.
+    """
+
+    def __init__(self, latency=0.0, confidence='high', transcript='two eggs and green tea'):
+        self.latency = latency
+        self.confidence = confidence
+        self.transcript = transcript
+
+    def parse(self, model, input, text_format, prompt_cache_key=None):
+        if self.latency:
+            time.sleep(self.latency)
+        payload = sample_value(text_format, confidence=self.confidence)
+        return text_format.model_validate(payload), {'input_tokens': 0, 'output_tokens': 0}
+
+    def transcribe(self, model, file, language=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.transcript
+
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.escalations = 0
+        self.latency = 0.0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'escalations': self.escalations,
+            'avg_latency_ms': round(self.latency * 1000 / self.calls, 1) if self.calls else 0.0,
+            'input_tokens': self.input_tokens,
+            'cached_tokens': self.cached_tokens,
+            'cache_hit_rate': round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            'output_tokens': self.output_tokens,
+            'cost_usd': round(self.cost, 6),
+        }
+
+class ModelRouter:
+    """
+    Sends structured-output requests through model tiers, cheapest first.
+    A result whose confidence is in `escalate_on` or a transient failure moves
+    the request to the next tier; the last usable result is returned. Client
+    errors (bad request, auth, oversized input) are raised at once, since every
+    tier would refuse the same input.
+    """
+
+    def __init__(self, backend, tiers, language_tiers=None, escalate_on=('low',), prices=None):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.backend = backend
+        self.tiers = list(tiers)
+        self.language_tiers = language_tiers or {}
+        self.escalate_on = set(escalate_on)
+        self.prices = prices or {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def tiers_for(self, language):
+        return self.language_tiers.get(language) or self.tiers
+
+    def record(self, model, latency, usage=None, failed=False, escalated=False):
+        usage = usage or {}
+        input_price, cached_price, output_price = self.prices.get(model, (0.0, 0.0, 0.0))
+        cached = usage.get('cached_tokens', 0)
+        cost = (
+            (usage.get('input_tokens', 0) - cached) * input_price
+            + cached * cached_price
+            + usage.get('output_tokens', 0) * output_price
+        ) / 1_000_000
+        record_model_call(model, usage, cost, failed=failed, escalated=escalated)
+        with self.lock:
+            stats = self.stats.setdefault(model, TierStats())
+            stats.calls += 1
+            stats.failures += int(failed)
+            stats.escalations += int(escalated)
+            stats.latency += latency
+            stats.input_tokens += usage.get('input_tokens', 0)
+            stats.cached_tokens += cached
+            stats.output_tokens += usage.get('output_tokens', 0)
+            stats.cost += cost
+
+    def snapshot(self):
+        with self.lock:
+            return {model: stats.as_dict() for model, stats in self.stats.items()}
+
+    def parse(self, input, text_format, language='en', prompt_cache_key=None):
+        tiers = self.tiers_for(language)
+        fallback, last_error = None, None
+
+        for position, model in enumerate(tiers):
+            is_last = position == len(tiers) - 1
+            start = time.perf_counter()
+            try:
+                parsed, usage = self.backend.parse(model, input, text_format, prompt_cache_key)
+            except Exception as e:
+                self.record(model, time.perf_counter() - start, failed=True)
+                logger.warning("Model %s failed: %s", model, e)
+                if is_client_error(e):
+                    raise
+                last_error = e
+                continue
+
+            latency = time.perf_counter() - start
+            if parsed is None:
+                self.record(model, latency, usage, failed=True)
+                continue
+
+            escalate = not is_last and getattr(parsed, 'confidence', None) in self.escalate_on
+            self.record(model, latency, usage, escalated=escalate)
+            if not escalate:
+                return parsed
+            fallback = parsed
+
+        if fallback is not None:
+            return fallback
+        if last_error is not None:
+            raise last_error
+        raise ModelRoutingError("No model tier returned a parsable response")
+
+    def transcribe(self, file, language=None):
+        model = settings.TRANSCRIPTION_MODEL
+        start = time.perf_counter()
+        try:
+            text = self.backend.transcribe(model, file, language)
+        except Exception:
+            self.record(model, time.perf_counter() - start, failed=True)
+            raise
+        self.record(model, time.perf_counter() - start)
+        return text
+
+_router = None
+_router_lock = threading.Lock()
+
+def build_router():
+    backend = import_string(settings.MODEL_ROUTER_BACKEND)()
+    return ModelRouter(
+        backend,
+        tiers=settings.MODEL_TIERS,
+        language_tiers=settings.MODEL_LANGUAGE_TIERS,
+        escalate_on=settings.MODEL_ESCALATE_CONFIDENCE,
+        prices=settings.MODEL_PRICES,
+    )
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = build_router()
+    return _router
+
+def set_router(router):
+    """Swap the process-wide router, e.g. for a StubBackend in tests or benchmarks"""
+    global _router
+    _router = router
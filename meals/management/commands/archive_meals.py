@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models.functions import TruncMonth
+from meals.archive import archive_cutoff, archive_month
+from meals.models import Meal
+
+class Command(BaseCommand):
+    help = (
+        'Move whole months of meals older than MEAL_ARCHIVE_AFTER_DAYS out of the meals table '
+        'into compressed per-user, per-month archive blobs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-days', type=int, default=settings.MEAL_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--user', type=int, action='append', help='Only these user ids (repeatable)')
+        parser.add_argument('--limit', type=int, help='Stop after this many user-months')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['after_days'])
+        candidates = Meal.objects.filter(meal_date__lt=cutoff)
+        if options['user']:
+            candidates = candidates.filter(user_id__in=options['user'])
+        user_months = (
+            candidates.annotate(month=TruncMonth('meal_date'))
+            .values_list('user_id', 'month')
+            .distinct()
+            .order_by('month', 'user_id')
+        )
+        if options['limit']:
+            user_months = user_months[:options['limit']]
+
+        self.stdout.write(f"Archiving months before {cutoff:%Y-%m}")
+        archived = meals = raw_bytes = stored_bytes = 0
+        for user_id, month in user_months:
+            if options['dry_run']:
+                self.stdout.write(f"Would archive user {user_id} {month:%Y-%m}")
+                continue
+            archive = archive_month(user_id, month)
+            if archive is None:
+                continue
+            archived += 1
+            meals += archive.meal_count
+            raw_bytes += archive.raw_bytes
+            stored_bytes += archive.stored_bytes
+
+        if not options['dry_run']:
+            ratio = raw_bytes / stored_bytes if stored_bytes else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {archived} user-months, {meals} meals in archives: "
+                f"{raw_bytes / 1024:.0f} KiB JSON -> {stored_bytes / 1024:.0f} KiB stored ({ratio:.1f}x)"
+            ))
@@ -0,0 +1,140 @@
+import json
+import re
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from meals.llm import get_router
+from meals.prompts import UNITS_COMPACT, UNITS_VERBOSE_TEXT
+from meals.schemas import MealAnalysis, compact_schema, compact_from_analysis
+
+# Rough stand-in for a BPE tokenizer: letter runs, up to 3 digits, each symbol
+TOKEN_RE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+def estimate_tokens(text):
+    return len(TOKEN_RE.findall(text))
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class Command(BaseCommand):
+    help = (
+        'Compare generation latency and output tokens of the verbose MealAnalysis schema '
+        'against the compact wire schema, using recorded model responses'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('recordings', help='JSONL file of recorded responses')
+        parser.add_argument('--record', type=int, default=0,
+                            help='Record N new responses per schema through the model router first')
+        parser.add_argument('--text', default='plov with non and green tea',
+                            help='Meal description used when recording')
+        parser.add_argument('--language', default='en')
+        parser.add_argument('--groups', default='',
+                            help='Comma-separated nutrient groups for the compact schema')
+        parser.add_argument('--output', help='Write the report as JSON to this path')
+
+    def handle(self, *args, **options):
+        groups = [group for group in options['groups'].split(',') if group] or None
+
+        if options['record']:
+            self.record(options, groups)
+
+        try:
+            with open(options['recordings'], encoding='utf-8') as f:
+                recordings = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f"Recordings file not found: {options['recordings']}")
+
+        report = {
+            'schemas': {
+                schema: self.summarize([r for r in recordings if r.get('schema') == schema])
+                for schema in ('verbose', 'compact')
+            },
+            'translation': self.translation_size(recordings, groups),
+        }
+
+        for schema, summary in report['schemas'].items():
+            self.stdout.write(
+                f"{schema:8} n={summary['count']:<4} "
+                f"latency p50={summary['latency_p50_ms']:.0f}ms p95={summary['latency_p95_ms']:.0f}ms  "
+                f"output tokens mean={summary['output_tokens_mean']:.0f}  "
+                f"ms/token={summary['ms_per_output_token']:.2f}"
+            )
+        translation = report['translation']
+        if translation['count']:
+            self.stdout.write(
+                f"verbose recordings re-encoded compact: {translation['verbose_tokens_mean']:.0f} -> "
+                f"{translation['compact_tokens_mean']:.0f} estimated tokens "
+                f"({translation['ratio']:.0%})"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    def summarize(self, recordings):
+        latencies = [r['latency_ms'] for r in recordings if 'latency_ms' in r]
+        tokens = [
+            r.get('usage', {}).get('output_tokens') or estimate_tokens(r.get('output_text', ''))
+            for r in recordings
+        ]
+        total_tokens = sum(tokens)
+        return {
+            'count': len(recordings),
+            'latency_p50_ms': percentile(latencies, 0.5),
+            'latency_p95_ms': percentile(latencies, 0.95),
+            'output_tokens_mean': statistics.fmean(tokens) if tokens else 0.0,
+            'ms_per_output_token': sum(latencies) / total_tokens if total_tokens else 0.0,
+        }
+
+    def translation_size(self, recordings, groups):
+        """Same analyses, serialized both ways, to isolate the schema from model variance"""
+        verbose_tokens, compact_tokens = [], []
+        for recording in recordings:
+            if recording.get('schema') != 'verbose':
+                continue
+            analysis = json.loads(recording['output_text'])
+            compact = compact_from_analysis(analysis, groups)
+            verbose_tokens.append(estimate_tokens(recording['output_text']))
+            compact_tokens.append(estimate_tokens(json.dumps(compact, ensure_ascii=False)))
+
+        verbose_mean = statistics.fmean(verbose_tokens) if verbose_tokens else 0.0
+        compact_mean = statistics.fmean(compact_tokens) if compact_tokens else 0.0
+        return {
+            'count': len(verbose_tokens),
+            'verbose_tokens_mean': verbose_mean,
+            'compact_tokens_mean': compact_mean,
+            'ratio': compact_mean / verbose_mean if verbose_mean else 0.0,
+        }
+
+    def record(self, options, groups):
+        router = get_router()
+        formats = {
+            'verbose': (MealAnalysis, UNITS_VERBOSE_TEXT),
+            'compact': (compact_schema(groups), UNITS_COMPACT),
+        }
+
+        with open(options['recordings'], 'a', encoding='utf-8') as f:
+            for _ in range(options['record']):
+                for schema, (text_format, units) in formats.items():
+                    prompt = [
+                        {"role": "system", "content": "You are a professional nutritionist. Estimate nutritional content."},
+                        {"role": "user", "content": f"{units}\nMeal: {options['text']}"},
+                    ]
+                    model = router.tiers_for(options['language'])[0]
+                    start = time.perf_counter()
+                    parsed, usage = router.backend.parse(model, prompt, text_format)
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    if parsed is None:
+                        continue
+                    f.write(json.dumps({
+                        'schema': schema,
+                        'model': model,
+                        'latency_ms': latency_ms,
+                        'usage': usage,
+                        'output_text': parsed.model_dump_json(),
+                    }, ensure_ascii=False) + '\n')
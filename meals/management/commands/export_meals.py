@@ -0,0 +1,35 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+from meals.export import ENCODERS, stream
+from meals.serializers import MealExportSerializer
+
+class Command(BaseCommand):
+    help = "Stream one user's meal history (archived and hot) as per-food CSV, NDJSON or columnar batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int)
+        parser.add_argument('--type', default='csv', choices=sorted(ENCODERS))
+        parser.add_argument('--from', dest='date_from', help='YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', help='YYYY-MM-DD')
+        parser.add_argument('--output', help='File path (default stdout)')
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(id=options['user_id']).exists():
+            raise CommandError(f"User {options['user_id']} not found")
+        serializer = MealExportSerializer(data={
+            key: options[key] for key in ('type', 'date_from', 'date_to') if options[key]
+        })
+        if not serializer.is_valid():
+            raise CommandError(str(serializer.errors))
+        params = serializer.validated_data
+
+        encoder = ENCODERS[params['type']]()
+        chunks = stream(encoder, options['user_id'], params.get('date_from'), params.get('date_to'))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from meals.models import Meal
+from meals.partitions import (
+    DEFAULT_PARTITION, LEGACY_PARTITION, add_months, create_partition, detach_partition, is_partitioned,
+    list_partitions, month_start, partition_is_empty, partition_name, scanned_partitions,
+)
+
+class Command(BaseCommand):
+    help = (
+        'Pre-create monthly meals partitions, detach (or drop) empty ones past the retention horizon, '
+        'and with --check verify that the date-filtered queries from meals/views.py prune partitions. '
+        'Partitions that still hold meals are kept: run archive_meals first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.MEAL_PARTITION_MONTHS_AHEAD,
+                            help='Months after the current one that must have a partition')
+        parser.add_argument('--retain', type=int, default=settings.MEAL_PARTITION_RETENTION_MONTHS,
+                            help='Months of partitions to keep attached; 0 keeps everything')
+        parser.add_argument('--drop', action='store_true', help='Drop expired partitions instead of detaching them')
+        parser.add_argument('--include-legacy', action='store_true',
+                            help=f'Also expire {LEGACY_PARTITION} (the pre-partitioning history) once it is empty')
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--check', action='store_true', help='Only report partition pruning')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('The meals table is not partitioned; run migrate first')
+
+        if options['check']:
+            return self.check_pruning()
+
+        today = timezone.localdate()
+        current = month_start(today)
+        partitions = list_partitions()
+
+        def covered(month):
+            return any((start is None or start <= month) and (end is None or month < end) for _, start, end in partitions)
+
+        for offset in range(options['ahead'] + 1):
+            month = add_months(current, offset)
+            if covered(month):
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"Would create {partition_name(month)}")
+                continue
+            name, moved = create_partition(month)
+            partitions.append((name, month, add_months(month, 1)))
+            suffix = f" ({moved} rows moved from {DEFAULT_PARTITION})" if moved else ''
+            self.stdout.write(self.style.SUCCESS(f"Created {name}{suffix}"))
+
+        if options['retain'] > 0:
+            horizon = add_months(current, -options['retain'])
+            for name, _, end in partitions:
+                if end is None or end > horizon:
+                    continue
+                if name == LEGACY_PARTITION and not options['include_legacy']:
+                    continue
+                # Detached rows vanish from every read path, archive and export included
+                if not partition_is_empty(name):
+                    self.stdout.write(self.style.WARNING(f"Kept {name}: it still has meals, run archive_meals first"))
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(f"Would {'drop' if options['drop'] else 'detach'} {name}")
+                    continue
+                detached = detach_partition(name, drop=options['drop'])
+                self.stdout.write(self.style.WARNING(
+                    f"Dropped {name}" if detached is None else f"Detached {name} as {detached}"
+                ))
+
+    def check_pruning(self):
+        total = len(list_partitions()) + 1
+        today = timezone.localdate()
+        user_id = Meal.objects.values_list('user_id', flat=True).first() or 0
+
+        # (label, queryset, most partitions the plan may touch; None = informational)
+        cases = [
+            ('daily_summary', Meal.objects.filter(user_id=user_id, meal_date=today), 1),
+            ('last_7_days', Meal.objects.filter(user_id=user_id, meal_date__range=(today - timedelta(days=6), today)), 2),
+            ('this_month', Meal.objects.filter(user_id=user_id, meal_date__gte=month_start(today)), None),
+            ('meals_list', Meal.objects.filter(user_id=user_id)[:20], None),
+            ('meal_detail', Meal.objects.filter(pk=0, user_id=user_id), None),
+        ]
+
+        failures = []
+        for label, queryset, limit in cases:
+            scanned = scanned_partitions(queryset)
+            verdict = 'info'
+            if limit is not None:
+                verdict = 'ok' if len(scanned) <= limit else 'NOT PRUNED'
+                if len(scanned) > limit:
+                    failures.append(label)
+            self.stdout.write(f"{label:15} {len(scanned):>3}/{total} partitions  {verdict:10} {', '.join(sorted(scanned))}")
+
+        if failures:
+            raise CommandError(f"No partition pruning for: {', '.join(failures)}")
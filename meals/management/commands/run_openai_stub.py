@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from meals.stub_server import make_server
+
+class Command(BaseCommand):
+    help = (
+        'Run a local OpenAI-compatible stub for the Responses and audio transcription '
+        'endpoints. Start the app with OPENAI_BASE_URL=http://HOST:PORT/v1 to use it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', default='fixed:0',
+                            help="Time to first token: fixed:S, uniform:A,B, normal:MEAN,STD or lognormal:MU,SIGMA")
+        parser.add_argument('--transcription-latency', default='fixed:0',
+                            help='Transcription latency, same format as --latency')
+        parser.add_argument('--token-latency-ms', type=float, default=0.0,
+                            help='Extra generation time per output token')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of requests answered with HTTP 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                            help='Fraction of requests answered with HTTP 429')
+        parser.add_argument('--low-confidence-rate', type=float, default=0.0,
+                            help='Fraction of analyses returned with low confidence, to exercise tier escalation')
+        parser.add_argument('--not-food-rate', type=float, default=0.0,
+                            help='Fraction of analyses returned with is_food false')
+        parser.add_argument('--stream-chunk-tokens', type=int, default=8,
+                            help='Approximate tokens per delta event when stream=true')
+        parser.add_argument('--verbose-requests', action='store_true', help='Log every request')
+
+    def handle(self, *args, **options):
+        try:
+            server = make_server(
+                host=options['host'],
+                port=options['port'],
+                verbose=options['verbose_requests'],
+                latency=options['latency'],
+                transcription_latency=options['transcription_latency'],
+                token_latency_ms=options['token_latency_ms'],
+                error_rate=options['error_rate'],
+                rate_limit_rate=options['rate_limit_rate'],
+                low_confidence_rate=options['low_confidence_rate'],
+                not_food_rate=options['not_food_rate'],
+                stream_chunk_tokens=options['stream_chunk_tokens'],
+            )
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"OpenAI stub listening on http://{host}:{port}/v1"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Requests served: {server.counts}")
@@ -0,0 +1,77 @@
+import re
+from collections import Counter, defaultdict
+from django.core.management.base import BaseCommand
+from meals.models import Meal, FoodItem
+from meals.normalization import normalize_text
+from meals.nutrients import food_vector
+
+GRAMS_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(g|gr|gram|grams|г|гр|грамм|ml|мл)\b', re.IGNORECASE)
+
+def portion_grams(portion_size):
+    match = GRAMS_RE.search(portion_size or '')
+    if not match:
+        return None
+    grams = float(match.group(1).replace(',', '.'))
+    return grams if grams > 0 else None
+
+class Command(BaseCommand):
+    help = 'Seed the food catalog with per-100 g averages from historical Meal.foods_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-samples', type=int, default=3,
+                            help='Minimum number of historical portions before a food is added')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        sums = defaultdict(lambda: defaultdict(float))
+        counts = Counter()
+        portions = defaultdict(float)
+        spellings = defaultdict(Counter)
+
+        meals = Meal.objects.only('id', 'foods_data').iterator(chunk_size=options['chunk_size'])
+        for meal in meals:
+            foods = (meal.foods_data or {}).get('foods') if isinstance(meal.foods_data, dict) else None
+            for food in foods or []:
+                if not isinstance(food, dict) or not food.get('name'):
+                    continue
+                grams = portion_grams(food.get('portion_size'))
+                if not grams:
+                    continue
+
+                key = normalize_text(food['name'])
+                for nutrient, value in food_vector(food).items():
+                    sums[key][nutrient] += value * 100.0 / grams
+                counts[key] += 1
+                portions[key] += grams
+                spellings[key][food['name'].strip()] += 1
+
+        created = updated = 0
+        for key, count in counts.items():
+            if count < options['min_samples']:
+                continue
+
+            name = spellings[key].most_common(1)[0][0]
+            values = {
+                'nutrients': {nutrient: round(total / count, 3) for nutrient, total in sums[key].items()},
+                'default_portion_g': round(portions[key] / count, 1),
+                'sample_count': count,
+            }
+            if options['dry_run']:
+                self.stdout.write(f"{name}: {count} samples, {values['default_portion_g']} g")
+                continue
+
+            item = FoodItem.objects.filter(name__iexact=name).first()
+            if item is None:
+                FoodItem.objects.create(name=name, **values)
+                created += 1
+            elif not item.is_verified:
+                # Curated entries are never overwritten by re-seeding
+                for field, value in values.items():
+                    setattr(item, field, value)
+                item.save()
+                updated += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Food catalog seeded: {created} created, {updated} updated from {sum(counts.values())} portions"
+        ))
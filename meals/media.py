@@ -0,0 +1,21 @@
+from urllib.parse import urlparse
+
+# Uploads live under meals/<user_id>/<Y>/<m>/<d>/<file> (audio under
+# meals/audio/<user_id>/...); older uploads lack the user segment.
+
+def media_owner_id(name):
+    """Return the uploader id encoded in a media path below meals/, if the path has one"""
+    parts = name.split('/')
+    if parts and parts[0] == 'audio':
+        parts = parts[1:]
+    if len(parts) == 5 and parts[0].isdigit():
+        return int(parts[0])
+    return None
+
+def url_owner_id(url):
+    """Return the uploader id of a meal media URL or storage path, if it has one"""
+    path = urlparse(str(url)).path
+    start = path.rfind('meals/')
+    if start == -1:
+        return None
+    return media_owner_id(path[start + len('meals/'):])
@@ -0,0 +1,34 @@
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('name_uz', models.CharField(blank=True, max_length=200)),
+                ('name_uz_cyrl', models.CharField(blank=True, max_length=200)),
+                ('name_ru', models.CharField(blank=True, max_length=200)),
+                ('aliases', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=200), blank=True, default=list, size=None)),
+                ('nutrients', models.JSONField(default=dict)),
+                ('default_portion_g', models.FloatField(default=100)),
+                ('unit_weight_g', models.FloatField(blank=True, help_text='Weight of one piece (egg, bread, etc.)', null=True)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'food_items',
+                'ordering': ['name'],
+            },
+        ),
+    ]
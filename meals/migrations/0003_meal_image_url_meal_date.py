@@ -0,0 +1,54 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+# Brings the migration history up to the Meal model: `image` became
+# `image_url` and `meal_date` was added without a migration, so 0004 (which
+# partitions on meal_date) failed on any database built from migrations.
+# The SQL is guarded, because databases created from the models already
+# have both columns. Existing meals get the date they were created.
+SYNC_COLUMNS = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'meals' AND column_name = 'image')
+       AND NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'meals' AND column_name = 'image_url') THEN
+        ALTER TABLE meals RENAME COLUMN image TO image_url;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'meals' AND column_name = 'meal_date') THEN
+        ALTER TABLE meals ADD COLUMN meal_date date;
+        UPDATE meals SET meal_date = created_at::date;
+        ALTER TABLE meals ALTER COLUMN meal_date SET NOT NULL;
+    END IF;
+END $$;
+"""
+
+UNSYNC_COLUMNS = """
+ALTER TABLE meals DROP COLUMN meal_date;
+ALTER TABLE meals RENAME COLUMN image_url TO image;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0003_fooditem'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(SYNC_COLUMNS, reverse_sql=UNSYNC_COLUMNS),
+            ],
+            state_operations=[
+                migrations.RenameField(model_name='meal', old_name='image', new_name='image_url'),
+                migrations.AddField(
+                    model_name='meal',
+                    name='meal_date',
+                    field=models.DateField(default=django.utils.timezone.now),
+                ),
+                migrations.AlterModelOptions(
+                    name='meal',
+                    options={'ordering': ['-meal_date', '-created_at']},
+                ),
+            ],
+        ),
+    ]
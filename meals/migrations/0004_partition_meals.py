@@ -0,0 +1,120 @@
+from django.db import migrations
+
+# Converts `meals` into a table range-partitioned by month on meal_date.
+#
+# The existing table is not copied: it is attached as the first partition
+# (meals_legacy, MINVALUE up to a cutoff past every existing meal_date) and
+# new months get their own partitions. The slow steps run first, without an
+# exclusive lock: the indexes the partitioned parent needs are built
+# CONCURRENTLY, and the cutoff CHECK is validated while writes continue, so
+# ATTACH can skip its scan. Only the final rename/attach block holds an
+# ACCESS EXCLUSIVE lock, and it does no per-row work.
+#
+# PostgreSQL requires the partition key in every unique constraint, so the
+# primary key becomes (id, meal_date); ids still come from one identity
+# sequence and stay unique. Later months are maintained by
+# `manage.py manage_meal_partitions`.
+
+PREPARE_INDEXES = [
+    'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS meals_legacy_id_date_uniq ON meals (id, meal_date)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS meals_legacy_user_date_idx ON meals (user_id, meal_date DESC, created_at DESC)',
+]
+
+ADD_CUTOFF_CHECK = """
+DO $$
+DECLARE
+    cutoff date;
+BEGIN
+    SELECT GREATEST(
+        date_trunc('month', current_date) + interval '2 months',
+        date_trunc('month', max(meal_date)) + interval '1 month'
+    )::date INTO cutoff FROM meals;
+    EXECUTE format(
+        'ALTER TABLE meals ADD CONSTRAINT meals_legacy_range CHECK (meal_date IS NOT NULL AND meal_date < %L) NOT VALID',
+        cutoff
+    );
+END $$;
+"""
+
+VALIDATE_CUTOFF_CHECK = 'ALTER TABLE meals VALIDATE CONSTRAINT meals_legacy_range'
+
+SWAP = """
+DO $$
+DECLARE
+    cutoff date;
+    next_id bigint;
+    month date;
+    old_pkey text;
+BEGIN
+    LOCK TABLE meals IN ACCESS EXCLUSIVE MODE;
+    SELECT substring(pg_get_constraintdef(oid) from '''([0-9-]+)''')::date INTO cutoff
+    FROM pg_constraint WHERE conrelid = 'meals'::regclass AND conname = 'meals_legacy_range';
+    SELECT COALESCE(max(id), 0) + 1 INTO next_id FROM meals;
+    SELECT conname INTO old_pkey FROM pg_constraint WHERE conrelid = 'meals'::regclass AND contype = 'p';
+
+    -- The prebuilt (id, meal_date) index becomes the primary key, as the parent's requires
+    EXECUTE format('ALTER TABLE meals DROP CONSTRAINT %I', old_pkey);
+    ALTER TABLE meals ADD CONSTRAINT meals_legacy_pkey PRIMARY KEY USING INDEX meals_legacy_id_date_uniq;
+
+    -- The parent owns id generation from here on
+    ALTER TABLE meals ALTER COLUMN id DROP IDENTITY IF EXISTS;
+    ALTER TABLE meals ALTER COLUMN id DROP DEFAULT;
+    ALTER TABLE meals RENAME TO meals_legacy;
+
+    CREATE TABLE meals (LIKE meals_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (meal_date);
+    EXECUTE format('ALTER TABLE meals ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH %s)', next_id);
+    EXECUTE format('ALTER TABLE meals ATTACH PARTITION meals_legacy FOR VALUES FROM (MINVALUE) TO (%L)', cutoff);
+    ALTER TABLE meals_legacy DROP CONSTRAINT meals_legacy_range;
+
+    -- Matching indexes on meals_legacy are attached rather than rebuilt
+    ALTER TABLE meals ADD CONSTRAINT meals_partitioned_pkey PRIMARY KEY (id, meal_date);
+    CREATE INDEX meals_user_date_idx ON meals (user_id, meal_date DESC, created_at DESC);
+    ALTER TABLE meals ADD CONSTRAINT meals_user_id_fk_users_id
+        FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED;
+
+    CREATE TABLE meals_default PARTITION OF meals DEFAULT;
+    FOR i IN 0..2 LOOP
+        month := (cutoff + make_interval(months => i))::date;
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF meals FOR VALUES FROM (%L) TO (%L)',
+            'meals_p' || to_char(month, 'YYYYMM'), month, (month + interval '1 month')::date
+        );
+    END LOOP;
+END $$;
+"""
+
+UNPARTITION = """
+DO $$
+DECLARE
+    next_id bigint;
+BEGIN
+    LOCK TABLE meals IN ACCESS EXCLUSIVE MODE;
+    SELECT COALESCE(max(id), 0) + 1 INTO next_id FROM meals;
+    CREATE TABLE meals_unpartitioned (LIKE meals INCLUDING DEFAULTS);
+    INSERT INTO meals_unpartitioned SELECT * FROM meals;
+    DROP TABLE meals CASCADE;
+    ALTER TABLE meals_unpartitioned RENAME TO meals;
+    ALTER TABLE meals ADD PRIMARY KEY (id);
+    EXECUTE format('ALTER TABLE meals ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH %s)', next_id);
+    CREATE INDEX meals_user_date_idx ON meals (user_id, meal_date DESC, created_at DESC);
+    ALTER TABLE meals ADD CONSTRAINT meals_user_id_fk_users_id
+        FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED;
+END $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY and VALIDATE CONSTRAINT must run outside a transaction
+    atomic = False
+
+    dependencies = [
+        ('meals', '0003_meal_image_url_meal_date'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PREPARE_INDEXES, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(ADD_CUTOFF_CHECK, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(VALIDATE_CUTOFF_CHECK, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(SWAP, reverse_sql=UNPARTITION),
+    ]
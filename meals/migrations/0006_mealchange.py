@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Seeds the log with one upsert per meal already in `meals`, so a client
+# syncing from cursor 0 receives its full hot history. Archived months are
+# not in the log; they stay reachable through GET /meals.
+BACKFILL = """
+INSERT INTO meal_changes (user_id, meal_id, op, created_at)
+SELECT user_id, id, 'upsert', now() FROM meals ORDER BY id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0005_mealarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meal_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'meal_changes',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='meal_change_user_cursor_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL, reverse_sql=migrations.RunSQL.noop),
+    ]
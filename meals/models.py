@@ -1,6 +1,7 @@
 from django.db import models
 from users.models import User
 from django.utils import timezone
+from django.contrib.postgres.fields import ArrayField
 
 class Meal(models.Model):
     MEAL_TIME_CHOICES = [
@@ -19,8 +20,96 @@ class Meal(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
+        # Range-partitioned by month on meal_date (migration 0004, meals.partitions)
         db_table = 'meals'
         ordering = ['-meal_date', '-created_at']
     
     def __str__(self):
         return f"{self.user} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+class MealArchive(models.Model):
+    """One user's meals for one month, moved out of `meals` into a compressed blob (meals.archive)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meal_archives')
+    month = models.DateField(help_text='First day of the archived month')
+    path = models.CharField(max_length=255)
+    meal_count = models.PositiveIntegerField(default=0)
+    raw_bytes = models.PositiveBigIntegerField(default=0)
+    stored_bytes = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'meal_archives'
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='meal_archive_user_month_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} - {self.month:%Y-%m}"
+
+class MealChange(models.Model):
+    """Append-only log of meal writes; its id is the /meals/sync cursor (meals.sync)"""
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OP_CHOICES = [
+        (UPSERT, 'Created or updated'),
+        (DELETE, 'Deleted'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='meal_changes')
+    # Not a foreign key: tombstones outlive their meal
+    meal_id = models.BigIntegerField()
+    op = models.CharField(max_length=10, choices=OP_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'meal_changes'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['user', 'id'], name='meal_change_user_cursor_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} - {self.op} {self.meal_id}"
+
+class FoodItem(models.Model):
+    name = models.CharField(max_length=200)
+    name_uz = models.CharField(max_length=200, blank=True)
+    name_uz_cyrl = models.CharField(max_length=200, blank=True)
+    name_ru = models.CharField(max_length=200, blank=True)
+    aliases = ArrayField(models.CharField(max_length=200), blank=True, default=list)
+    # Nutrients per 100 g in the canonical units from meals.nutrients
+    nutrients = models.JSONField(default=dict)
+    default_portion_g = models.FloatField(default=100)
+    unit_weight_g = models.FloatField(null=True, blank=True, help_text='Weight of one piece (egg, bread, etc.)')
+    sample_count = models.PositiveIntegerField(default=0)
+    is_verified = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'food_items'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def display_name(self, language):
+        localized = {
+            'uz': self.name_uz,
+            'uz-cyrl': self.name_uz_cyrl,
+            'ru': self.name_ru,
+        }.get(language)
+        return localized or self.name
+    
+    def all_names(self):
+        """(name, language) pairs used to build the lookup index"""
+        names = [
+            (self.name, 'en'),
+            (self.name_uz, 'uz'),
+            (self.name_uz_cyrl, 'uz-cyrl'),
+            (self.name_ru, 'ru'),
+        ]
+        names += [(alias, 'uz') for alias in self.aliases]
+        return [(name, language) for name, language in names if name]
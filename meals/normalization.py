@@ -0,0 +1,98 @@
+import re
+import unicodedata
+
+# Uzbek Cyrillic -> Latin (2023 official alphabet, apostrophes as ')
+UZ_CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'j', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': "'",
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': "o'", 'қ': 'q',
+    'ғ': "g'", 'ҳ': 'h',
+}
+
+# The many apostrophe variants used for o' and g'
+APOSTROPHES = str.maketrans({c: "'" for c in "‘’ʻʼ`´"})
+
+NUMBER_WORDS = {
+    'en': {
+        'half': 0.5, 'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4,
+        'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+        'eleven': 11, 'twelve': 12, 'fifteen': 15, 'twenty': 20, 'thirty': 30,
+        'forty': 40, 'fifty': 50, 'hundred': 100, 'couple': 2, 'dozen': 12,
+    },
+    'ru': {
+        'пол': 0.5, 'половина': 0.5, 'один': 1, 'одна': 1, 'одно': 1, 'одну': 1,
+        'два': 2, 'две': 2, 'три': 3, 'четыре': 4, 'пять': 5, 'шесть': 6,
+        'семь': 7, 'восемь': 8, 'девять': 9, 'десять': 10, 'двадцать': 20,
+        'тридцать': 30, 'сорок': 40, 'пятьдесят': 50, 'сто': 100,
+    },
+    'uz': {
+        'yarim': 0.5, 'bir': 1, 'ikki': 2, 'uch': 3, "to'rt": 4, 'besh': 5,
+        'olti': 6, 'yetti': 7, 'sakkiz': 8, "to'qqiz": 9, "o'n": 10,
+        'yigirma': 20, "o'ttiz": 30, 'qirq': 40, 'ellik': 50, 'yuz': 100,
+    },
+}
+NUMBER_WORDS['uz-cyrl'] = NUMBER_WORDS['uz']
+
+# Uzbek counting suffixes: "ikkita tuxum" -> "2 tuxum"
+UZ_COUNT_SUFFIXES = ('ta', 'dona')
+
+TOKEN_RE = re.compile(r"[\w']+")
+
+def transliterate_uz(text):
+    """Transliterate Uzbek Cyrillic to Latin, leaving other characters untouched"""
+    return ''.join(UZ_CYRILLIC_TO_LATIN.get(char, char) for char in text)
+
+def _number_for(token, words):
+    if token in words:
+        return words[token]
+    for suffix in UZ_COUNT_SUFFIXES:
+        stem = token[:-len(suffix)]
+        if token.endswith(suffix) and stem in words:
+            return words[stem]
+    return None
+
+def _format_number(value):
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+def normalize_numbers(tokens, language):
+    """Replace number words with digits, joining tens and units (twenty five -> 25)"""
+    words = NUMBER_WORDS.get(language, NUMBER_WORDS['en'])
+    result = []
+    pending = None
+
+    for token in tokens:
+        value = _number_for(token, words)
+        if value is None:
+            if pending is not None:
+                result.append(_format_number(pending))
+                pending = None
+            result.append(token)
+            continue
+
+        if pending is not None and pending >= 10 and pending % 10 == 0 and value < 10:
+            pending += value
+        elif pending is not None and pending < 10 and value == 100:
+            pending *= value
+        else:
+            if pending is not None:
+                result.append(_format_number(pending))
+            pending = value
+
+    if pending is not None:
+        result.append(_format_number(pending))
+    return result
+
+def normalize_text(text, language='en'):
+    """
+    Canonical form of a meal description used for cache keys and catalog lookups:
+    case-folded, Uzbek transliterated to Latin, number words replaced with digits.
+    """
+    text = unicodedata.normalize('NFC', text or '').casefold().translate(APOSTROPHES)
+    if language in ('uz', 'uz-cyrl'):
+        text = transliterate_uz(text)
+
+    tokens = [token.strip("'") for token in TOKEN_RE.findall(text)]
+    tokens = [token for token in tokens if token]
+    return ' '.join(normalize_numbers(tokens, language))
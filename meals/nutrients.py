@@ -0,0 +1,79 @@
+import re
+
+# (key, group in MealAnalysis.foods[], canonical unit)
+NUTRIENTS = [
+    ('calories', 'nutritions', 'kcal'),
+    ('carbs', 'nutritions', 'g'),
+    ('fat', 'nutritions', 'g'),
+    ('protein', 'nutritions', 'g'),
+    ('fiber', 'nutritions', 'g'),
+    ('calcium', 'minerals', 'mg'),
+    ('iron', 'minerals', 'mg'),
+    ('magnesium', 'minerals', 'mg'),
+    ('potassium', 'minerals', 'mg'),
+    ('zinc', 'minerals', 'mg'),
+    ('sodium', 'minerals', 'mg'),
+    ('selenium', 'minerals', 'mcg'),
+    ('vitamin_a', 'vitamins', 'mcg'),
+    ('vitamin_b12', 'vitamins', 'mcg'),
+    ('vitamin_b9', 'vitamins', 'mcg'),
+    ('vitamin_c', 'vitamins', 'mg'),
+    ('vitamin_d', 'vitamins', 'mcg'),
+    ('vitamin_e', 'vitamins', 'mg'),
+    ('vitamin_k', 'vitamins', 'mcg'),
+    ('vitamin_b6', 'vitamins', 'mg'),
+    ('cholesterol', 'fats', 'mg'),
+    ('omega_3', 'fats', 'g'),
+    ('saturated_fat', 'fats', 'g'),
+    ('unsaturated_fat', 'fats', 'g'),
+    ('omega_6', 'fats', 'g'),
+]
+
+NUTRIENT_GROUPS = ['nutritions', 'minerals', 'vitamins', 'fats']
+
+# Conversion factors to a common base per dimension
+MASS_UNITS = {'g': 1.0, 'mg': 1e-3, 'mcg': 1e-6, 'µg': 1e-6, 'μg': 1e-6, 'ug': 1e-6, 'kg': 1e3}
+ENERGY_UNITS = {'kcal': 1.0, 'cal': 1.0, 'kj': 1 / 4.184}
+
+AMOUNT_RE = re.compile(r'^\s*(-?\d+(?:[.,]\d+)?)\s*([a-zA-Zµμ]*)')
+
+def parse_amount(value, unit):
+    """Parse a value like '3 mcg' or '0.2 g' into a float in `unit`"""
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    match = AMOUNT_RE.match(str(value))
+    if not match:
+        return 0.0
+    amount = float(match.group(1).replace(',', '.'))
+    source = match.group(2).lower()
+
+    for table in (MASS_UNITS, ENERGY_UNITS):
+        if unit in table:
+            if source in table:
+                return amount * table[source] / table[unit]
+            return amount
+    return amount
+
+def format_amount(value, unit):
+    return f"{value:.1f} {unit}"
+
+def food_vector(food):
+    """Flatten a MealAnalysis food dict into {nutrient: value in canonical unit}"""
+    vector = {}
+    for key, group, unit in NUTRIENTS:
+        values = food.get(group) or {}
+        if isinstance(values, dict) and key in values:
+            vector[key] = parse_amount(values[key], unit)
+    return vector
+
+def food_groups(vector, groups=None):
+    """Expand {nutrient: value} back into the grouped, unit-suffixed response shape"""
+    groups = groups or NUTRIENT_GROUPS
+    result = {group: {} for group in groups}
+    for key, group, unit in NUTRIENTS:
+        if group in result:
+            result[group][key] = format_amount(vector.get(key, 0.0), unit)
+    return result
@@ -0,0 +1,108 @@
+import json
+import re
+from datetime import date
+from django.db import connection, transaction
+
+# Monthly range partitions of the `meals` table on meal_date (migration
+# 0004_partition_meals). Partitions are named meals_pYYYYMM; meals_legacy
+# holds everything that predates partitioning and meals_default catches
+# dates outside every explicit partition.
+
+PARENT = 'meals'
+DEFAULT_PARTITION = 'meals_default'
+LEGACY_PARTITION = 'meals_legacy'
+
+_bound_re = re.compile(r"FROM \((?:'([\d-]+)'|MINVALUE)\) TO \((?:'([\d-]+)'|MAXVALUE)\)")
+
+def month_start(day):
+    return day.replace(day=1)
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"{PARENT}_p{month:%Y%m}"
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [PARENT])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+def list_partitions():
+    """[(name, start, end)] of the range partitions ordered by start; None bounds mean MINVALUE/MAXVALUE"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+        """, [PARENT])
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _bound_re.search(bound)
+        if not match:
+            continue  # the DEFAULT partition
+        start = date.fromisoformat(match.group(1)) if match.group(1) else None
+        end = date.fromisoformat(match.group(2)) if match.group(2) else None
+        partitions.append((name, start, end))
+    partitions.sort(key=lambda partition: partition[1] or date.min)
+    return partitions
+
+def create_partition(month):
+    """
+    Creates and attaches the partition for `month`. Rows that already landed
+    in the default partition for that month are moved into it first, since
+    attaching fails while the default partition holds overlapping rows.
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{PARENT}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(f"""
+            WITH moved AS (
+                DELETE FROM "{DEFAULT_PARTITION}" WHERE meal_date >= %s AND meal_date < %s RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+        """, [start, end])
+        moved = cursor.rowcount
+        cursor.execute(
+            f'ALTER TABLE "{PARENT}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    return name, moved
+
+def partition_is_empty(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT NOT EXISTS (SELECT 1 FROM "{name}")')
+        return cursor.fetchone()[0]
+
+def detach_partition(name, drop=False):
+    """Detaches a partition; kept as a standalone table `<name>_detached` unless dropped"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{PARENT}" DETACH PARTITION "{name}"')
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+            return None
+        detached = f"{name}_detached"
+        cursor.execute(f'ALTER TABLE "{name}" RENAME TO "{detached}"')
+        return detached
+
+def scanned_partitions(queryset):
+    """Names of the partitions a queryset's plan still touches after planning-time pruning"""
+    plan = json.loads(queryset.explain(format='json'))
+    relations = set()
+
+    def walk(node):
+        name = node.get('Relation Name')
+        if name and (name == PARENT or name.startswith(f"{PARENT}_")):
+            relations.add(name)
+        for child in node.get('Plans', []):
+            walk(child)
+
+    for entry in plan:
+        walk(entry['Plan'])
+    return relations
@@ -0,0 +1,104 @@
+from functools import lru_cache
+from django.conf import settings
+
+# Prompts are laid out for provider-side prefix caching: the long instruction
+# block is a byte-identical system message shared by every language, and
+# everything that varies per request (language, description, image) comes last.
+
+UNITS_VERBOSE_IMAGE = "Use appropriate units: kcal for calories, g for macros and some nutrients, mg for most minerals and some vitamins, mcg for other vitamins."
+UNITS_VERBOSE_TEXT = "Use appropriate units: kcal for calories, g for macros, mg for minerals, mcg for vitamins."
+UNITS_COMPACT = "Give every nutrient as a plain number in the unit named by its field description."
+
+IMAGE_INSTRUCTIONS = """You are a professional nutritionist and food analysis expert. Your job is to determine if an image contains food, and if so, analyze it for nutritional information.
+
+CRITICAL: First, determine if this image contains actual food or beverages.
+- If the image shows food or drinks, set is_food to true and analyze it.
+- If the image shows people, animals, objects, scenery, or anything else that is NOT food, set is_food to false, confidence to 'high', and return an empty foods array.
+
+If it IS food, for each food item you can identify:
+1. Identify the food name clearly
+2. Estimate the portion size (e.g., '1 burger (250g)', 'medium serving (150g)')
+3. Set confidence level (high/medium/low) based on image clarity
+4. Provide complete nutritional information including:
+   - Macronutrients (calories, carbs, fat, protein)
+   - Minerals (calcium, iron, magnesium, potassium, zinc)
+   - Vitamins (A, B9, B12, C, D)
+   - Additional nutrients (cholesterol, fiber, omega-3, saturated fat, sodium)
+
+{units}
+Be specific and accurate with measurements.
+Write food names and portions in the language requested at the end of the user message."""
+
+TEXT_INSTRUCTIONS = """You are a professional nutritionist. Based on meal descriptions, estimate nutritional content.
+
+For each food item mentioned:
+1. Identify the food name
+2. Estimate portion size (make reasonable assumptions if not specified)
+3. Provide nutritional information:
+   - Macronutrients (calories, carbs, fat, protein)
+   - Minerals (calcium, iron, magnesium, potassium, zinc)
+   - Vitamins (A, B9, B12, C, D)
+   - Additional nutrients (cholesterol, fiber, omega-3, saturated fat, sodium)
+
+{units}
+If portions aren't specified, use standard serving sizes.
+Write food names and portions in the language requested in the user message."""
+
+IMAGE_LANGUAGE_LINES = {
+    'en': 'Analyze this image in English.',
+    'uz': 'Rasmni tahlil qiling va o\'zbekcha javob bering.',
+    'uz-cyrl': 'Расмни таҳлил қилинг ва ўзбекча жавоб беринг.',
+    'ru': 'Проанализируйте это изображение и ответьте на русском языке.',
+}
+
+TEXT_LANGUAGE_LINES = {
+    'en': 'Respond in English.',
+    'uz': 'O\'zbekcha javob bering.',
+    'uz-cyrl': 'Ўзбекча жавоб беринг.',
+    'ru': 'Ответьте на русском языке.',
+}
+
+class PromptTemplate:
+    def __init__(self, kind, system, language_line):
+        self.kind = kind
+        self.system = system
+        self.language_line = language_line
+        # Routes requests sharing this prefix to the same provider cache shard
+        self.cache_key = f"fitora-meal-{kind}"
+
+    def image_input(self, base64_image):
+        return [
+            {"role": "system", "content": self.system},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "input_text", "text": self.language_line},
+                    {"type": "input_image", "image_url": f"data:image/jpeg;base64,{base64_image}"},
+                ],
+            },
+        ]
+
+    def text_input(self, description):
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": f"{self.language_line}\nMeal description: \"{description}\""},
+        ]
+
+@lru_cache(maxsize=None)
+def _templates(compact):
+    image_system = IMAGE_INSTRUCTIONS.format(units=UNITS_COMPACT if compact else UNITS_VERBOSE_IMAGE)
+    text_system = TEXT_INSTRUCTIONS.format(units=UNITS_COMPACT if compact else UNITS_VERBOSE_TEXT)
+    return {
+        'image': {
+            language: PromptTemplate('image', image_system, line)
+            for language, line in IMAGE_LANGUAGE_LINES.items()
+        },
+        'text': {
+            language: PromptTemplate('text', text_system, line)
+            for language, line in TEXT_LANGUAGE_LINES.items()
+        },
+    }
+
+def get_template(kind, language, default_language='en'):
+    templates = _templates(settings.MEAL_ANALYSIS_COMPACT)[kind]
+    return templates.get(language) or templates[default_language]
@@ -0,0 +1,270 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import openai
+from common import metrics
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+def is_client_error(exc):
+    """A 4xx the provider will return again for the same request (not a timeout or rate limit)"""
+    return isinstance(exc, openai.APIStatusError) and exc.status_code < 500 and exc.status_code not in (408, 429)
+
+def is_retryable(exc):
+    if isinstance(exc, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError, TimeoutError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets, in seconds"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = position
+                break
+        with self.lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given quantile, or None if empty"""
+        with self.lock:
+            if not self.count:
+                return None
+            target = fraction * self.count
+            running = 0
+            for position, count in enumerate(self.counts):
+                running += count
+                if running >= target:
+                    return self.buckets[position] if position < len(self.buckets) else self.buckets[-1]
+        return self.buckets[-1]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'buckets': list(self.buckets),
+                'counts': list(self.counts),
+                'sum': self.total,
+                'count': self.count,
+            }
+
+class CircuitBreaker:
+    """
+    Opens when the failure rate over a sliding window crosses a threshold,
+    rejects calls for `cooldown` seconds, then lets a single probe through.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_rate=0.5, min_calls=10, window=60.0, cooldown=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.results = deque()
+        self.lock = threading.Lock()
+
+    def _trim(self, now):
+        while self.results and now - self.results[0][0] > self.window:
+            self.results.popleft()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record(self, success):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self.probing = False
+                if success:
+                    self.state = self.CLOSED
+                    self.results.clear()
+                else:
+                    self.state = self.OPEN
+                    self.opened_at = now
+                return
+
+            self.results.append((now, success))
+            self._trim(now)
+            failures = sum(1 for _, ok in self.results if not ok)
+            if len(self.results) >= self.min_calls and failures / len(self.results) >= self.failure_rate:
+                self.state = self.OPEN
+                self.opened_at = now
+
+    def release(self):
+        """Ends a call that says nothing about provider health without counting it"""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probing = False
+
+    def snapshot(self):
+        with self.lock:
+            self._trim(time.monotonic())
+            failures = sum(1 for _, ok in self.results if not ok)
+            return {
+                'state': self.state,
+                'window_calls': len(self.results),
+                'window_failures': failures,
+            }
+
+# Hedged calls run their primary and hedge attempts here. It should hold two
+# workers per request thread (OPENAI_CALL_WORKERS), so attempts do not queue
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+def _pool(workers):
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hedge')
+    return _hedge_pool
+
+class ResilientCaller:
+    """
+    Runs a provider call with a per-attempt timeout, jittered exponential
+    backoff between retries, an optional hedged duplicate once the primary
+    attempt outlives `hedge_after` (seconds, or 'p95' of observed latency),
+    and a circuit breaker shared by all calls to the same model.
+    """
+
+    def __init__(self, name, timeout=20.0, retries=2, backoff_base=0.5, backoff_max=4.0,
+                 hedge_after=None, hedge_workers=64, breaker=None):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.hedge_workers = hedge_workers
+        self.breaker = breaker or CircuitBreaker()
+        self.histogram = LatencyHistogram()
+        self.hedges = 0
+        self.retried = 0
+
+    def hedge_delay(self):
+        if not self.hedge_after:
+            return None
+        if self.hedge_after == 'p95':
+            # Too few samples make the estimate meaningless
+            if self.histogram.count < 20:
+                return None
+            return self.histogram.quantile(0.95)
+        return float(self.hedge_after)
+
+    def call(self, fn):
+        """Call fn(timeout) and return its result; fn must be safe to run twice"""
+        for attempt in range(self.retries + 1):
+            allowed = self.breaker.allow()
+            metrics.breaker_state.labels(self.name).set(metrics.BREAKER_STATES[self.breaker.state])
+            if not allowed:
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+
+            start = time.perf_counter()
+            try:
+                result = self._attempt(fn)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Bad input or schema errors are the caller's, not a sign the provider is down
+                    self.breaker.release()
+                    raise
+                self.breaker.record(False)
+                metrics.breaker_state.labels(self.name).set(metrics.BREAKER_STATES[self.breaker.state])
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                metrics.provider_retries.labels(self.name).inc()
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                time.sleep(delay)
+                continue
+
+            self.histogram.observe(time.perf_counter() - start)
+            self.breaker.record(True)
+            metrics.breaker_state.labels(self.name).set(metrics.BREAKER_STATES[self.breaker.state])
+            return result
+
+    def _attempt(self, fn):
+        delay = self.hedge_delay()
+        if delay is None or delay >= self.timeout:
+            return fn(self.timeout)
+
+        pool = _pool(self.hedge_workers)
+        starts = []
+
+        def primary():
+            starts.append(time.monotonic())
+            return fn(self.timeout)
+
+        pending = {pool.submit(primary)}
+        done, pending = wait(pending, timeout=delay)
+        if not done:
+            self.hedges += 1
+            metrics.provider_hedges.labels(self.name).inc()
+            pending.add(pool.submit(fn, self.timeout))
+
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                break
+            # The timeout runs from when the primary started, not from time spent queued
+            remaining = (starts[0] if starts else time.monotonic()) + self.timeout - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        # Losing hedges keep running to completion but their results are dropped
+        raise error or TimeoutError(f"{self.name} did not respond within {self.timeout}s")
+
+    def snapshot(self):
+        return {
+            'breaker': self.breaker.snapshot(),
+            'latency': self.histogram.snapshot(),
+            'hedges': self.hedges,
+            'retries': self.retried,
+        }
+
+_callers = {}
+_callers_lock = threading.Lock()
+
+def register(caller):
+    """Lists `caller` in snapshots(), replacing an earlier caller of the same name"""
+    with _callers_lock:
+        _callers[caller.name] = caller
+    return caller
+
+def snapshots():
+    with _callers_lock:
+        callers = list(_callers.values())
+    return {caller.name: caller.snapshot() for caller in callers}
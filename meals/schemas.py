@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model
+from typing import List, Literal
+from .nutrients import NUTRIENTS, food_groups, food_vector
 
 class Nutritions(BaseModel):
     calories: str = Field(description="Calories with unit (e.g., '780 kcal')")
@@ -45,4 +47,102 @@ class Food(BaseModel):
 class MealAnalysis(BaseModel):
     is_food: bool = Field(description="Whether the image contains actual food or beverages")
     confidence: str = Field(description="Confidence level of detection: high, medium, or low")
-    foods: List[Food] = Field(description="List of all identified food items in the image")
\ No newline at end of file
+    foods: List[Food] = Field(description="List of all identified food items in the image")
+
+# Compact wire format for the model: short keys and bare numbers in the
+# canonical units of meals.nutrients. Output tokens dominate latency, so the
+# model emits this and expand_compact() rebuilds the MealAnalysis shape.
+COMPACT_KEYS = {
+    'calories': 'kc', 'carbs': 'cb', 'fat': 'ft', 'protein': 'pr', 'fiber': 'fb',
+    'calcium': 'ca', 'iron': 'fe', 'magnesium': 'mg', 'potassium': 'k', 'zinc': 'zn',
+    'sodium': 'na', 'selenium': 'se',
+    'vitamin_a': 'va', 'vitamin_b12': 'b12', 'vitamin_b9': 'b9', 'vitamin_c': 'vc',
+    'vitamin_d': 'vd', 'vitamin_e': 've', 'vitamin_k': 'vk', 'vitamin_b6': 'b6',
+    'cholesterol': 'ch', 'omega_3': 'o3', 'saturated_fat': 'sf', 'unsaturated_fat': 'uf',
+    'omega_6': 'o6',
+}
+COMPACT_GROUPS = {'nutritions': 'ma', 'minerals': 'mi', 'vitamins': 'vi', 'fats': 'fa'}
+CONFIDENCE_CODES = {'high': 'h', 'medium': 'm', 'low': 'l'}
+CONFIDENCE_LEVELS = {code: level for level, code in CONFIDENCE_CODES.items()}
+
+class CompactMealAnalysisBase(BaseModel):
+    @property
+    def confidence(self):
+        return CONFIDENCE_LEVELS.get(self.c, self.c)
+
+def normalize_groups(groups=None):
+    """Requested nutrient groups in canonical order; macros are always included"""
+    requested = set(groups or COMPACT_GROUPS) | {'nutritions'}
+    return tuple(group for group in COMPACT_GROUPS if group in requested)
+
+@lru_cache(maxsize=None)
+def _compact_schema(groups):
+    group_fields = {}
+    for group in groups:
+        fields = {
+            COMPACT_KEYS[key]: (float, Field(description=unit))
+            for key, nutrient_group, unit in NUTRIENTS
+            if nutrient_group == group
+        }
+        group_fields[COMPACT_GROUPS[group]] = (create_model(f"Compact_{group}", **fields), Field(description=group))
+
+    food = create_model(
+        'CompactFood',
+        n=(str, Field(description="name")),
+        p=(str, Field(description="portion, e.g. '1 plate (350g)'")),
+        **group_fields,
+    )
+    return create_model(
+        'CompactMealAnalysis',
+        __base__=CompactMealAnalysisBase,
+        f=(bool, Field(description="is food")),
+        c=(Literal['h', 'm', 'l'], Field(description="confidence")),
+        i=(List[food], Field(description="food items")),
+    )
+
+def compact_schema(groups=None):
+    return _compact_schema(normalize_groups(groups))
+
+def expand_compact(data, groups=None):
+    """Translate a compact payload into the MealAnalysis response shape"""
+    groups = normalize_groups(groups)
+    foods = []
+    for item in data.get('i', []):
+        vector = {}
+        for group in groups:
+            values = item.get(COMPACT_GROUPS[group]) or {}
+            for key, nutrient_group, _unit in NUTRIENTS:
+                if nutrient_group == group:
+                    vector[key] = values.get(COMPACT_KEYS[key], 0.0)
+        foods.append({
+            'name': item.get('n', ''),
+            'portion_size': item.get('p', ''),
+            **food_groups(vector, groups),
+        })
+
+    return {
+        'is_food': bool(data.get('f')),
+        'confidence': CONFIDENCE_LEVELS.get(data.get('c'), 'medium'),
+        'foods': foods,
+    }
+
+def compact_from_analysis(data, groups=None):
+    """Translate a MealAnalysis-shaped dict into the compact wire format"""
+    groups = normalize_groups(groups)
+    items = []
+    for food in data.get('foods', []):
+        vector = food_vector(food)
+        item = {'n': food.get('name', ''), 'p': food.get('portion_size', '')}
+        for group in groups:
+            item[COMPACT_GROUPS[group]] = {
+                COMPACT_KEYS[key]: round(vector.get(key, 0.0), 1)
+                for key, nutrient_group, _unit in NUTRIENTS
+                if nutrient_group == group
+            }
+        items.append(item)
+
+    return {
+        'f': bool(data.get('is_food')),
+        'c': CONFIDENCE_CODES.get(data.get('confidence'), 'm'),
+        'i': items,
+    }
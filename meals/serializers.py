@@ -1,7 +1,17 @@
 from rest_framework import serializers
 from .models import Meal
 from datetime import date
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
+from .media import url_owner_id
+
+FOREIGN_IMAGE_URL = _("image_url must point to one of your own uploads")
+
+def is_foreign_image_url(serializer, value):
+    """True for an image_url inside another user's meals/<id>/ upload directory"""
+    owner_id = url_owner_id(value) if value else None
+    request = serializer.context.get('request')
+    return owner_id is not None and (request is None or owner_id != request.user.id)
 
 class MealAnalyzeSerializer(serializers.Serializer):
     image = serializers.ImageField()
@@ -46,6 +56,13 @@ class MealSerializer(serializers.ModelSerializer):
         fields = ['id', 'image_url', 'meal_date', 'foods_data', 'meal_time', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def validate(self, data):
+        # image_url is read-only here, but pointing it at someone else's upload is refused, not ignored
+        initial = getattr(self, 'initial_data', None)
+        if isinstance(initial, dict) and is_foreign_image_url(self, initial.get('image_url')):
+            raise serializers.ValidationError({'image_url': [FOREIGN_IMAGE_URL]})
+        return data
+    
     def get_image_url(self, obj):
         if not obj.image_url:
             return None
@@ -75,6 +92,11 @@ class MealCreateSerializer(serializers.ModelSerializer):
         model = Meal
         fields = ['image_url', 'meal_date', 'foods_data', 'meal_time']
     
+    def validate_image_url(self, value):
+        if is_foreign_image_url(self, value):
+            raise serializers.ValidationError(FOREIGN_IMAGE_URL)
+        return value
+    
     def validate_foods_data(self, value):
         if not isinstance(value, dict) or 'foods' not in value:
             raise serializers.ValidationError(_("foods_data must contain a 'foods' array"))
@@ -82,6 +104,41 @@ class MealCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(_("'foods' must be an array"))
         return value
 
+class MealBatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, data):
+        if data['op'] != 'create' and 'id' not in data:
+            raise serializers.ValidationError({'id': _("Required for update and delete")})
+        if data['op'] != 'delete' and 'data' not in data:
+            raise serializers.ValidationError({'data': _("Required for create and update")})
+        return data
+
+class MealBatchSerializer(serializers.Serializer):
+    operations = MealBatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        if len(value) > settings.MEAL_BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                _("At most %(count)d operations per batch") % {'count': settings.MEAL_BATCH_MAX_OPERATIONS}
+            )
+        return value
+
+class MealSyncSerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, default=0, min_value=0)
+
+class MealExportSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['csv', 'ndjson', 'columnar'], required=False, default='csv')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError(_("date_from must not be after date_to"))
+        return data
+
 class MealListSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
     
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the subset of the OpenAI API used by meals/services.py:
+# POST /v1/responses (structured output, optionally streamed) and
+# POST /v1/audio/transcriptions. Point OPENAI_BASE_URL at it for benchmarks;
+# SMS_API_URL can point at its /sms path as well.
+
+FOOD_NAMES = ['Plov', 'Non', 'Green tea', 'Lagman', 'Samsa', 'Shashlik', 'Manti', 'Achichuk salad']
+PORTIONS = ['1 plate (350g)', '1 piece (250g)', '1 cup (250ml)', '2 pieces (200g)', 'medium serving (150g)']
+TRANSCRIPTS = ['two eggs and green tea', 'plov with non', 'ikkita samsa va choy', 'лагман и чай']
+
+EXAMPLE_RE = re.compile(r"e\.g\.,? '([\d.]+)\s*([^']*)'")
+
+class LatencyDistribution:
+    """
+    Parsed from 'fixed:0.8', 'uniform:0.5,2', 'normal:1.2,0.3' or
+    'lognormal:0,0.5' (parameters of the underlying normal), in seconds.
+    """
+
+    def __init__(self, spec='fixed:0'):
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(value) for value in params.split(',') if value]
+        if kind not in ('fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        if self.kind == 'fixed':
+            value = self.params[0] if self.params else 0.0
+        elif self.kind == 'uniform':
+            value = random.uniform(*self.params[:2])
+        elif self.kind == 'normal':
+            value = random.gauss(*self.params[:2])
+        else:
+            value = random.lognormvariate(*self.params[:2])
+        return max(0.0, value)
+
+class StubConfig:
+    def __init__(self, latency='fixed:0', transcription_latency='fixed:0', token_latency_ms=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, low_confidence_rate=0.0, not_food_rate=0.0,
+                 stream_chunk_tokens=8):
+        self.latency = LatencyDistribution(latency)
+        self.transcription_latency = LatencyDistribution(transcription_latency)
+        self.token_latency = token_latency_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.low_confidence_rate = low_confidence_rate
+        self.not_food_rate = not_food_rate
+        self.stream_chunk_tokens = stream_chunk_tokens
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+class PayloadGenerator:
+    """Random but schema-valid instances of the JSON schema sent in text.format"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def generate(self, schema):
+        self.defs = schema.get('$defs', {})
+        self.is_food = random.random() >= self.config.not_food_rate
+        self.low_confidence = random.random() < self.config.low_confidence_rate
+        return self.value(schema)
+
+    def value(self, schema, key=None):
+        if '$ref' in schema:
+            return self.value(self.defs[schema['$ref'].split('/')[-1]], key)
+        if 'anyOf' in schema:
+            options = [option for option in schema['anyOf'] if option.get('type') != 'null']
+            return self.value(options[0] if options else schema['anyOf'][0], key)
+        if 'const' in schema:
+            return schema['const']
+        if 'enum' in schema:
+            choices = schema['enum']
+            if key in ('c', 'confidence'):
+                low = [choice for choice in choices if choice in ('l', 'low')]
+                high = [choice for choice in choices if choice in ('h', 'high')]
+                return (low if self.low_confidence else high or choices)[0] if (low or high) else choices[0]
+            return random.choice(choices)
+
+        kind = schema.get('type')
+        if kind == 'object':
+            return {name: self.value(field, name) for name, field in schema.get('properties', {}).items()}
+        if kind == 'array':
+            if not self.is_food:
+                return []
+            count = random.randint(max(1, schema.get('minItems', 1)), 3)
+            return [self.value(schema.get('items', {}), key) for _ in range(count)]
+        if kind == 'boolean':
+            return self.is_food
+        if kind in ('number', 'integer'):
+            value = round(random.uniform(0.1, 400), 1)
+            return int(value) if kind == 'integer' else value
+        return self.string(schema, key)
+
+    def string(self, schema, key):
+        if key in ('name', 'n'):
+            return random.choice(FOOD_NAMES)
+        if key in ('portion_size', 'p'):
+            return random.choice(PORTIONS)
+        if key == 'confidence':
+            return 'low' if self.low_confidence else 'high'
+        match = EXAMPLE_RE.search(schema.get('description', ''))
+        if match:
+            return f"{round(random.uniform(0.1, 2) * float(match.group(1)), 1)} {match.group(2)}".strip()
+        return 'stub'
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'FitoraOpenAIStub/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def injected_error(self):
+        """Return True after sending a simulated provider error"""
+        config = self.server.config
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self.send_json(429, {'error': {'message': 'Rate limit reached (stub)', 'type': 'rate_limit_error'}},
+                           headers={'Retry-After': '1'})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            self.send_json(500, {'error': {'message': 'Internal error (stub)', 'type': 'server_error'}})
+            return True
+        return False
+
+    def do_POST(self):
+        path = self.path.split('?')[0].rstrip('/')
+        body = self.read_body()
+
+        if path.endswith('/responses'):
+            self.server.count('responses')
+            if not self.injected_error():
+                self.handle_responses(json.loads(body or b'{}'))
+        elif path.endswith('/audio/transcriptions'):
+            self.server.count('transcriptions')
+            time.sleep(self.server.config.transcription_latency.sample())
+            if not self.injected_error():
+                self.send_json(200, {'text': random.choice(TRANSCRIPTS)})
+        elif 'sms' in path:
+            # Stand-in for SMS_API_URL so OTP logins can be load-tested
+            self.server.count('sms')
+            if not self.injected_error():
+                self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': {'message': f'Unknown endpoint {path} (stub)', 'type': 'invalid_request_error'}})
+
+    def handle_responses(self, request):
+        config = self.server.config
+        text_format = (request.get('text') or {}).get('format') or {}
+        schema = text_format.get('schema') or {'type': 'object', 'properties': {}}
+        output_text = json.dumps(PayloadGenerator(config).generate(schema), ensure_ascii=False)
+
+        input_text = json.dumps(request.get('input', ''), ensure_ascii=False)
+        usage = {
+            'input_tokens': estimate_tokens(input_text),
+            'input_tokens_details': {'cached_tokens': self.server.cached_tokens(request)},
+            'output_tokens': estimate_tokens(output_text),
+            'output_tokens_details': {'reasoning_tokens': 0},
+        }
+        usage['total_tokens'] = usage['input_tokens'] + usage['output_tokens']
+
+        # Time to first token, then generation time proportional to the output
+        time.sleep(config.latency.sample())
+        response = {
+            'id': f"resp_{uuid.uuid4().hex}",
+            'object': 'response',
+            'created_at': int(time.time()),
+            'status': 'completed',
+            'model': request.get('model', 'stub'),
+            'output': [{
+                'id': f"msg_{uuid.uuid4().hex}",
+                'type': 'message',
+                'status': 'completed',
+                'role': 'assistant',
+                'content': [{'type': 'output_text', 'text': output_text, 'annotations': []}],
+            }],
+            'parallel_tool_calls': True,
+            'tool_choice': 'auto',
+            'tools': [],
+            'text': request.get('text') or {'format': {'type': 'text'}},
+            'usage': usage,
+        }
+
+        if request.get('stream'):
+            self.stream_response(response, output_text)
+            return
+
+        time.sleep(config.token_latency * usage['output_tokens'])
+        self.send_json(200, response)
+
+    def stream_response(self, response, output_text):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        sequence = 0
+
+        def event(name, payload):
+            nonlocal sequence
+            payload = {'type': name, 'sequence_number': sequence, **payload}
+            sequence += 1
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        in_progress = {**response, 'status': 'in_progress', 'output': [], 'usage': None}
+        event('response.created', {'response': in_progress})
+
+        message = response['output'][0]
+        part = message['content'][0]
+        event('response.output_item.added', {'output_index': 0, 'item': {**message, 'status': 'in_progress', 'content': []}})
+        event('response.content_part.added', {
+            'item_id': message['id'], 'output_index': 0, 'content_index': 0, 'part': {**part, 'text': ''},
+        })
+
+        chunk_chars = self.server.config.stream_chunk_tokens * 4
+        for start in range(0, len(output_text), chunk_chars):
+            delta = output_text[start:start + chunk_chars]
+            time.sleep(self.server.config.token_latency * estimate_tokens(delta))
+            event('response.output_text.delta', {
+                'item_id': message['id'], 'output_index': 0, 'content_index': 0, 'delta': delta, 'logprobs': [],
+            })
+
+        event('response.output_text.done', {
+            'item_id': message['id'], 'output_index': 0, 'content_index': 0, 'text': output_text, 'logprobs': [],
+        })
+        event('response.content_part.done', {
+            'item_id': message['id'], 'output_index': 0, 'content_index': 0, 'part': part,
+        })
+        event('response.output_item.done', {'output_index': 0, 'item': message})
+        event('response.completed', {'response': response})
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config, verbose=False):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.verbose = verbose
+        self.counts = {}
+        self.prefixes = set()
+        self.lock = threading.Lock()
+
+    def count(self, endpoint):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def cached_tokens(self, request):
+        """Mimic provider prefix caching: a repeated system prompt of 1024+ tokens is cached"""
+        messages = request.get('input') or []
+        system = next((m.get('content') for m in messages if isinstance(m, dict) and m.get('role') == 'system'), None)
+        if not isinstance(system, str):
+            return 0
+        tokens = estimate_tokens(system)
+        digest = hashlib.sha256(system.encode('utf-8')).hexdigest()
+        with self.lock:
+            seen = digest in self.prefixes
+            self.prefixes.add(digest)
+        if not seen or tokens < 1024:
+            return 0
+        return tokens - tokens % 128
+
+def make_server(host='127.0.0.1', port=8765, verbose=False, **options):
+    return StubServer((host, port), StubConfig(**options), verbose=verbose)
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import connection
+from common.conditional import bump_version
+from .models import Meal, MealChange
+
+# Delta sync for offline clients. Every meal write appends to MealChange in
+# the transaction that made it; a client keeps the id of the last change it
+# has seen and asks only for what came after. Change ids are taken at insert
+# time, not at commit, so writers for one user serialize on an advisory lock:
+# otherwise a slower transaction could commit a change behind a cursor that a
+# reader has already been given, and the client would never see it.
+
+# First key of the two-key advisory lock, so it cannot clash with other locks
+LOCK_CLASS = 4801
+
+def record_changes(user_id, upserts=(), deletes=()):
+    """
+    Logs created/updated and deleted meal ids and invalidates the user's
+    cached responses; call inside the writing transaction.
+    """
+    changes = [MealChange(user_id=user_id, meal_id=meal_id, op=MealChange.UPSERT) for meal_id in upserts]
+    changes += [MealChange(user_id=user_id, meal_id=meal_id, op=MealChange.DELETE) for meal_id in deletes]
+    if not changes:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [LOCK_CLASS, user_id])
+    MealChange.objects.bulk_create(changes)
+    bump_version(user_id)
+
+def changes_since(user_id, since, limit=None):
+    """
+    Up to `limit` changes after cursor `since`, collapsed to the last one per
+    meal: the current rows of created/updated meals and the ids of deleted
+    ones, plus the cursor to send next time.
+    """
+    limit = limit or settings.MEAL_SYNC_PAGE_SIZE
+    changes = list(
+        MealChange.objects.filter(user_id=user_id, id__gt=since)
+        .order_by('id')
+        .values_list('id', 'meal_id', 'op')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    latest = {}
+    for _, meal_id, op in changes:
+        latest[meal_id] = op
+    upserted = [meal_id for meal_id, op in latest.items() if op == MealChange.UPSERT]
+    # A meal archived since its change is missing here; the client's copy stays valid
+    meals = list(Meal.objects.filter(user_id=user_id, id__in=upserted)) if upserted else []
+
+    return {
+        'cursor': changes[-1][0] if changes else since,
+        'has_more': has_more,
+        'meals': meals,
+        'deleted': [meal_id for meal_id, op in latest.items() if op == MealChange.DELETE],
+    }
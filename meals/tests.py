@@ -1,3 +1,245 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from django.conf import settings
+from django.core.cache import cache
+import httpx
+import openai
+from django.test import SimpleTestCase, TestCase, override_settings
+from common.querybudget import QueryBudgetTestMixin
+from dietologists.models import ClientRequest, Dietologist, Group
+from dietologists.views import get_tokens_for_dietologist
+from users.models import User
+from users.views import get_tokens_for_user
+from asgiref.sync import async_to_sync
+from .archive import archive_month
+from .export import NDJSONEncoder, astream, stream
+from .llm import ModelBackend, ModelRouter
+from .models import Meal
 
-# Create your tests here.
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Queries run by JWT authentication before the view's own budget starts
+AUTH_QUERIES = 1
+
+def foods(calories):
+    return {'foods': [{'name': 'Plov', 'nutritions': {'calories': calories}}]}
+
+@override_settings(CACHES=LOCMEM, RESPONSE_CACHE_ENABLED=False, IDEMPOTENCY_ENABLED=False)
+class MealQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Every view runs within its declared @query_budget, whatever the history size"""
+
+    @classmethod
+    def setUpClass(cls):
+        archive_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, archive_dir)
+        archive_settings = override_settings(MEAL_ARCHIVE_DIR=archive_dir)
+        archive_settings.enable()
+        cls.addClassCleanup(archive_settings.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone_number='+998900000001')
+        cls.meals = Meal.objects.bulk_create([
+            Meal(user=cls.user, image_url=f'meals/{i}.jpg', meal_date=date(2025, 1 + i % 3, 1 + i // 3 % 5),
+                 foods_data=foods(100 + i), meal_time='lunch')
+            for i in range(30)
+        ])
+        archive_month(cls.user.id, date(2025, 1, 1))
+        cls.meal = Meal.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'Bearer ' + get_tokens_for_user(self.user)['access_token']
+
+    def test_list(self):
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.get('/meals', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 30)
+
+    def test_create(self):
+        body = {'image_url': 'meals/new.jpg', 'meal_date': '2025-03-05', 'foods_data': foods(250), 'meal_time': 'dinner'}
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.post('/meals', body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_batch(self):
+        hot = list(Meal.objects.filter(user=self.user).values_list('id', flat=True)[:4])
+        operations = [
+            {'op': 'create', 'data': {'image_url': f'meals/b{i}.jpg', 'meal_date': '2025-03-06', 'foods_data': foods(10)}}
+            for i in range(3)
+        ]
+        operations += [{'op': 'update', 'id': meal_id, 'data': {'meal_time': 'snack'}} for meal_id in hot[:2]]
+        operations += [{'op': 'delete', 'id': meal_id} for meal_id in hot[2:]]
+        with self.assertQueryBudget(7 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.post('/meals/batch', {'operations': operations}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail(self):
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.get(f'/meals/{self.meal.id}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_update(self):
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.patch(f'/meals/{self.meal.id}', {'meal_time': 'snack'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete(self):
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.delete(f'/meals/{self.meal.id}')
+        self.assertEqual(response.status_code, 204)
+
+    def test_archived_detail(self):
+        archived = next(meal for meal in self.meals if meal.meal_date.month == 1)
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.get(f'/meals/{archived.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['id'], archived.id)
+
+        response = self.client.patch(f'/meals/{archived.id}', {'meal_time': 'snack'}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['code'], 'meal_archived')
+
+        with self.assertQueryBudget(5 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.delete(f'/meals/{archived.id}')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(f'/meals/{archived.id}').status_code, 404)
+        self.assertEqual(self.client.get('/meals', {'page_size': 100}).json()['count'], 29)
+        self.assertEqual(self.client.delete(f'/meals/{archived.id}').status_code, 404)
+
+    def test_export_skips_archived_copies_of_hot_meals(self):
+        archived = next(meal for meal in self.meals if meal.meal_date.month == 1)
+        # As left behind by an edit in an archived month
+        Meal.objects.create(id=archived.id, user=self.user, image_url=archived.image_url, meal_date=archived.meal_date,
+                            foods_data=foods(999), meal_time='dinner')
+
+        async def collect():
+            return [chunk async for chunk in astream(NDJSONEncoder(), self.user.id)]
+
+        for chunks in (list(stream(NDJSONEncoder(), self.user.id)), async_to_sync(collect)()):
+            ids = [json.loads(line)['meal_id'] for line in ''.join(chunks).splitlines()]
+            self.assertEqual(sorted(ids), sorted(meal.id for meal in self.meals))
+
+    def test_sync(self):
+        self.client.post('/meals/batch', {'operations': [
+            {'op': 'update', 'id': self.meal.id, 'data': {'meal_time': 'snack'}},
+        ]}, content_type='application/json')
+        with self.assertQueryBudget(3 + AUTH_QUERIES, max_repeats=1):
+            response = self.client.get('/meals/sync', {'since': 0})
+        self.assertEqual(len(response.json()['data']['meals']), 1)
+
+    def test_daily_summary(self):
+        for day in ('2025-01-01', '2025-02-02'):
+            with self.subTest(day=day), self.assertQueryBudget(3 + AUTH_QUERIES):
+                response = self.client.get('/meals/daily', {'date': day})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['data']['total_meals'], 2)
+
+@override_settings(CACHES=LOCMEM, RESPONSE_CACHE_ENABLED=False, IDEMPOTENCY_ENABLED=False)
+class MealMediaAccessTests(TestCase):
+    """Meal photos are served to their owner and the owner's approved dietologist only"""
+
+    OWNED = '{owner}/2025/01/01/plov.jpg'
+    LEGACY = '2024/01/01/old.jpg'
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        cls.addClassCleanup(media_settings.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(phone_number='+998900000401')
+        cls.other = User.objects.create(phone_number='+998900000402')
+        cls.dietologist = Dietologist.objects.create(phone_number='+998900000403', first_name='Aziza', last_name='Rahimova')
+        cls.stranger = Dietologist.objects.create(phone_number='+998900000404', first_name='Bobur', last_name='Aliyev')
+        group = Group.objects.create(dietologist=cls.dietologist, name='Evening', code='EVENING1')
+        ClientRequest.objects.create(user=cls.owner, group=group, status='approved')
+        Meal.objects.create(user=cls.owner, image_url=f'http://testserver/media/meals/{cls.LEGACY}', foods_data=foods(100))
+
+        cls.owned = cls.OWNED.format(owner=cls.owner.id)
+        for name in (cls.owned, cls.LEGACY):
+            path = os.path.join(settings.MEDIA_ROOT, 'meals', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'jpeg')
+
+    def user_headers(self, user):
+        return {'HTTP_AUTHORIZATION': 'Bearer ' + get_tokens_for_user(user)['access_token']}
+
+    def dietologist_headers(self, dietologist):
+        return {'HTTP_AUTHORIZATION': 'Bearer ' + get_tokens_for_dietologist(dietologist)['access_token']}
+
+    def fetch(self, name, headers):
+        return self.client.get(f'/media/meals/{name}', **headers).status_code
+
+    def test_owner(self):
+        self.assertEqual(self.fetch(self.owned, self.user_headers(self.owner)), 200)
+        self.assertEqual(self.fetch(self.LEGACY, self.user_headers(self.owner)), 200)
+
+    def test_other_user(self):
+        self.assertEqual(self.fetch(self.owned, self.user_headers(self.other)), 404)
+        self.assertEqual(self.fetch(self.LEGACY, self.user_headers(self.other)), 404)
+        # A meal saved before image_url was validated does not open the owner's directory
+        Meal.objects.create(user=self.other, image_url=f'http://testserver/media/meals/{self.owned}', foods_data=foods(10))
+        self.assertEqual(self.fetch(self.owned, self.user_headers(self.other)), 404)
+
+    def test_other_user_cannot_claim_a_foreign_upload(self):
+        headers = self.user_headers(self.other)
+        image_url = f'http://testserver/media/meals/{self.owned}'
+        body = {'image_url': image_url, 'meal_date': '2025-01-02', 'foods_data': foods(10)}
+        response = self.client.post('/meals', body, content_type='application/json', **headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/meals/batch', {'operations': [{'op': 'create', 'data': body}]},
+                                    content_type='application/json', **headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Meal.objects.filter(user=self.other).exists())
+
+        meal = Meal.objects.create(user=self.other, image_url='meals/mine.jpg', foods_data=foods(10))
+        response = self.client.patch(f'/meals/{meal.id}', {'image_url': image_url}, content_type='application/json', **headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.fetch(self.owned, headers), 404)
+
+    def test_dietologist(self):
+        self.assertEqual(self.fetch(self.owned, self.dietologist_headers(self.dietologist)), 200)
+        self.assertEqual(self.fetch(self.LEGACY, self.dietologist_headers(self.dietologist)), 200)
+        self.assertEqual(self.fetch(self.owned, self.dietologist_headers(self.stranger)), 404)
+        self.assertEqual(self.fetch(self.LEGACY, self.dietologist_headers(self.stranger)), 404)
+
+class FailingBackend(ModelBackend):
+    """Answers every parse with the same HTTP error"""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.models = []
+
+    def parse(self, model, input, text_format, prompt_cache_key=None):
+        self.models.append(model)
+        response = httpx.Response(self.status_code, request=httpx.Request('POST', 'https://api.openai.com/v1/responses'))
+        raise openai.APIStatusError('error', response=response, body=None)
+
+    def transcribe(self, model, file, language=None):
+        raise NotImplementedError
+
+class ModelRouterTests(SimpleTestCase):
+    def test_client_errors_are_not_escalated(self):
+        backend = FailingBackend(400)
+        with self.assertRaises(openai.APIStatusError):
+            ModelRouter(backend, ['small', 'large']).parse('plov', None)
+        self.assertEqual(backend.models, ['small'])
+
+    def test_transient_errors_are_escalated(self):
+        for status_code in (408, 429, 500):
+            backend = FailingBackend(status_code)
+            with self.subTest(status_code=status_code), self.assertRaises(openai.APIStatusError):
+                ModelRouter(backend, ['small', 'large']).parse('plov', None)
+            self.assertEqual(backend.models, ['small', 'large'])
@@ -5,6 +5,10 @@ urlpatterns = [
     path('meals/analyze', views.analyze_meal, name='analyze-meal'),
     path('meals/analyze-voice', views.analyze_voice, name='analyze-voice'),
     path('meals', views.meals, name='meals'),
+    path('meals/batch', views.meals_batch, name='meals-batch'),
     path('meals/<int:pk>', views.meal_detail, name='meal-detail'),
     path('meals/daily', views.daily_summary, name='daily-summary'),
+    path('meals/sync', views.sync_meals, name='sync-meals'),
+    path('meals/export', views.export_meals, name='export-meals'),
+    path('media/meals/<path:path>', views.meal_media, name='meal-media'),
 ]
\ No newline at end of file
@@ -1,18 +1,39 @@
+import logging
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
 from datetime import datetime
 from .models import Meal
+from .archive import MealHistory, delete_archived, find_archived, merge_day
+from .batch import MealBatch
+from .sync import changes_since, record_changes
+from .export import export_response
+from .media import media_owner_id
+from .audio import preprocess_audio, AudioFormatError
+from .resilience import CircuitOpenError
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from .serializers import (
     MealSerializer, MealCreateSerializer, MealListSerializer, 
-    MealAnalyzeSerializer, VoiceAnalyzeSerializer
+    MealAnalyzeSerializer, VoiceAnalyzeSerializer, MealBatchSerializer, MealExportSerializer,
+    MealSyncSerializer
 )
 from django.utils.translation import gettext as _
 from common.responses import success_response, error_response
+from common.authentication import CustomJWTAuthentication
+from common.media import serve_file
+from common import metrics
+from common.timing import phase
+from common.querybudget import query_budget
+from common.idempotency import idempotent
+from common.conditional import conditional
+from dietologists.middleware import DietologistJWTAuthentication
+
+logger = logging.getLogger(__name__)
 
 def calculate_daily_totals(meals):
     """Calculate total nutritional values from all meals"""
@@ -91,7 +112,7 @@ def calculate_daily_totals(meals):
                     totals['saturated_fat'] += parse_value(additional.get('saturated_fat', '0'))
                     totals['sodium'] += parse_value(additional.get('sodium', '0'))
         except Exception as e:
-            print(f"Error processing meal {meal.id}: {str(e)}")
+            logger.warning("Error processing meal %s: %s", meal.id, e)
             continue
 
     return {
@@ -155,16 +176,28 @@ def calculate_daily_totals(meals):
 #             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
 #         )
 
+def analysis_unavailable_response():
+    """Fail fast while the model provider's circuit breaker is open"""
+    response = error_response(
+        message=_('Analysis is temporarily unavailable. Please try again shortly.'),
+        code='analysis_unavailable',
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = str(int(settings.OPENAI_BREAKER_COOLDOWN))
+    return response
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def analyze_meal(request):
-    print("=== DEBUG: analyze_meal called ===")
-    print(f"Files: {request.FILES}")
-    print(f"Data: {request.data}")
-    
-    serializer = MealAnalyzeSerializer(data=request.data)
-    if not serializer.is_valid():
-        print(f"Serializer errors: {serializer.errors}")
+    # The multipart body is read from the client and parsed on first access
+    with phase('upload'):
+        data = request.data
+    serializer = MealAnalyzeSerializer(data=data)
+    with phase('validate'):
+        valid = serializer.is_valid()
+    if not valid:
+        logger.info("analyze_meal validation failed on %s", ', '.join(serializer.errors))
         return error_response(
             message=_('Validation error'),
             errors=serializer.errors,
@@ -172,25 +205,25 @@ def analyze_meal(request):
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    print("=== DEBUG: Serializer valid ===")
-    
     image = serializer.validated_data['image']
     meal_date = serializer.validated_data.get('meal_date', datetime.now().date())
     meal_time = serializer.validated_data.get('meal_time')
 
-    filename = f"meals/{meal_date.year}/{meal_date.month:02d}/{meal_date.day:02d}/{image.name}"
-    path = default_storage.save(filename, ContentFile(image.read()))
-    image_url = request.build_absolute_uri(default_storage.url(path))
-
-    image.seek(0)
-    image_data = image.read()
+    filename = f"meals/{request.user.id}/{meal_date.year}/{meal_date.month:02d}/{meal_date.day:02d}/{image.name}"
+    with phase('preprocess'):
+        image.seek(0)
+        image_data = image.read()
+    with phase('storage'):
+        path = default_storage.save(filename, ContentFile(image_data))
+        image_url = request.build_absolute_uri(default_storage.url(path))
 
     try:
         from .services import analyze_meal_image
         from django.utils.translation import get_language_from_request
         
         language = get_language_from_request(request)
-        analysis_result = analyze_meal_image(image_data, language)
+        with metrics.analyses_in_flight.labels('image').track_inprogress():
+            analysis_result = analyze_meal_image(image_data, language)
         
         # Check if the image contains food
         if not analysis_result.get('is_food', False):
@@ -209,6 +242,9 @@ def analyze_meal(request):
                 'foods': analysis_result['foods']
             }
         )
+    except CircuitOpenError:
+        default_storage.delete(path)
+        return analysis_unavailable_response()
     except Exception as e:
         default_storage.delete(path)
         return error_response(
@@ -217,13 +253,34 @@ def analyze_meal(request):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def read_voice_upload(audio):
+    """Return the upload as compact 16 kHz mono WAV, or the raw bytes if it cannot be decoded"""
+    if not settings.AUDIO_PREPROCESSING:
+        return audio.read()
+
+    try:
+        return preprocess_audio(
+            audio,
+            threshold_db=settings.AUDIO_SILENCE_THRESHOLD_DB,
+            max_pause_ms=settings.AUDIO_MAX_PAUSE_MS
+        )
+    except AudioFormatError as e:
+        logger.info("Audio preprocessing skipped: %s", e)
+        audio.seek(0)
+        return audio.read()
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def analyze_voice(request):
     from django.utils.translation import get_language_from_request
     
-    serializer = VoiceAnalyzeSerializer(data=request.data)
-    if not serializer.is_valid():
+    # The multipart body is read from the client and parsed on first access
+    with phase('upload'):
+        data = request.data
+    serializer = VoiceAnalyzeSerializer(data=data)
+    with phase('validate'):
+        valid = serializer.is_valid()
+    if not valid:
         return error_response(
             message=_('Validation error'),
             errors=serializer.errors,
@@ -235,16 +292,18 @@ def analyze_voice(request):
     meal_time = serializer.validated_data.get('meal_time')
     language = serializer.validated_data.get('language') or get_language_from_request(request)
     
-    filename = f"meals/audio/{meal_date.year}/{meal_date.month:02d}/{meal_date.day:02d}/{audio.name}"
-    path = default_storage.save(filename, ContentFile(audio.read()))
-    audio_url = request.build_absolute_uri(default_storage.url(path))
+    with phase('preprocess'):
+        audio_data = read_voice_upload(audio)
     
-    audio.seek(0)
-    audio_data = audio.read()
+    filename = f"meals/audio/{request.user.id}/{meal_date.year}/{meal_date.month:02d}/{meal_date.day:02d}/{audio.name}"
+    with phase('storage'):
+        path = default_storage.save(filename, ContentFile(audio_data))
+        audio_url = request.build_absolute_uri(default_storage.url(path))
     
     try:
         from .services import analyze_meal_voice
-        analysis_result = analyze_meal_voice(audio_data, language)
+        with metrics.analyses_in_flight.labels('voice').track_inprogress():
+            analysis_result = analyze_meal_voice(audio_data, language)
         
         return success_response(
             data={
@@ -253,6 +312,9 @@ def analyze_voice(request):
                 'foods': analysis_result['foods']
             }
         )
+    except CircuitOpenError:
+        default_storage.delete(path)
+        return analysis_unavailable_response()
     except Exception as e:
         default_storage.delete(path)
         return error_response(
@@ -267,18 +329,20 @@ class MealPagination(PageNumberPagination):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
+@query_budget(5, max_repeats=1)
 def meals(request):
     if request.method == 'GET':
         meals_qs = Meal.objects.filter(user=request.user)
         
         paginator = MealPagination()
-        paginated_meals = paginator.paginate_queryset(meals_qs, request)
+        paginated_meals = paginator.paginate_queryset(MealHistory(meals_qs, request.user.id), request)
         serializer = MealListSerializer(paginated_meals, many=True, context={'request': request})
         
         return paginator.get_paginated_response(serializer.data)
     
     elif request.method == 'POST':
-        serializer = MealCreateSerializer(data=request.data)
+        serializer = MealCreateSerializer(data=request.data, context={'request': request})
         if not serializer.is_valid():
             return error_response(
                 message=_('Validation error'),
@@ -286,16 +350,44 @@ def meals(request):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
-        meal = serializer.save(user=request.user)
+        with transaction.atomic():
+            meal = serializer.save(user=request.user)
+            record_changes(request.user.id, upserts=[meal.id])
         return success_response(
             data=MealSerializer(meal, context={'request': request}).data,
             status_code=status.HTTP_201_CREATED
         )
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@query_budget(7, max_repeats=1)
+def meals_batch(request):
+    serializer = MealBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return error_response(
+            message=_('Validation error'),
+            errors=serializer.errors,
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    batch = MealBatch(request.user, serializer.validated_data['operations'], context={'request': request})
+    if not batch.apply():
+        return error_response(
+            message=_('Validation error'),
+            errors={'operations': batch.errors},
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return success_response(data={'results': batch.results})
+
+@conditional
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@query_budget(5, max_repeats=1)
 def meal_detail(request, pk):
-    meal = get_object_or_404(Meal, pk=pk, user=request.user)
+    meal = Meal.objects.filter(pk=pk, user=request.user).first()
+    if meal is None:
+        return archived_meal_detail(request, pk)
     
     if request.method == 'GET':
         serializer = MealSerializer(meal, context={'request': request})
@@ -311,18 +403,71 @@ def meal_detail(request, pk):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
+            record_changes(request.user.id, upserts=[meal.id])
         return success_response(data=serializer.data)
     
     elif request.method == 'DELETE':
-        meal.delete()
+        with transaction.atomic():
+            # An archived copy of the meal would otherwise resurface in the history
+            delete_archived(request.user.id, meal.id, month=meal.meal_date)
+            record_changes(request.user.id, deletes=[meal.id])
+            meal.delete()
         return success_response(
             message=_('Meal deleted successfully'),
             status_code=status.HTTP_204_NO_CONTENT
         )
 
+def archived_meal_detail(request, pk):
+    """meal_detail for a meal that is only in the archive: readable and deletable, not editable"""
+    if request.method == 'DELETE':
+        with transaction.atomic():
+            if not delete_archived(request.user.id, pk):
+                raise Http404
+            record_changes(request.user.id, deletes=[pk])
+        return success_response(
+            message=_('Meal deleted successfully'),
+            status_code=status.HTTP_204_NO_CONTENT
+        )
+    
+    meal = find_archived(request.user.id, pk)
+    if meal is None:
+        raise Http404
+    if request.method != 'GET':
+        return error_response(
+            message=_('Archived meals cannot be edited'),
+            code='meal_archived',
+            status_code=status.HTTP_409_CONFLICT
+        )
+    return success_response(data=MealSerializer(meal, context={'request': request}).data)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(3, max_repeats=1)
+def sync_meals(request):
+    serializer = MealSyncSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return error_response(
+            message=_('Validation error'),
+            errors=serializer.errors,
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    changes = changes_since(request.user.id, serializer.validated_data['since'])
+    return success_response(
+        data={
+            'cursor': changes['cursor'],
+            'has_more': changes['has_more'],
+            'meals': MealSerializer(changes['meals'], many=True, context={'request': request}).data,
+            'deleted': changes['deleted'],
+        }
+    )
+
+@conditional
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@query_budget(3)
 def daily_summary(request):
     date_str = request.query_params.get('date')
     
@@ -344,14 +489,63 @@ def daily_summary(request):
         user=request.user,
         meal_date=date_obj
     )
-    totals = calculate_daily_totals(meals_qs)
-    serializer = MealSerializer(meals_qs, many=True, context={'request': request})
+    with phase('db'):
+        meals_list = merge_day(list(meals_qs), request.user.id, date_obj)
+    with phase('totals'):
+        totals = calculate_daily_totals(meals_list)
+    with phase('serialize'):
+        meals_data = MealSerializer(meals_list, many=True, context={'request': request}).data
     
     return success_response(
         data={
             'date': date_str,
-            'meals': serializer.data,
-            'total_meals': meals_qs.count(),
+            'meals': meals_data,
+            'total_meals': len(meals_list),
             **totals
         }
-    )
\ No newline at end of file
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_meals(request):
+    serializer = MealExportSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return error_response(
+            message=_('Validation error'),
+            errors=serializer.errors,
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    params = serializer.validated_data
+    return export_response(request, request.user.id, params['type'], params.get('date_from'), params.get('date_to'))
+
+def can_access_meal_media(user, name):
+    from dietologists.models import Dietologist, ClientRequest
+
+    media_url = f"{settings.MEDIA_URL}meals/{name}"
+
+    if isinstance(user, Dietologist):
+        client_ids = ClientRequest.objects.filter(
+            group__dietologist=user,
+            status='approved'
+        ).values('user_id')
+        owner_id = media_owner_id(name)
+        if owner_id is not None:
+            return client_ids.filter(user_id=owner_id).exists()
+        return Meal.objects.filter(user_id__in=client_ids, image_url__endswith=media_url).exists()
+
+    owner_id = media_owner_id(name)
+    if owner_id is not None:
+        return owner_id == user.id
+    # Legacy paths carry no owner; the caller must have a meal that uses the file
+    return Meal.objects.filter(user=user, image_url__endswith=media_url).exists()
+
+@api_view(['GET', 'HEAD'])
+@authentication_classes([DietologistJWTAuthentication, CustomJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def meal_media(request, path):
+    if not can_access_meal_media(request.user, path):
+        # Do not reveal whether someone else's file exists
+        raise Http404
+
+    return serve_file(request, f"meals/{path}")
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+# Brings the migration history up to the User model (current_height became
+# height, goal was added, three choice fields widened), so test databases
+# can be built from migrations. The SQL is guarded, because databases
+# created from the models already have these columns.
+SYNC_COLUMNS = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'users' AND column_name = 'current_height')
+       AND NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'users' AND column_name = 'height') THEN
+        ALTER TABLE users RENAME COLUMN current_height TO height;
+    END IF;
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS goal varchar(50) NULL;
+    ALTER TABLE users ALTER COLUMN activeness_level TYPE varchar(50);
+    ALTER TABLE users ALTER COLUMN motivation TYPE varchar(50);
+    ALTER TABLE users ALTER COLUMN preferred_diet TYPE varchar(50);
+END $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(SYNC_COLUMNS, reverse_sql=migrations.RunSQL.noop),
+            ],
+            state_operations=[
+                migrations.RenameField(model_name='user', old_name='current_height', new_name='height'),
+                migrations.AddField(
+                    model_name='user',
+                    name='goal',
+                    field=models.CharField(blank=True, choices=[('lose_weight', 'Lose Weight'), ('gain_weight', 'Gain Weight'), ('maintain_weight', 'Maintain Weight')], max_length=50, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='activeness_level',
+                    field=models.CharField(blank=True, choices=[('sedentary', 'Sedentary'), ('lightly_active', 'Lightly Active'), ('moderately_active', 'Moderately Active'), ('very_active', 'Very Active'), ('extremely_active', 'Extremely Active')], max_length=50, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='motivation',
+                    field=models.CharField(blank=True, choices=[('vocation', 'Vocation'), ('wedding', 'Wedding'), ('competetion', 'Competetion'), ('other', 'Other'), ('no', 'No')], max_length=50, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='preferred_diet',
+                    field=models.CharField(blank=True, choices=[('artificial_intelligence', 'Artificial Intelligence'), ('balanced', 'Balanced'), ('low_carbs', 'Low Carbs'), ('keto', 'Keto'), ('high_protein', 'High Protein'), ('low_fat', 'Low Fat')], max_length=50, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from common.conditional import bump_version
+from .models import User
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_responses(instance, **kwargs):
+    # Cached responses skip authentication, so any change to the account,
+    # deactivation included, has to retire them (common.conditional)
+    bump_version(instance.pk)
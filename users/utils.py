@@ -1,9 +1,13 @@
+import logging
 import os
 import random
 import requests
 from requests.auth import HTTPBasicAuth
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
+from common.metrics import external_call
+
+logger = logging.getLogger(__name__)
 
 def generate_otp():
     return str(random.randint(100000, 999999))
@@ -31,25 +35,29 @@ def send_sms(phone_number, otp_code):
                 }
             ]
         }
-        response = requests.post(
-            request_url,
-            auth=auth,
-            json=request_data,
-            timeout=5
-        )
+        with external_call('sms', 'send') as call:
+            response = requests.post(
+                request_url,
+                auth=auth,
+                json=request_data,
+                timeout=5
+            )
+            if response.status_code != 200:
+                call.outcome = 'error'
         return response.status_code == 200
     except Exception as e:
-        print(f"SMS Error: {e}")
+        logger.error("SMS send failed: %s", e)
         return False
 
 def verify_google_token(token):
     try:
         client_id = os.getenv('GOOGLE_CLIENT_ID')
-        idinfo = id_token.verify_oauth2_token(
-            token, 
-            google_requests.Request(), 
-            client_id
-        )
+        with external_call('google', 'verify_token'):
+            idinfo = id_token.verify_oauth2_token(
+                token, 
+                google_requests.Request(), 
+                client_id
+            )
         return {
             'google_id': idinfo['sub'],
             'email': idinfo['email'],
@@ -57,5 +65,5 @@ def verify_google_token(token):
             'last_name': idinfo.get('family_name', '')
         }
     except Exception as e:
-        print(f"Google token verification error: {e}")
+        logger.warning("Google token verification failed: %s", e)
         return None
\ No newline at end of file
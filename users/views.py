@@ -11,6 +11,8 @@ from .serializers import (
 from .utils import generate_otp, send_sms, verify_google_token
 from django.utils.translation import gettext as _
 from common.responses import success_response, error_response
+from common.idempotency import idempotent
+from common.conditional import conditional
 
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
@@ -21,6 +23,7 @@ def get_tokens_for_user(user):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@idempotent
 def send_otp(request):
     serializer = SendOTPSerializer(data=request.data)
     if not serializer.is_valid():
@@ -157,6 +160,7 @@ def google_auth(request):
         }
     )
 
+@conditional
 @api_view(['GET', 'POST', 'PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def profile(request):